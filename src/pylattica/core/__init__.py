@@ -9,7 +9,13 @@ from .lattice import Lattice
 from .analyzer import StateAnalyzer
 from .structure_builder import StructureBuilder
 
-from .neighborhoods import Neighborhood, StochasticNeighborhood
+from .neighborhoods import (
+    CSRNeighborhood,
+    GridNeighborhood,
+    Neighborhood,
+    ShellNeighborhood,
+    StochasticNeighborhood,
+)
 from .neighborhood_builders import (
     DistanceNeighborhoodBuilder,
     MotifNeighborhoodBuilder,
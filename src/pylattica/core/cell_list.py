@@ -0,0 +1,342 @@
+import itertools
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from .constants import LOCATION, OFFSET_PRECISION, SITE_ID
+from .lattice import Lattice
+
+
+def _periodic_distances(
+    lattice: Lattice, frac_a: np.ndarray, frac_b: np.ndarray
+) -> np.ndarray:
+    # Distances between fractional coordinates as computed by pbc_diff_cart
+    frac_diff = np.subtract(frac_a, frac_b)
+    frac_diff -= np.round(frac_diff) * np.array(lattice.periodic, dtype=int)
+    return np.round(
+        np.linalg.norm(lattice.get_cartesian_coords(frac_diff), axis=-1),
+        OFFSET_PRECISION,
+    )
+
+
+class CellList:
+    """A spatial index which bins sites into a grid of cells in fractional
+    coordinates. Cells are at least as wide as the fractional extent of a
+    sphere of the given radius, so every site within radius of a location
+    lies in the cell of that location or in an adjacent one (wrapping around
+    periodic directions). This holds for skewed (triclinic) cells as well.
+    Sites can be added and removed at any time.
+
+    Along periodic directions the unit cell is divided into whole cells.
+    Along non-periodic directions cells extend indefinitely.
+
+    Distances are computed as by pbc_diff_cart, and queries return every
+    site at most radius away.
+    """
+
+    @classmethod
+    def from_structure(cls, struct: "PeriodicStructure", radius: float):
+        """Builds a CellList holding every site of a structure.
+
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure.
+        radius : float
+            The largest query radius the index must support.
+
+        Returns
+        -------
+        CellList
+            The index.
+        """
+        sites = struct.sites()
+        cell_list = cls(struct.lattice, radius)
+        cell_list.add_many(
+            [site[SITE_ID] for site in sites],
+            np.array([site[LOCATION] for site in sites], dtype=float),
+        )
+        return cell_list
+
+    def __init__(self, lattice: Lattice, radius: float):
+        """Instantiates an empty CellList.
+
+        Parameters
+        ----------
+        lattice : Lattice
+            The lattice of the structure whose sites are indexed.
+        radius : float
+            The largest query radius the index must support.
+        """
+        self.lattice = lattice
+        self.radius = radius
+        self._periodic = np.array(lattice.periodic, dtype=bool)
+
+        # Largest fractional displacement along each axis for a Cartesian
+        # displacement of length radius (plus rounding slack)
+        reach = (radius + 10**-OFFSET_PRECISION) * np.linalg.norm(
+            lattice.inv_matrix, axis=0
+        )
+        bins = np.maximum(1, np.floor(1 / reach)).astype(np.int64)
+        self.num_bins = np.where(self._periodic, bins, 0)
+        self.bin_width = np.where(self._periodic, 1 / np.maximum(bins, 1), reach)
+
+        self._cells: Dict[Tuple[int, ...], Set[int]] = {}
+        self._site_cells: Dict[int, Tuple[int, ...]] = {}
+        self._site_frac: Dict[int, np.ndarray] = {}
+        self._neighbor_offsets = list(itertools.product((-1, 0, 1), repeat=lattice.dim))
+
+    def __len__(self) -> int:
+        return len(self._site_cells)
+
+    def _cells_of_frac(self, frac: np.ndarray) -> np.ndarray:
+        idx = np.floor(frac / self.bin_width).astype(np.int64)
+        return np.where(self._periodic, idx % np.maximum(self.num_bins, 1), idx)
+
+    def cell_of(self, location: np.ndarray) -> Tuple[int, ...]:
+        """Returns the cell containing a Cartesian location.
+
+        Parameters
+        ----------
+        location : np.ndarray
+            The location.
+
+        Returns
+        -------
+        Tuple[int, ...]
+            The integer index of the cell along each axis.
+        """
+        frac = self.lattice.get_fractional_coords(np.asarray(location, dtype=float))
+        return tuple(self._cells_of_frac(frac).tolist())
+
+    def add(self, site_id: int, location: np.ndarray) -> None:
+        """Adds a site to the index.
+
+        Parameters
+        ----------
+        site_id : int
+            The ID of the site.
+        location : np.ndarray
+            The Cartesian location of the site.
+        """
+        frac = self.lattice.get_fractional_coords(np.asarray(location, dtype=float))
+        cell = tuple(self._cells_of_frac(frac).tolist())
+        self._cells.setdefault(cell, set()).add(site_id)
+        self._site_cells[site_id] = cell
+        self._site_frac[site_id] = frac
+
+    def add_many(self, site_ids: List[int], locations: np.ndarray) -> None:
+        """Adds many sites to the index at once.
+
+        Parameters
+        ----------
+        site_ids : List[int]
+            The IDs of the sites.
+        locations : np.ndarray
+            The Cartesian locations of the sites, of shape (num_sites, dim).
+        """
+        locations = np.asarray(locations, dtype=float).reshape(
+            len(site_ids), self.lattice.dim
+        )
+        frac = self.lattice.get_fractional_coords(locations)
+        cells = self._cells_of_frac(frac)
+        for site_id, site_frac, cell in zip(site_ids, frac, map(tuple, cells.tolist())):
+            self._cells.setdefault(cell, set()).add(site_id)
+            self._site_cells[site_id] = cell
+            self._site_frac[site_id] = site_frac
+
+    def remove(self, site_id: int) -> None:
+        """Removes a site from the index.
+
+        Parameters
+        ----------
+        site_id : int
+            The ID of the site.
+        """
+        cell = self._site_cells.pop(site_id)
+        del self._site_frac[site_id]
+        members = self._cells[cell]
+        members.discard(site_id)
+        if not members:
+            del self._cells[cell]
+
+    def adjacent_cells(self, cell: Tuple[int, ...]) -> Set[Tuple[int, ...]]:
+        """Returns a cell and the cells adjacent to it, each once.
+
+        Parameters
+        ----------
+        cell : Tuple[int, ...]
+            The cell.
+
+        Returns
+        -------
+        Set[Tuple[int, ...]]
+            The cells.
+        """
+        cells = set()
+        for offset in self._neighbor_offsets:
+            adjacent = []
+            for idx, delta, num_bins, periodic in zip(
+                cell, offset, self.num_bins.tolist(), self._periodic.tolist()
+            ):
+                adjacent.append((idx + delta) % num_bins if periodic else idx + delta)
+            cells.add(tuple(adjacent))
+        return cells
+
+    def candidates(self, location: np.ndarray) -> np.ndarray:
+        """Returns the IDs of the sites in the cell of a location and the
+        cells adjacent to it. These include every site within radius of the
+        location.
+
+        Parameters
+        ----------
+        location : np.ndarray
+            The Cartesian location.
+
+        Returns
+        -------
+        np.ndarray
+            The candidate site IDs.
+        """
+        ids = []
+        for cell in self.adjacent_cells(self.cell_of(location)):
+            ids.extend(self._cells.get(cell, ()))
+        return np.array(ids, dtype=np.int64)
+
+    def _check_radius(self, radius: float) -> float:
+        if radius is None:
+            return self.radius
+        if radius > self.radius:
+            raise ValueError(
+                f"The query radius {radius} exceeds the radius {self.radius} "
+                "of the CellList."
+            )
+        return radius
+
+    def sites_within(
+        self, location: np.ndarray, radius: float = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the sites at most radius away from a location.
+
+        Parameters
+        ----------
+        location : np.ndarray
+            The Cartesian location.
+        radius : float, optional
+            The query radius, at most the radius of the index, by default the
+            radius of the index.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The IDs of the sites, in increasing order, and their distances
+            from the location.
+        """
+        radius = self._check_radius(radius)
+        ids = np.sort(self.candidates(location))
+        if len(ids) == 0:
+            return ids, np.zeros(0)
+
+        site_frac = np.array([self._site_frac[site_id] for site_id in ids])
+        frac = self.lattice.get_fractional_coords(np.asarray(location, dtype=float))
+        dists = _periodic_distances(self.lattice, site_frac, frac)
+        within = dists <= radius
+        return ids[within], dists[within]
+
+    def pairs_within(
+        self, radius: float = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds every pair of distinct sites at most radius apart. Candidate
+        pairs are generated for all sites at once by matching each cell with
+        its adjacent cells.
+
+        Parameters
+        ----------
+        radius : float, optional
+            The query radius, at most the radius of the index, by default the
+            radius of the index.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The IDs of the first and second site of each pair, where the
+            first is the smaller, and their distances.
+        """
+        radius = self._check_radius(radius)
+        ids = np.fromiter(self._site_cells.keys(), dtype=np.int64, count=len(self))
+        if len(ids) == 0:
+            return ids, ids, np.zeros(0)
+        cells = np.array(list(self._site_cells.values()), dtype=np.int64).reshape(
+            len(ids), self.lattice.dim
+        )
+        frac = np.array(list(self._site_frac.values()), dtype=float).reshape(
+            len(ids), self.lattice.dim
+        )
+
+        # Cells are numbered in a grid which leaves room for the adjacent
+        # cells of the outermost sites along non-periodic directions
+        low = cells.min(axis=0) - 1
+        shape = np.where(self._periodic, self.num_bins, cells.max(axis=0) - low + 2)
+        cell_keys = np.ravel_multi_index(
+            tuple(np.where(self._periodic, cells, cells - low).T), shape
+        )
+        order = np.argsort(cell_keys, kind="stable")
+        sorted_keys = cell_keys[order]
+
+        # Offsets to adjacent cells, reduced modulo the number of bins along
+        # periodic directions so that no cell is visited twice
+        axis_offsets = [
+            (
+                sorted({delta % num_bins for delta in (-1, 0, 1)})
+                if periodic
+                else (-1, 0, 1)
+            )
+            for num_bins, periodic in zip(self.num_bins.tolist(), self._periodic)
+        ]
+
+        firsts, seconds = [], []
+        visited = set()
+        for offset in itertools.product(*axis_offsets):
+            # The pairs found through an offset are those found through its
+            # negation, reversed, so only one of the two is visited
+            negated = tuple(
+                -delta % num_bins if periodic else -delta
+                for delta, num_bins, periodic in zip(
+                    offset, self.num_bins.tolist(), self._periodic
+                )
+            )
+            if negated in visited:
+                continue
+            visited.add(offset)
+
+            adjacent = cells + np.array(offset, dtype=np.int64)
+            adjacent = np.where(
+                self._periodic, adjacent % np.maximum(shape, 1), adjacent - low
+            )
+            adjacent_keys = np.ravel_multi_index(tuple(adjacent.T), shape)
+            starts = np.searchsorted(sorted_keys, adjacent_keys, side="left")
+            counts = np.searchsorted(sorted_keys, adjacent_keys, side="right") - starts
+
+            first = np.repeat(np.arange(len(ids)), counts)
+            second = order[
+                np.arange(counts.sum())
+                - np.repeat(np.cumsum(counts) - counts, counts)
+                + np.repeat(starts, counts)
+            ]
+            if negated == offset:
+                # Every pair is found from both of its sites, so keep one
+                keep = ids[first] < ids[second]
+                first, second = first[keep], second[keep]
+            firsts.append(first)
+            seconds.append(second)
+
+        first = np.concatenate(firsts) if firsts else np.zeros(0, dtype=np.int64)
+        second = np.concatenate(seconds) if seconds else np.zeros(0, dtype=np.int64)
+        dists = _periodic_distances(self.lattice, frac[first], frac[second])
+        within = dists <= radius
+        first_ids, second_ids = ids[first[within]], ids[second[within]]
+        return (
+            np.minimum(first_ids, second_ids),
+            np.maximum(first_ids, second_ids),
+            dists[within],
+        )
@@ -0,0 +1,165 @@
+import bisect
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Dict, Iterator, List
+
+from .result_codecs import get_codec
+
+
+class CompressedDiffHistory(Sequence):
+    """A list-like store of diffs which keeps only a hot tail of recent diffs
+    as Python dictionaries. Each time the tail grows to block_size diffs, it
+    is packed into a single compressed binary block (see
+    pylattica.core.result_codecs). Blocks are decoded again when the diffs in
+    them are read, and a few decoded blocks are cached so that sequential
+    access decodes each block once.
+
+    Diffs read back from a compressed block are new objects equal to the
+    ones that were appended.
+    """
+
+    def __init__(
+        self,
+        block_size: int = 1000,
+        codec: str = "columnar",
+        compression: str = "zlib",
+        cache_size: int = 2,
+    ):
+        """Instantiates an empty history.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            The number of diffs packed into each compressed block, and the
+            maximum length of the uncompressed tail, by default 1000.
+        codec : str, optional
+            The codec used to encode blocks, by default "columnar".
+        compression : str, optional
+            The compression applied to blocks, by default "zlib".
+        cache_size : int, optional
+            The number of decoded blocks kept in memory, by default 2.
+        """
+        self.block_size = block_size
+        self._codec = get_codec(codec, compression=compression)
+        self._blocks: List[bytes] = []
+        self._block_lens: List[int] = []
+        self._block_starts: List[int] = []
+        self._num_packed = 0
+        self._tail: List[Dict] = []
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    @property
+    def num_blocks(self) -> int:
+        """The number of compressed blocks."""
+        return len(self._blocks)
+
+    @property
+    def packed_nbytes(self) -> int:
+        """The total size of the compressed blocks in bytes."""
+        return sum(len(block) for block in self._blocks)
+
+    def __len__(self) -> int:
+        return self._num_packed + len(self._tail)
+
+    def append(self, diff: Dict) -> None:
+        """Appends a diff, packing the tail into a block if it is full.
+
+        Parameters
+        ----------
+        diff : Dict
+            The diff to append.
+        """
+        self._tail.append(diff)
+        if len(self._tail) >= self.block_size:
+            self._pack_tail()
+
+    def _pack_tail(self) -> None:
+        self._blocks.append(self._codec.encode_diffs(self._tail))
+        self._block_lens.append(len(self._tail))
+        self._block_starts.append(self._num_packed)
+        self._num_packed += len(self._tail)
+        self._tail = []
+
+    def _block(self, block_idx: int) -> List[Dict]:
+        if block_idx in self._cache:
+            self._cache.move_to_end(block_idx)
+            return self._cache[block_idx]
+
+        diffs = self._codec.decode_diffs(self._blocks[block_idx])
+        self._cache[block_idx] = diffs
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return diffs
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, stride = idx.indices(len(self))
+            if stride != 1:
+                return list(self.iter_range(0, len(self)))[idx]
+            return list(self.iter_range(start, stop))
+
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("diff index out of range")
+
+        if idx >= self._num_packed:
+            return self._tail[idx - self._num_packed]
+
+        block_idx = bisect.bisect_right(self._block_starts, idx) - 1
+        return self._block(block_idx)[idx - self._block_starts[block_idx]]
+
+    def iter_range(self, start: int, stop: int) -> Iterator[Dict]:
+        """Yields the diffs with indices in [start, stop), decoding each
+        block at most once.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first diff.
+        stop : int
+            One past the index of the last diff.
+        """
+        idx = start
+        packed_stop = min(stop, self._num_packed)
+        while idx < packed_stop:
+            block_idx = bisect.bisect_right(self._block_starts, idx) - 1
+            block_start = self._block_starts[block_idx]
+            block_stop = min(packed_stop - block_start, self._block_lens[block_idx])
+            yield from self._block(block_idx)[idx - block_start : block_stop]
+            idx = block_start + block_stop
+
+        yield from self._tail[
+            max(start - self._num_packed, 0) : max(stop - self._num_packed, 0)
+        ]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_range(0, len(self))
+
+    def __delitem__(self, idx) -> None:
+        # Only dropping a prefix (del history[:n]) is supported, which is what
+        # SimulationResult does when it creates a checkpoint
+        if not isinstance(idx, slice) or idx.start not in (None, 0) or idx.step:
+            raise TypeError("Only a leading slice can be deleted from the history.")
+
+        num_drop = min(len(self) if idx.stop is None else idx.stop, len(self))
+        self._cache.clear()
+        while self._blocks and self._block_lens[0] <= num_drop:
+            num_drop -= self._block_lens.pop(0)
+            self._blocks.pop(0)
+
+        if self._blocks and num_drop > 0:
+            remaining = self._codec.decode_diffs(self._blocks[0])[num_drop:]
+            self._blocks[0] = self._codec.encode_diffs(remaining)
+            self._block_lens[0] = len(remaining)
+            num_drop = 0
+
+        if num_drop > 0:
+            del self._tail[:num_drop]
+
+        self._block_starts = []
+        self._num_packed = 0
+        for block_len in self._block_lens:
+            self._block_starts.append(self._num_packed)
+            self._num_packed += block_len
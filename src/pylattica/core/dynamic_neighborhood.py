@@ -0,0 +1,122 @@
+from typing import Dict, List, Tuple
+
+from .neighborhood_builders import DistanceNeighborhoodBuilder
+from .neighborhoods import AbstractNeighborhood, CSRNeighborhood
+from .periodic_structure import PeriodicStructure
+
+
+class DynamicNeighborhood(AbstractNeighborhood):
+    """A distance-cutoff neighborhood (as built by DistanceNeighborhoodBuilder)
+    that stays valid while sites are added to and removed from its structure,
+    e.g. in deposition or growth models. Sites are found through the CellList
+    of the structure (see PeriodicStructure.cell_list), so adding or removing
+    a site only computes the connections of that site, from the sites in the
+    neighboring cells.
+
+    Sites must be added and removed through add_site and remove_site of this
+    class rather than those of the structure, which they call.
+    """
+
+    def __init__(self, struct: PeriodicStructure, cutoff: float):
+        """Builds the neighborhood of the current sites of the structure.
+
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure. It is modified in place by add_site and
+            remove_site.
+        cutoff : float
+            Sites closer than this distance are neighbors.
+        """
+        self.struct = struct
+        self.cutoff = cutoff
+
+        initial = DistanceNeighborhoodBuilder(cutoff).get(struct)
+        self._neighbors: Dict[int, Dict[int, float]] = {
+            site_id: dict(initial.neighbors_of(site_id, include_weights=True))
+            for site_id in struct.site_ids
+        }
+
+    def _find_neighbors(self, site_id: int) -> List[Tuple[int, float]]:
+        # The neighbors of one site, from the CellList of the structure
+        nb_ids, dists = self.struct.sites_within(
+            self.struct.site_location(site_id), self.cutoff
+        )
+        keep = (nb_ids != site_id) & (dists < self.cutoff)
+        return list(zip(nb_ids[keep].tolist(), dists[keep].tolist()))
+
+    def add_site(self, site_class: str, location: Tuple[float]) -> int:
+        """Adds a site to the structure and connects it to its neighbors.
+
+        Parameters
+        ----------
+        site_class : str
+            The class of the new site.
+        location : Tuple[float]
+            The location of the new site in Cartesian coordinates.
+
+        Returns
+        -------
+        int
+            The ID of the new site.
+        """
+        site_id = self.struct.add_site(site_class, location)
+
+        nbs = self._find_neighbors(site_id)
+        self._neighbors[site_id] = dict(nbs)
+        for nb_id, dist in nbs:
+            self._neighbors[nb_id][site_id] = dist
+        return site_id
+
+    def remove_site(self, site_id: int) -> None:
+        """Removes a site from the structure along with its connections.
+
+        Parameters
+        ----------
+        site_id : int
+            The ID of the site to remove.
+        """
+        self.struct.remove_site(site_id)
+        for nb_id in self._neighbors.pop(site_id):
+            del self._neighbors[nb_id][site_id]
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
+        """Retrieves a list of the IDs of the sites which are neighbors of the
+        provided site. Optionally includes the weights of the connections to those
+        neighbors.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved
+        include_weights : bool, optional
+            Whether or not weights if the neighbor connections should
+            be included, by default False
+
+        Returns
+        -------
+        list[int]
+            Either a list of site IDs, or a list of tuples of (site ID, connection weight)
+        """
+        nbs = self._neighbors.get(site_id, {})
+        if include_weights:
+            return list(nbs.items())
+        return list(nbs)
+
+    def as_csr(self) -> CSRNeighborhood:
+        """Returns a snapshot of the current connections as a CSRNeighborhood.
+        It is not updated by later changes.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent array-backed neighborhood.
+        """
+        sources, targets, weights = [], [], []
+        for site_id, nbs in self._neighbors.items():
+            sources.extend([site_id] * len(nbs))
+            targets.extend(nbs.keys())
+            weights.extend(nbs.values())
+        return CSRNeighborhood.from_edges(
+            sources, targets, weights, num_sites=self.struct.id_limit
+        )
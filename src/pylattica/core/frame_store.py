@@ -0,0 +1,334 @@
+from collections import Counter, OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from .constants import GENERAL, SITE_ID, SITES
+from .simulation_state import SimulationState, _site_updates
+
+_MISSING = object()
+
+
+def _entry_hash(site_id, key, value) -> int:
+    if isinstance(value, np.ndarray):
+        # Arrays are hashed by their contents, which their repr may round or
+        # truncate
+        value = (value.dtype.str, value.shape, value.tobytes())
+    try:
+        return hash((site_id, key, value))
+    except TypeError:
+        # Other unhashable values (lists, dicts) are hashed through their repr
+        return hash((site_id, key, repr(value)))
+
+
+def _values_equal(first, second) -> bool:
+    # Equality of two state values. Values that cannot be compared with ==
+    # (e.g. containers of arrays) count as different.
+    if isinstance(first, np.ndarray) or isinstance(second, np.ndarray):
+        return (
+            isinstance(first, np.ndarray)
+            and isinstance(second, np.ndarray)
+            and first.dtype == second.dtype
+            and np.array_equal(first, second)
+        )
+    try:
+        return bool(first == second)
+    except (TypeError, ValueError):
+        return False
+
+
+def _states_equal(first: SimulationState, second: SimulationState) -> bool:
+    first_raw, second_raw = first.get_state(), second.get_state()
+    pairs = [(first_raw[GENERAL], second_raw[GENERAL])]
+    if first_raw[SITES].keys() != second_raw[SITES].keys():
+        return False
+    for site_id, site_state in first_raw[SITES].items():
+        pairs.append((site_state, second_raw[SITES][site_id]))
+    for first_values, second_values in pairs:
+        if first_values.keys() != second_values.keys():
+            return False
+        for key, value in first_values.items():
+            if not _values_equal(value, second_values[key]):
+                return False
+    return True
+
+
+def state_fingerprint(state: SimulationState) -> int:
+    """Computes the fingerprint of a state from scratch. The fingerprint is
+    the XOR of a hash of every (site, key, value) entry of the state, so it
+    can be updated incrementally as individual entries change.
+
+    Parameters
+    ----------
+    state : SimulationState
+        The state to fingerprint.
+
+    Returns
+    -------
+    int
+        The fingerprint.
+    """
+    fingerprint = 0
+    raw = state.get_state()
+    for site_id, site_state in raw[SITES].items():
+        for key, value in site_state.items():
+            fingerprint ^= _entry_hash(site_id, key, value)
+    for key, value in raw[GENERAL].items():
+        fingerprint ^= _entry_hash(GENERAL, key, value)
+    return fingerprint
+
+
+class _Delta:
+    """A stored frame expressed as a diff from another stored frame."""
+
+    __slots__ = ("base", "diff", "depth")
+
+    def __init__(self, base: int, diff: Dict, depth: int):
+        self.base = base
+        self.diff = diff
+        self.depth = depth
+
+
+class FrameStore(MutableMapping):
+    """A mapping from step numbers to frames which stores each distinct
+    state once, keyed by its fingerprint (see state_fingerprint). Steps whose
+    states are identical, e.g. once a run has settled, share a single stored
+    frame. A frame that differs from the previous frame at only a small
+    fraction of sites is stored as a diff against it rather than as a copy.
+
+    Frames are normally added with observe and add, which maintain the
+    fingerprint of the live state incrementally, so adding a frame costs time
+    proportional to the updates since the previous frame rather than to the
+    size of the state. Assigning a frame directly (store[step] = state)
+    fingerprints the state from scratch.
+
+    Fingerprints are only used to find candidate frames: a frame is shared
+    only if its state is equal to the stored one, so distinct states whose
+    fingerprints collide are stored separately.
+    """
+
+    def __init__(self, delta_threshold: float = 0.1, max_delta_chain: int = 16):
+        """Instantiates an empty store.
+
+        Parameters
+        ----------
+        delta_threshold : float, optional
+            Frames in which at most this fraction of the sites differs from
+            the previous frame are stored as diffs, by default 0.1.
+        max_delta_chain : int, optional
+            The maximum number of diffs that must be applied to a full copy to
+            rebuild any frame, by default 16. This bounds the cost of reading
+            a frame.
+        """
+        self.delta_threshold = delta_threshold
+        self.max_delta_chain = max_delta_chain
+        # Steps refer to stored entries by key, and the keys of the entries
+        # with each fingerprint are listed in _buckets
+        self._steps: Dict[int, int] = {}
+        self._entries: Dict[int, object] = {}
+        self._entry_fingerprints: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._next_key = 0
+        self._refs = Counter()
+        self._cache = OrderedDict()
+
+        # Tracking of the live state since the last frame
+        self._fingerprint = None
+        self._last_key = None
+        self._site_baseline: Dict[int, Dict] = {}
+        self._general_baseline: Dict = {}
+
+    @property
+    def num_stored(self) -> int:
+        """The number of distinct frames stored."""
+        return len(self._entries)
+
+    @property
+    def num_deltas(self) -> int:
+        """The number of distinct frames stored as diffs."""
+        return sum(isinstance(entry, _Delta) for entry in self._entries.values())
+
+    def observe(self, state: SimulationState, diff: Dict) -> None:
+        """Records a diff that is about to be applied to the live state. This
+        must be called for every diff between frames added with add.
+
+        Parameters
+        ----------
+        state : SimulationState
+            The live state, before diff is applied.
+        diff : Dict
+            The diff.
+        """
+        for site_id, updates in _site_updates(diff).items():
+            site_state = state.get_site_state(site_id)
+            baseline = self._site_baseline.setdefault(site_id, {})
+            if site_state is None:
+                site_state = {}
+                baseline[SITE_ID] = _MISSING
+                self._fingerprint ^= _entry_hash(site_id, SITE_ID, site_id)
+
+            for key, value in updates.items():
+                old = site_state.get(key, _MISSING)
+                if key not in baseline:
+                    baseline[key] = old
+                if old is not _MISSING:
+                    self._fingerprint ^= _entry_hash(site_id, key, old)
+                self._fingerprint ^= _entry_hash(site_id, key, value)
+
+        if GENERAL in diff:
+            general = state.get_general_state()
+            for key, value in diff[GENERAL].items():
+                old = general.get(key, _MISSING)
+                if key not in self._general_baseline:
+                    self._general_baseline[key] = old
+                if old is not _MISSING:
+                    self._fingerprint ^= _entry_hash(GENERAL, key, old)
+                self._fingerprint ^= _entry_hash(GENERAL, key, value)
+
+    def track(self, state: SimulationState) -> None:
+        """Starts tracking the live state from state, which is fingerprinted
+        from scratch. Updates recorded with observe are then relative to it.
+        This is needed when the live state is not the last frame added, e.g.
+        when frames were assigned directly.
+
+        Parameters
+        ----------
+        state : SimulationState
+            The live state.
+        """
+        fingerprint = state_fingerprint(state)
+        self._reset_tracking(fingerprint, self._find(fingerprint, state))
+
+    def _delta_since_last(self, state: SimulationState) -> Dict:
+        sites = {}
+        for site_id, baseline in self._site_baseline.items():
+            site_state = state.get_site_state(site_id)
+            updates = {
+                key: site_state[key]
+                for key, old in baseline.items()
+                if key != SITE_ID and not _values_equal(site_state[key], old)
+            }
+            # Sites created since the last frame are kept even without updates
+            if updates or baseline.get(SITE_ID) is _MISSING:
+                sites[site_id] = updates
+
+        general = state.get_general_state()
+        general_updates = {
+            key: general[key]
+            for key, old in self._general_baseline.items()
+            if not _values_equal(general[key], old)
+        }
+        if general_updates:
+            return {SITES: sites, GENERAL: general_updates}
+        return sites
+
+    def add(self, step_no: int, state: SimulationState) -> None:
+        """Adds the live state as the frame for step_no, using the updates
+        recorded with observe since the previous frame. The state is copied
+        only if it is not already stored and is not stored as a diff.
+
+        Parameters
+        ----------
+        step_no : int
+            The step of the frame.
+        state : SimulationState
+            The live state.
+        """
+        fingerprint = self._fingerprint
+        key = self._find(fingerprint, state)
+        if key is None:
+            delta = self._delta_since_last(state)
+            num_changed = len(_site_updates(delta))
+            base = self._entries.get(self._last_key)
+            depth = base.depth + 1 if isinstance(base, _Delta) else 1
+            if (
+                base is not None
+                and depth <= self.max_delta_chain
+                and num_changed <= self.delta_threshold * max(state.size, 1)
+            ):
+                entry = _Delta(self._last_key, delta, depth)
+                self._refs[self._last_key] += 1
+            else:
+                entry = state.copy()
+            key = self._store(fingerprint, entry)
+
+        self._set_step(step_no, key)
+        self._reset_tracking(fingerprint, key)
+
+    def _find(self, fingerprint: int, state: SimulationState) -> int:
+        # The key of the stored entry equal to state, or None
+        for key in self._buckets.get(fingerprint, ()):
+            if _states_equal(self._materialize(key), state):
+                return key
+        return None
+
+    def _store(self, fingerprint: int, entry) -> int:
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = entry
+        self._entry_fingerprints[key] = fingerprint
+        self._buckets.setdefault(fingerprint, []).append(key)
+        return key
+
+    def _reset_tracking(self, fingerprint: int, key: int) -> None:
+        self._fingerprint = fingerprint
+        self._last_key = key
+        self._site_baseline = {}
+        self._general_baseline = {}
+
+    def _set_step(self, step_no: int, key: int) -> None:
+        # Take the new reference first, in case the step already refers to it
+        self._refs[key] += 1
+        if step_no in self._steps:
+            self._release(self._steps[step_no])
+        self._steps[step_no] = key
+
+    def _release(self, key: int) -> None:
+        self._refs[key] -= 1
+        if self._refs[key] <= 0:
+            del self._refs[key]
+            entry = self._entries.pop(key)
+            self._cache.pop(key, None)
+            fingerprint = self._entry_fingerprints.pop(key)
+            self._buckets[fingerprint].remove(key)
+            if not self._buckets[fingerprint]:
+                del self._buckets[fingerprint]
+            if isinstance(entry, _Delta):
+                self._release(entry.base)
+
+    def _materialize(self, key: int) -> SimulationState:
+        entry = self._entries[key]
+        if not isinstance(entry, _Delta):
+            return entry
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        state = self._materialize(entry.base).copy()
+        state.batch_update(entry.diff)
+        self._cache[key] = state
+        if len(self._cache) > 2:
+            self._cache.popitem(last=False)
+        return state
+
+    def __getitem__(self, step_no: int) -> SimulationState:
+        return self._materialize(self._steps[step_no])
+
+    def __setitem__(self, step_no: int, state: SimulationState) -> None:
+        fingerprint = state_fingerprint(state)
+        key = self._find(fingerprint, state)
+        if key is None:
+            key = self._store(fingerprint, state)
+        self._set_step(step_no, key)
+        self._reset_tracking(fingerprint, key)
+
+    def __delitem__(self, step_no: int) -> None:
+        key = self._steps.pop(step_no)
+        self._release(key)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._steps)
+
+    def __len__(self) -> int:
+        return len(self._steps)
@@ -1,26 +1,192 @@
-from typing import Dict, List, Tuple
+import itertools
+import math
+import multiprocessing as mp
+import sys
+from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
 import rustworkx as rx
 from tqdm import tqdm
-from scipy.spatial import cKDTree
+from scipy.spatial import Voronoi, cKDTree
 
 from abc import abstractmethod
 
-from .constants import LOCATION, SITE_ID
+from .cell_list import CellList
+from .constants import LOCATION, OFFSET_PRECISION, SITE_CLASS, SITE_ID
 from .distance_map import EuclideanDistanceMap
-from .neighborhoods import Neighborhood, StochasticNeighborhood, SiteClassNeighborhood
+from .neighborhoods import (
+    CSRNeighborhood,
+    Neighborhood,
+    ShellNeighborhood,
+    StochasticNeighborhood,
+    SiteClassNeighborhood,
+)
 from .periodic_structure import PeriodicStructure
-from .lattice import pbc_diff_cart
+
+
+def _is_orthogonal(matrix: np.ndarray) -> bool:
+    # Whether the lattice vectors point along the positive coordinate axes
+    return bool(
+        np.allclose(matrix, np.diag(np.diag(matrix))) and np.all(np.diag(matrix) > 0)
+    )
+
+
+def _pairs_within(
+    struct: PeriodicStructure,
+    cutoff: float,
+    site_class: str = None,
+    cached: bool = True,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds every ordered pair of distinct sites (source, target) whose
+    periodic distance, as computed by pbc_diff_cart, is at most cutoff, where
+    the source is of site_class (if given). Returns the source IDs, target IDs
+    and distances. Searches that try many cutoffs pass cached=False, so that
+    they do not replace the CellList cached by the structure.
+    """
+    if struct.tiling is not None and _is_orthogonal(struct.lattice.matrix):
+        # In skewed cells, pbc_diff_cart breaks ties between images by the
+        # sign of the displacement, which tiling cannot reproduce
+        return _tiled_pairs_within(struct, cutoff, site_class)
+
+    # Candidate pairs come from a CellList, which bins sites in fractional
+    # coordinates and so handles skewed cells too
+    if cached:
+        cell_list = struct.cell_list(cutoff)
+    else:
+        cell_list = CellList.from_structure(struct, cutoff)
+    first, second, dists = cell_list.pairs_within(cutoff)
+
+    sources = np.concatenate([first, second])
+    targets = np.concatenate([second, first])
+    dists = np.concatenate([dists, dists])
+    if site_class is not None:
+        site_classes = np.empty(struct.id_limit, dtype=object)
+        for site in struct.sites():
+            site_classes[site[SITE_ID]] = site[SITE_CLASS]
+        in_class = site_classes[sources] == site_class
+        sources, targets, dists = sources[in_class], targets[in_class], dists[in_class]
+
+    return sources, targets, dists
+
+
+def _tiled_pairs_within(
+    struct: PeriodicStructure, cutoff: float, site_class: str = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Same as _pairs_within for structures that are tilings of an orthogonal
+    unit cell. The neighbors within cutoff are found for the basis sites of
+    one cell only, and then tiled across the structure.
+    """
+    tiling = struct.tiling
+    unit = tiling.unit_lattice
+    num_basis = tiling.num_basis
+    search_radius = cutoff + 10**-OFFSET_PRECISION
+
+    # Range of cell offsets which can hold a neighbor of some basis site
+    basis_frac = tiling.basis_frac_coords
+    reach = search_radius * np.linalg.norm(unit.inv_matrix, ord=2) + (
+        basis_frac.max(axis=0) - basis_frac.min(axis=0)
+    )
+    axis_offsets = []
+    for axis, num_cells in enumerate(tiling.num_cells):
+        axis_reach = min(int(np.ceil(reach[axis])), num_cells - 1)
+        if unit.periodic[axis] and 2 * axis_reach + 1 >= num_cells:
+            axis_offsets.append(np.arange(num_cells))
+        else:
+            axis_offsets.append(np.arange(-axis_reach, axis_reach + 1))
+    cell_offsets = np.stack(np.meshgrid(*axis_offsets, indexing="ij"), axis=-1)
+    cell_offsets = cell_offsets.reshape(-1, struct.dim)
+
+    # Every (source basis site, cell offset, target basis site) combination
+    src_b, off_idx, tgt_b = (
+        idx.ravel()
+        for idx in np.meshgrid(
+            np.arange(num_basis),
+            np.arange(len(cell_offsets)),
+            np.arange(num_basis),
+            indexing="ij",
+        )
+    )
+    offsets = cell_offsets[off_idx]
+    displacement = (
+        offsets @ unit.matrix
+        + tiling.basis_locations[tgt_b]
+        - tiling.basis_locations[src_b]
+    )
+
+    # Distances as computed by pbc_diff_cart in the full structure
+    lattice = struct.lattice
+    frac_diff = lattice.get_fractional_coords(displacement)
+    frac_diff -= np.round(frac_diff) * np.array(lattice.periodic, dtype=int)
+    dists = np.round(
+        np.linalg.norm(lattice.get_cartesian_coords(frac_diff), axis=1),
+        OFFSET_PRECISION,
+    )
+
+    is_self = np.all(offsets == 0, axis=1) & (src_b == tgt_b)
+    keep = (dists <= cutoff) & ~is_self
+    if site_class is not None:
+        keep &= np.array(tiling.basis_classes, dtype=object)[src_b] == site_class
+
+    return tiling.tile(src_b[keep], offsets[keep], tgt_b[keep], dists[keep])
+
+
+_mp_globals = {}
+
+
+def _neighbor_edges(
+    builder: "NeighborhoodBuilder", struct: PeriodicStructure, sites: Iterable[Dict]
+) -> List[Tuple]:
+    # The (site, neighbor, weight) connections of every site
+    edges = []
+    for curr_site in sites:
+        site_id = curr_site[SITE_ID]
+        edges.extend(
+            (site_id, nb_id, weight)
+            for nb_id, weight in builder.get_neighbors(curr_site, struct)
+        )
+    return edges
+
+
+def _neighbor_edges_parallel(chunk: Tuple[int, int]) -> List[Tuple]:  # pragma: no cover
+    start, stop = chunk
+    return _neighbor_edges(
+        _mp_globals["builder"], _mp_globals["struct"], _mp_globals["sites"][start:stop]
+    )
+
+
+def _pairs_to_neighborhood(
+    struct: PeriodicStructure, sources: np.ndarray, targets: np.ndarray, dists
+) -> CSRNeighborhood:
+    # Neighbors of each site are ordered by ID so that builds are deterministic
+    order = np.lexsort((targets, sources))
+    return CSRNeighborhood.from_edges(
+        sources[order], targets[order], dists[order], num_sites=struct.id_limit
+    )
 
 
 class NeighborhoodBuilder:
     """An abstract class to extend in order to implement a new type of
-    NeighborhoodBuilder"""
-
-    def get(self, struct: PeriodicStructure, site_class: str = None) -> Neighborhood:
+    NeighborhoodBuilder. Subclasses implement get_neighbors, which the
+    generic get calls for every site, or override get with a faster bulk
+    construction."""
+
+    def get(  # pylint: disable=too-many-positional-arguments
+        self,
+        struct: PeriodicStructure,
+        site_class: str = None,
+        parallel: bool = False,
+        workers: int = None,
+        chunk_size: int = None,
+    ) -> Neighborhood:
         """Given a structure and a site class to build a neighborhood for,
-        build the neighborhood.
+        build the neighborhood by calling get_neighbors for every site.
+
+        With parallel=True, the sites are split into chunks whose neighbors
+        are computed by a pool of forked worker processes, which share the
+        builder and the structure with the parent process. The neighbor lists
+        are merged in site order, so the result is the same as a serial
+        build. Parallel construction relies on fork and is not available on
+        Windows.
 
         Parameters
         ----------
@@ -30,12 +196,30 @@ class NeighborhoodBuilder:
         site_class : str, optional
             Specify a single class of sites to calculate the neighborhood for,
             by default None
+        parallel : bool, optional
+            Whether to compute neighbors in worker processes, by default False.
+        workers : int, optional
+            The number of worker processes, by default one per CPU.
+        chunk_size : int, optional
+            The number of sites handled by a worker at a time, by default
+            enough for four chunks per worker.
 
         Returns
         -------
         Neighborhood
-            _description_
+            The resulting Neighborhood
+
+        Raises
+        ------
+        ValueError
+            If parallel is True on Windows.
         """
+        if parallel and sys.platform.startswith("win"):
+            raise ValueError(
+                "Parallel neighborhood construction relies on fork, which is "
+                "not available on Windows. Use parallel=False instead."
+            )
+
         graph = rx.PyDiGraph()
 
         if site_class is None:
@@ -43,16 +227,45 @@ class NeighborhoodBuilder:
         else:
             sites = struct.sites(site_class=site_class)
 
-        for site in struct.sites():
-            graph.add_node(site[SITE_ID])
+        graph.add_nodes_from([site[SITE_ID] for site in struct.sites()])
+
+        if not parallel or len(sites) <= 1:
+            edge_lists = [_neighbor_edges(self, struct, tqdm(sites))]
+        else:
+            edge_lists = self._parallel_edges(struct, sites, workers, chunk_size)
 
-        for curr_site in tqdm(sites):
-            nbs = self.get_neighbors(curr_site, struct)
-            for nb_id, weight in nbs:
-                graph.add_edge(curr_site[SITE_ID], nb_id, weight)
+        for edges in edge_lists:
+            graph.extend_from_weighted_edge_list(edges)
 
         return Neighborhood(graph)
 
+    def _parallel_edges(
+        self, struct: PeriodicStructure, sites: List[Dict], workers: int, chunk_size
+    ) -> List[List[Tuple]]:
+        global _mp_globals  # pylint: disable=global-variable-not-assigned
+        _mp_globals["builder"] = self
+        _mp_globals["struct"] = struct
+        _mp_globals["sites"] = sites
+
+        if workers is None:
+            PROCESSES = mp.cpu_count()
+        else:
+            PROCESSES = workers
+        if chunk_size is None:
+            chunk_size = math.ceil(len(sites) / (4 * PROCESSES))
+        chunks = [
+            (start, min(start + chunk_size, len(sites)))
+            for start in range(0, len(sites), chunk_size)
+        ]
+
+        try:
+            with mp.get_context("fork").Pool(min(PROCESSES, len(chunks))) as pool:
+                return list(
+                    tqdm(pool.imap(_neighbor_edges_parallel, chunks), total=len(chunks))
+                )
+        finally:
+            _mp_globals.clear()
+
     @abstractmethod
     def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
         pass  # pragma: no cover
@@ -74,9 +287,10 @@ class StochasticNeighborhoodBuilder(NeighborhoodBuilder):
         """
         self.builders = builders
 
-    def get(self, struct: PeriodicStructure) -> Neighborhood:
+    def get(self, struct: PeriodicStructure) -> StochasticNeighborhood:
         """For the provided structure, calculate the StochasticNeighborhood
         specified by the list of builders originally provided to this class.
+        The connections shared by every variant are stored once.
 
         Parameters
         ----------
@@ -85,7 +299,7 @@ class StochasticNeighborhoodBuilder(NeighborhoodBuilder):
 
         Returns
         -------
-        Neighborhood
+        StochasticNeighborhood
             The resulting StochasticNeighborhood
         """
         return StochasticNeighborhood([b.get(struct) for b in self.builders])
@@ -95,8 +309,10 @@ class DistanceNeighborhoodBuilder(NeighborhoodBuilder):
     """This neighborhood builder creates neighbor connections between
     sites which are within some cutoff distance of eachother.
 
-    Uses a KD-tree with periodic boundary conditions for O(n log n)
-    performance instead of O(n²) brute force.
+    All candidate pairs are found at once from the CellList of the structure
+    (see PeriodicStructure.cell_list), which is cached and reused by later
+    builds and queries, and their exact periodic distances are computed
+    together.
     """
 
     def __init__(self, cutoff: float):
@@ -109,9 +325,9 @@ class DistanceNeighborhoodBuilder(NeighborhoodBuilder):
         """
         self.cutoff = cutoff
 
-    def get(self, struct: PeriodicStructure, site_class: str = None) -> Neighborhood:
-        """Builds a Neighborhood from the provided structure using an optimized
-        KD-tree algorithm with periodic boundary conditions.
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds a Neighborhood from the provided structure using a bulk
+        CellList query with periodic boundary conditions.
 
         Parameters
         ----------
@@ -123,80 +339,12 @@ class DistanceNeighborhoodBuilder(NeighborhoodBuilder):
 
         Returns
         -------
-        Neighborhood
+        CSRNeighborhood
             The resulting Neighborhood
         """
-        graph = rx.PyDiGraph()
-
-        # Add all nodes first
-        all_sites = struct.sites()
-        for site in all_sites:
-            graph.add_node(site[SITE_ID])
-
-        # Get sites to process (either all or filtered by class)
-        if site_class is None:
-            sites_to_process = all_sites
-        else:
-            sites_to_process = struct.sites(site_class=site_class)
-
-        # Extract locations and IDs as arrays for vectorized operations
-        locations = np.array([s[LOCATION] for s in all_sites])
-        site_ids = np.array([s[SITE_ID] for s in all_sites])
-
-        # Convert to fractional coordinates for periodic KD-tree
-        frac_coords = np.array(
-            [struct.lattice.get_fractional_coords(loc) for loc in locations]
-        )
-
-        # Compute the maximum fractional radius that could correspond to
-        # the Cartesian cutoff. For non-orthogonal lattices, we need to use
-        # the maximum stretch factor of the inverse matrix (largest singular value).
-        # This gives an upper bound; we then post-filter with exact Cartesian distances.
-        inv_matrix = struct.lattice.inv_matrix
-        max_stretch = np.linalg.norm(inv_matrix, ord=2)  # Largest singular value
-        frac_cutoff = self.cutoff * max_stretch + 0.1  # Add margin
-
-        # Determine periodicity - use boxsize for periodic dims
-        periodic = struct.lattice.periodic
-        dim = struct.lattice.dim
-
-        # Build boxsize array: 1.0 for periodic dimensions, large value for non-periodic
-        boxsize = np.array([1.0 if periodic[i] else 1e10 for i in range(dim)])
-
-        # Wrap fractional coordinates to [0, 1) for periodic dimensions
-        frac_coords_wrapped = frac_coords.copy()
-        for i in range(dim):
-            if periodic[i]:
-                frac_coords_wrapped[:, i] = frac_coords_wrapped[:, i] % 1.0
-
-        # Build KD-tree with periodic boundary conditions
-        tree = cKDTree(frac_coords_wrapped, boxsize=boxsize)
-
-        # Process each site
-        sites_to_process_ids = set(s[SITE_ID] for s in sites_to_process)
-
-        for idx, site_id in enumerate(tqdm(site_ids, desc="Building neighborhood")):
-            if site_id not in sites_to_process_ids:
-                continue
-
-            # Query tree for candidates within fractional cutoff
-            curr_frac = frac_coords_wrapped[idx]
-            candidate_indices = tree.query_ball_point(curr_frac, frac_cutoff)
-
-            curr_loc = locations[idx]
-
-            # Post-filter with exact Cartesian periodic distance
-            for cand_idx in candidate_indices:
-                if cand_idx == idx:
-                    continue
-
-                cand_loc = locations[cand_idx]
-                dist = struct.lattice.cartesian_periodic_distance(cand_loc, curr_loc)
-
-                if dist < self.cutoff:
-                    graph.add_edge(site_id, site_ids[cand_idx], dist)
-
-        return Neighborhood(graph)
+        sources, targets, dists = _pairs_within(struct, self.cutoff, site_class)
+        keep = dists < self.cutoff
+        return _pairs_to_neighborhood(struct, sources[keep], targets[keep], dists[keep])
 
     def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
         """Builds a neighbor list for a single site. This method exists for
@@ -215,21 +363,9 @@ class DistanceNeighborhoodBuilder(NeighborhoodBuilder):
         List[Tuple]
             List of (neighbor_id, distance) tuples
         """
-        nbs = []
-        curr_loc = curr_site[LOCATION]
-        curr_id = curr_site[SITE_ID]
-        for other_site in struct.sites():
-            other_id = other_site[SITE_ID]
-            if curr_id != other_id:
-                dist = struct.lattice.cartesian_periodic_distance(
-                    other_site[LOCATION],
-                    curr_loc,
-                )
-
-                if dist < self.cutoff:
-                    nbs.append((other_id, dist))
-
-        return nbs
+        nb_ids, dists = struct.sites_within(curr_site[LOCATION], self.cutoff)
+        keep = (nb_ids != curr_site[SITE_ID]) & (dists < self.cutoff)
+        return list(zip(nb_ids[keep].tolist(), dists[keep].tolist()))
 
 
 class AnnularNeighborhoodBuilder(NeighborhoodBuilder):
@@ -237,8 +373,10 @@ class AnnularNeighborhoodBuilder(NeighborhoodBuilder):
     sites which are within a ring-shaped region around eachother. This region
     is specified by a minimum (inner radius) and maximum (outer radius) distance.
 
-    Uses a KD-tree with periodic boundary conditions for O(n log n)
-    performance instead of O(n²) brute force.
+    All candidate pairs are found at once from the CellList of the structure
+    (see PeriodicStructure.cell_list), which is cached and reused by later
+    builds and queries, and their exact periodic distances are computed
+    together.
     """
 
     def __init__(self, inner_radius: float, outer_radius: float):
@@ -254,9 +392,9 @@ class AnnularNeighborhoodBuilder(NeighborhoodBuilder):
         self.inner_radius = inner_radius
         self.outer_radius = outer_radius
 
-    def get(self, struct: PeriodicStructure, site_class: str = None) -> Neighborhood:
-        """Builds a Neighborhood from the provided structure using an optimized
-        KD-tree algorithm with periodic boundary conditions.
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds a Neighborhood from the provided structure using a bulk
+        CellList query with periodic boundary conditions.
 
         Parameters
         ----------
@@ -268,112 +406,585 @@ class AnnularNeighborhoodBuilder(NeighborhoodBuilder):
 
         Returns
         -------
-        Neighborhood
+        CSRNeighborhood
             The resulting Neighborhood
         """
-        graph = rx.PyDiGraph()
-
-        # Add all nodes first
-        all_sites = struct.sites()
-        for site in all_sites:
-            graph.add_node(site[SITE_ID])
+        sources, targets, dists = _pairs_within(struct, self.outer_radius, site_class)
+        keep = (dists > self.inner_radius) & (dists < self.outer_radius)
+        return _pairs_to_neighborhood(struct, sources[keep], targets[keep], dists[keep])
 
-        # Get sites to process (either all or filtered by class)
-        if site_class is None:
-            sites_to_process = all_sites
-        else:
-            sites_to_process = struct.sites(site_class=site_class)
+    def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
+        """Builds a neighbor list for a single site. This method exists for
+        compatibility but using get() directly is more efficient.
 
-        # Extract locations and IDs as arrays for vectorized operations
-        locations = np.array([s[LOCATION] for s in all_sites])
-        site_ids = np.array([s[SITE_ID] for s in all_sites])
+        Parameters
+        ----------
+        curr_site : Dict
+            The site to find neighbors for
+        struct : PeriodicStructure
+            The structure containing the sites
 
-        # Convert to fractional coordinates for periodic KD-tree
-        frac_coords = np.array(
-            [struct.lattice.get_fractional_coords(loc) for loc in locations]
+        Returns
+        -------
+        List[Tuple]
+            List of (neighbor_id, distance) tuples
+        """
+        nb_ids, dists = struct.sites_within(curr_site[LOCATION], self.outer_radius)
+        keep = (
+            (nb_ids != curr_site[SITE_ID])
+            & (dists > self.inner_radius)
+            & (dists < self.outer_radius)
         )
+        return list(zip(nb_ids[keep].tolist(), dists[keep].tolist()))
 
-        # Compute the maximum fractional radius for the outer cutoff.
-        # Use the maximum stretch factor of the inverse matrix for non-orthogonal lattices.
-        inv_matrix = struct.lattice.inv_matrix
-        max_stretch = np.linalg.norm(inv_matrix, ord=2)  # Largest singular value
-        frac_cutoff = self.outer_radius * max_stretch + 0.1
 
-        # Determine periodicity
-        periodic = struct.lattice.periodic
-        dim = struct.lattice.dim
+class ShellNeighborhoodBuilder(NeighborhoodBuilder):
+    """This neighborhood builder connects every site to its neighbors in
+    several distance shells at once, e.g. its first and second nearest
+    neighbors. All pairs up to the outermost shell are found with one bulk
+    search, as in DistanceNeighborhoodBuilder, and each connection is labeled
+    with its shell. The result is a ShellNeighborhood, whose shell method
+    gives the neighborhood of each shell.
 
-        # Build boxsize array
-        boxsize = np.array([1.0 if periodic[i] else 1e10 for i in range(dim)])
+    Shells are either given by their outer radii, in which case shell k holds
+    the neighbors at distances d with radii[k - 1] <= d < radii[k], or found
+    by clustering the distances between sites, in which case shell k holds
+    the neighbors at the k-th smallest distance (within tolerance).
+    """
 
-        # Wrap fractional coordinates to [0, 1) for periodic dimensions
-        frac_coords_wrapped = frac_coords.copy()
-        for i in range(dim):
-            if periodic[i]:
-                frac_coords_wrapped[:, i] = frac_coords_wrapped[:, i] % 1.0
+    def __init__(
+        self,
+        radii: List[float] = None,
+        num_shells: int = None,
+        tolerance: float = 10**-OFFSET_PRECISION,
+    ):
+        """Instantiates the ShellNeighborhoodBuilder. Exactly one of radii and
+        num_shells must be given.
 
-        # Build KD-tree with periodic boundary conditions
-        tree = cKDTree(frac_coords_wrapped, boxsize=boxsize)
+        Parameters
+        ----------
+        radii : List[float], optional
+            The increasing outer radius of each shell.
+        num_shells : int, optional
+            The number of shells to find by clustering distances.
+        tolerance : float, optional
+            The largest gap between distances in the same shell when
+            clustering, by default 0.001.
+        """
+        if (radii is None) == (num_shells is None):
+            raise ValueError("Provide exactly one of radii and num_shells.")
+        if radii is not None and np.any(np.diff(radii) <= 0):
+            raise ValueError("Shell radii must be increasing.")
+        self.radii = None if radii is None else [float(r) for r in radii]
+        self.num_shells = num_shells
+        self.tolerance = tolerance
+
+    def get(
+        self, struct: PeriodicStructure, site_class: str = None
+    ) -> ShellNeighborhood:
+        """Builds the shell-resolved neighborhood of the provided structure.
 
-        # Create index mapping
-        sites_to_process_ids = set(s[SITE_ID] for s in sites_to_process)
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
 
-        for idx, site_id in enumerate(tqdm(site_ids, desc="Building neighborhood")):
-            if site_id not in sites_to_process_ids:
-                continue
+        Returns
+        -------
+        ShellNeighborhood
+            The resulting Neighborhood
+        """
+        if self.radii is not None:
+            sources, targets, dists = _pairs_within(struct, self.radii[-1], site_class)
+            keep = dists < self.radii[-1]
+            sources, targets, dists = sources[keep], targets[keep], dists[keep]
+            shells = np.searchsorted(self.radii, dists, side="right")
+            bounds = self.radii
+        else:
+            sources, targets, dists, shells, bounds = self._clustered_pairs(
+                struct, site_class
+            )
+
+        # Neighbors of each site are ordered by ID within each shell
+        order = np.lexsort((targets, sources))
+        return ShellNeighborhood.from_shell_edges(
+            sources[order],
+            targets[order],
+            dists[order],
+            shells[order],
+            bounds,
+            num_sites=struct.id_limit,
+        )
 
-            # Query tree for candidates within fractional cutoff
-            curr_frac = frac_coords_wrapped[idx]
-            candidate_indices = tree.query_ball_point(curr_frac, frac_cutoff)
+    def _clustered_pairs(self, struct: PeriodicStructure, site_class: str):
+        # Searches for pairs with a growing radius until it reaches past the
+        # last requested shell, starting from the mean spacing between sites
+        lattice = struct.lattice
+        max_radius = np.linalg.norm(lattice.matrix, axis=1).sum()
+        volume = abs(np.linalg.det(lattice.matrix))
+        num_sites = max(len(struct.site_ids), 1)
+        radius = 1.5 * (volume / num_sites) ** (1 / struct.dim)
+
+        while True:
+            radius = min(radius, max_radius)
+            sources, targets, dists = _pairs_within(
+                struct, radius, site_class, cached=False
+            )
+            distinct = np.unique(dists)
+            # A new shell starts wherever consecutive distances are far apart
+            starts = np.diff(distinct, prepend=-np.inf) > self.tolerance
+            if starts.sum() > self.num_shells or radius >= max_radius:
+                break
+            radius *= 1.5
+
+        cluster_of = np.cumsum(starts) - 1
+        shells = cluster_of[np.searchsorted(distinct, dists)]
+        keep = shells < self.num_shells
+        num_found = min(int(starts.sum()), self.num_shells)
+        bounds = [distinct[cluster_of == k].max() for k in range(num_found)]
+        return sources[keep], targets[keep], dists[keep], shells[keep], bounds
+
+
+class KNearestNeighborhoodBuilder(NeighborhoodBuilder):
+    """This neighborhood builder connects every site to its k nearest sites,
+    which gives every site the same number of neighbors even in irregular
+    structures where a distance cutoff would not.
+
+    Sites which are exactly as far away as the k-th nearest site (distances
+    are rounded to OFFSET_PRECISION decimals) are either all included, so
+    that a site can have more than k neighbors, or left out in favor of the
+    sites with the smaller IDs. Since being among the k nearest sites of a
+    site is not symmetric, the neighborhood can optionally be symmetrized by
+    also connecting every site to the sites which chose it.
+
+    In orthogonal cells the nearest sites of all sites are found with one
+    bulk query of a periodic KD-tree. In skewed cells they are found by bulk
+    pair searches within a growing radius.
+    """
 
-            curr_loc = locations[idx]
+    def __init__(self, k: int, symmetric: bool = False, include_ties: bool = True):
+        """Instantiates a KNearestNeighborhoodBuilder.
 
-            # Post-filter with exact Cartesian periodic distance
-            for cand_idx in candidate_indices:
-                if cand_idx == idx:
-                    continue
+        Parameters
+        ----------
+        k : int
+            The number of nearest sites each site is connected to.
+        symmetric : bool, optional
+            Whether each site is also connected to the sites of which it is
+            one of the k nearest, by default False.
+        include_ties : bool, optional
+            Whether all sites as far away as the k-th nearest are included,
+            by default True.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        self.k = k
+        self.symmetric = symmetric
+        self.include_ties = include_ties
 
-                cand_loc = locations[cand_idx]
-                dist = pbc_diff_cart(
-                    np.array(cand_loc),
-                    np.array(curr_loc),
-                    struct.lattice,
-                )
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds a Neighborhood from the provided structure.
 
-                if self.inner_radius < dist < self.outer_radius:
-                    graph.add_edge(site_id, site_ids[cand_idx], dist)
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
 
-        return Neighborhood(graph)
+        Returns
+        -------
+        CSRNeighborhood
+            The resulting Neighborhood
+        """
+        if len(struct.site_ids) < 2:
+            sources = targets = np.zeros(0, dtype=np.int64)
+            dists = np.zeros(0)
+        elif _is_orthogonal(struct.lattice.matrix):
+            sources, targets, dists = self._tree_candidates(struct)
+        else:
+            sources, targets, dists = self._searched_candidates(struct)
+        sources, targets, dists = self._nearest(sources, targets, dists)
+
+        if self.symmetric:
+            sources, targets = (
+                np.concatenate([sources, targets]),
+                np.concatenate([targets, sources]),
+            )
+            dists = np.concatenate([dists, dists])
+            _, first = np.unique(sources * struct.id_limit + targets, return_index=True)
+            sources, targets, dists = sources[first], targets[first], dists[first]
+
+        if site_class is not None:
+            in_class = np.array(
+                [struct.site_class(site_id) == site_class for site_id in sources],
+                dtype=bool,
+            ).reshape(-1)
+            sources, targets, dists = (
+                sources[in_class],
+                targets[in_class],
+                dists[in_class],
+            )
+
+        return _pairs_to_neighborhood(struct, sources, targets, dists)
+
+    def _tree_candidates(self, struct: PeriodicStructure):
+        # Queries a periodic KD-tree for more nearest sites than needed until
+        # every site's k-th nearest distance is followed by a larger one, so
+        # that all ties are found
+        lattice = struct.lattice
+        sites = struct.sites()
+        site_ids = np.array([site[SITE_ID] for site in sites], dtype=np.int64)
+        locations = np.array([site[LOCATION] for site in sites], dtype=float)
+        frac_coords = lattice.get_fractional_coords(locations)
+        num_sites = len(site_ids)
+
+        # Periodic axes are wrapped into the box. Non-periodic axes get a box
+        # large enough that no distance through its boundary is the shortest
+        box_lengths = np.diag(lattice.matrix)
+        periodic = np.array(lattice.periodic, dtype=bool)
+        coords = np.where(periodic, np.mod(frac_coords, 1.0) * box_lengths, locations)
+        coords = np.where(periodic & (coords >= box_lengths), 0.0, coords)
+        coords = np.where(periodic, coords, coords - coords.min(axis=0))
+        extent = coords.max(axis=0)
+        boxsize = np.where(periodic, box_lengths, 2 * extent + 1)
+        tree = cKDTree(coords, boxsize=boxsize if periodic.any() else None)
+
+        kth_col = min(self.k, num_sites - 1)
+        num_query = min(self.k + 2, num_sites)
+        while True:
+            tree_dists, nb_idx = tree.query(coords, k=num_query)
+            if num_query == num_sites or np.all(
+                tree_dists[:, -1] > tree_dists[:, kth_col] + 10**-OFFSET_PRECISION
+            ):
+                break
+            num_query = min(2 * num_query, num_sites)
+
+        first = np.repeat(np.arange(num_sites), num_query)
+        second = nb_idx.ravel()
+        distinct = first != second
+        first, second = first[distinct], second[distinct]
+
+        # Exact distances, as computed by pbc_diff_cart
+        frac_diff = frac_coords[second] - frac_coords[first]
+        frac_diff -= np.round(frac_diff) * periodic
+        dists = np.round(
+            np.linalg.norm(lattice.get_cartesian_coords(frac_diff), axis=1),
+            OFFSET_PRECISION,
+        )
+        return site_ids[first], site_ids[second], dists
+
+    def _searched_candidates(self, struct: PeriodicStructure):
+        # Searches for pairs with a growing radius until every site has at
+        # least k sites within it, starting from the radius expected to hold
+        # k sites
+        lattice = struct.lattice
+        max_radius = np.linalg.norm(lattice.matrix, axis=1).sum()
+        volume = abs(np.linalg.det(lattice.matrix))
+        num_sites = len(struct.site_ids)
+        needed = min(self.k, num_sites - 1)
+        radius = 1.5 * (volume * needed / num_sites) ** (1 / struct.dim)
+
+        while True:
+            radius = min(radius, max_radius)
+            sources, targets, dists = _pairs_within(struct, radius, cached=False)
+            counts = np.bincount(sources, minlength=struct.id_limit)[struct.site_ids]
+            if counts.min() >= needed or radius >= max_radius:
+                return sources, targets, dists
+            radius *= 1.5
+
+    def _nearest(self, sources: np.ndarray, targets: np.ndarray, dists: np.ndarray):
+        # Keeps the k nearest targets of each source (and those tied with the
+        # k-th if ties are included), breaking ties by target ID
+        order = np.lexsort((targets, dists, sources))
+        sources, targets, dists = sources[order], targets[order], dists[order]
+        starts = np.searchsorted(sources, sources, side="left")
+        if self.include_ties:
+            ends = np.searchsorted(sources, sources, side="right")
+            kth_dists = dists[np.minimum(starts + self.k, ends) - 1]
+            keep = dists <= kth_dists
+        else:
+            keep = np.arange(len(sources)) - starts < self.k
+        return sources[keep], targets[keep], dists[keep]
+
+
+class VoronoiNeighborhoodBuilder(NeighborhoodBuilder):
+    """This neighborhood builder connects natural neighbors: sites whose
+    Voronoi cells share a face. It needs no distance cutoff, which suits
+    off-lattice and converted atomic structures. The weight of each
+    connection is either the distance between the two sites or the area
+    (the length in 2D) of their shared face.
+
+    Periodic boundaries are handled by building the Voronoi diagram (the
+    dual of the Delaunay triangulation, computed by scipy.spatial) of the
+    sites together with their periodic images within a padding distance of
+    the cell. Faces are then mapped back from images to site IDs. The
+    padding is doubled until the circumsphere of every Voronoi vertex of
+    the sites lies within the padded region, which guarantees that the
+    faces are those of the infinite periodic structure.
+
+    Faces smaller than min_area, such as those between the diagonal
+    neighbors of a square lattice, are degenerate and ignored. Faces of
+    sites on the boundary of a non-periodic direction can be unbounded, in
+    which case their area is infinite. A site can share faces with several
+    images of another site. Its weight is then the smallest distance or the
+    total area, and faces shared with its own images are ignored.
+    """
 
-    def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
-        """Builds a neighbor list for a single site. This method exists for
-        compatibility but using get() directly is more efficient.
+    def __init__(
+        self,
+        weight: str = "distance",
+        padding: float = None,
+        min_area: float = 10**-OFFSET_PRECISION,
+    ):
+        """Instantiates a VoronoiNeighborhoodBuilder.
+
+        Parameters
+        ----------
+        weight : str, optional
+            Either "distance" or "area", by default "distance".
+        padding : float, optional
+            The initial Cartesian distance around the cell within which
+            periodic images are included, by default three times the mean
+            spacing between sites.
+        min_area : float, optional
+            The area below which faces are ignored, by default 0.001.
+        """
+        if weight not in ("distance", "area"):
+            raise ValueError('The weight must be either "distance" or "area".')
+        self.weight = weight
+        self.padding = padding
+        self.min_area = min_area
+
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds a Neighborhood from the provided structure.
 
         Parameters
         ----------
-        curr_site : Dict
-            The site to find neighbors for
         struct : PeriodicStructure
-            The structure containing the sites
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
 
         Returns
         -------
-        List[Tuple]
-            List of (neighbor_id, distance) tuples
+        CSRNeighborhood
+            The resulting Neighborhood
         """
-        nbs = []
-        for other_site in struct.sites():
-            if curr_site[SITE_ID] != other_site[SITE_ID]:
-                dist = pbc_diff_cart(
-                    np.array(other_site[LOCATION]),
-                    np.array(curr_site[LOCATION]),
-                    struct.lattice,
-                )
-
-                if self.inner_radius < dist < self.outer_radius:
-                    nbs.append((other_site[SITE_ID], dist))
+        if struct.dim not in (2, 3):
+            raise ValueError("Voronoi neighborhoods require a 2D or 3D structure.")
 
-        return nbs
+        all_sites = struct.sites()
+        site_ids = np.array([site[SITE_ID] for site in all_sites], dtype=np.int64)
+        locations = np.array(
+            [site[LOCATION] for site in all_sites], dtype=float
+        ).reshape(-1, struct.dim)
+
+        volume = abs(np.linalg.det(struct.lattice.matrix))
+        padding = self.padding
+        if padding is None:
+            padding = 3 * (volume / max(len(site_ids), 1)) ** (1 / struct.dim)
+
+        faces = None
+        while faces is None:
+            faces = self._faces(struct.lattice, locations, padding)
+            padding *= 2
+        first, second, dists, areas = faces
+
+        # Each face gives a connection from every original site it bounds
+        sources = np.concatenate([first[:, 0], second[:, 0]])
+        targets = np.concatenate([first[:, 1], second[:, 1]])
+        dists = np.concatenate([dists[first[:, 2]], dists[second[:, 2]]])
+        areas = np.concatenate([areas[first[:, 2]], areas[second[:, 2]]])
+        distinct = sources != targets
+        sources, targets = site_ids[sources[distinct]], site_ids[targets[distinct]]
+        dists, areas = dists[distinct], areas[distinct]
+
+        # Merge the faces shared with different images of the same site
+        order = np.argsort(dists, kind="stable")
+        keys = sources[order] * struct.id_limit + targets[order]
+        unique_keys, first_idx, inverse = np.unique(
+            keys, return_index=True, return_inverse=True
+        )
+        sources = sources[order][first_idx]
+        targets = targets[order][first_idx]
+        if self.weight == "distance":
+            weights = dists[order][first_idx]
+        else:
+            weights = np.round(
+                np.bincount(inverse, weights=areas[order], minlength=len(unique_keys)),
+                OFFSET_PRECISION,
+            )
+
+        if site_class is not None:
+            in_class = np.isin(
+                sources, [site[SITE_ID] for site in struct.sites(site_class)]
+            )
+            sources, targets, weights = (
+                sources[in_class],
+                targets[in_class],
+                weights[in_class],
+            )
+        return _pairs_to_neighborhood(struct, sources, targets, weights)
+
+    def _faces(self, lattice, locations: np.ndarray, padding: float):
+        # The Voronoi faces of the sites, from the diagram of the sites and
+        # their images within padding of the cell. Returns None if the padding
+        # is too small to be sure of the faces.
+        num_sites, dim = locations.shape
+        periodic = np.array(lattice.periodic, dtype=bool)
+        col_norms = np.linalg.norm(lattice.inv_matrix, axis=0)
+        pad_frac = np.where(periodic, padding * col_norms, 0.0)
+
+        # Images of every site, with the sites themselves (offset zero) first
+        layers = np.ceil(pad_frac).astype(np.int64)
+        offsets = np.array(
+            sorted(
+                itertools.product(*[range(-n, n + 1) for n in layers]),
+                key=any,
+            ),
+            dtype=float,
+        ).reshape(-1, dim)
+        frac = lattice.get_fractional_coords(locations)
+        image_frac = frac[np.newaxis] + offsets[:, np.newaxis]
+        inside = np.all(
+            ~periodic | ((image_frac >= -pad_frac) & (image_frac < 1 + pad_frac)),
+            axis=-1,
+        )
+        inside[0] = True
+        point_site = np.broadcast_to(np.arange(num_sites), inside.shape)[inside]
+        points = lattice.get_cartesian_coords(image_frac[inside].reshape(-1, dim))
+        if len(points) <= dim + 1:
+            empty = np.zeros((0, 3), dtype=np.int64)
+            return empty, empty, np.zeros(0), np.zeros(0)
+
+        vor = Voronoi(points)
+        relevant = np.flatnonzero(np.any(vor.ridge_points < num_sites, axis=1))
+        ridge_points = vor.ridge_points[relevant]
+        ridge_vertices = [vor.ridge_vertices[r] for r in relevant]
+        counts = np.fromiter(
+            map(len, ridge_vertices), dtype=np.int64, count=len(relevant)
+        )
+        flat_vertices = np.fromiter(
+            itertools.chain.from_iterable(ridge_vertices),
+            dtype=np.int64,
+            count=counts.sum(),
+        )
+        flat_ridges = np.repeat(np.arange(len(relevant)), counts)
+        unbounded = np.bincount(
+            flat_ridges, weights=flat_vertices < 0, minlength=len(relevant)
+        ).astype(bool)
+        if unbounded.any() and periodic.all():
+            return None
+
+        # Every Voronoi vertex is the center of an empty sphere through the
+        # points of its faces. It is a vertex of the periodic structure if
+        # that sphere lies within the padded region along periodic axes.
+        bounded = flat_vertices >= 0
+        vertices = vor.vertices[flat_vertices[bounded]]
+        radii = np.linalg.norm(
+            vertices - points[ridge_points[flat_ridges[bounded], 0]], axis=1
+        )
+        vertex_frac = lattice.get_fractional_coords(vertices)
+        reach = radii[:, np.newaxis] * col_norms
+        outside = (vertex_frac - reach < -pad_frac) | (
+            vertex_frac + reach > 1 + pad_frac
+        )
+        if np.any(outside[:, periodic]):
+            return None
+
+        dists = np.round(
+            np.linalg.norm(
+                points[ridge_points[:, 0]] - points[ridge_points[:, 1]], axis=1
+            ),
+            OFFSET_PRECISION,
+        )
+        areas = np.full(len(relevant), np.inf)
+        finite = ~unbounded
+        areas[finite] = _face_areas(
+            vor.vertices,
+            points[ridge_points[finite, 1]] - points[ridge_points[finite, 0]],
+            flat_vertices[finite[flat_ridges]],
+            np.repeat(np.arange(finite.sum()), counts[finite]),
+        )
+        keep = areas > self.min_area
+
+        # (original site, neighbor site, face) for each end of each face that
+        # is one of the sites themselves
+        faces = np.arange(len(relevant))
+        ends = []
+        for own, other in ((0, 1), (1, 0)):
+            is_site = keep & (ridge_points[:, own] < num_sites)
+            ends.append(
+                np.stack(
+                    [
+                        ridge_points[is_site, own],
+                        point_site[ridge_points[is_site, other]],
+                        faces[is_site],
+                    ],
+                    axis=1,
+                )
+            )
+        return ends[0], ends[1], dists, areas
+
+
+def _face_areas(
+    vertices: np.ndarray,
+    normals: np.ndarray,
+    face_vertices: np.ndarray,
+    face_of: np.ndarray,
+) -> np.ndarray:
+    """Returns the area of every bounded Voronoi face (the length of every
+    edge in 2D). The vertices of face k are vertices[face_vertices[face_of ==
+    k]], and normals[k] is perpendicular to it.
+    """
+    num_faces = len(normals)
+    coords = vertices[face_vertices]
+    if coords.shape[1] == 2:
+        # Every face is a segment between two vertices
+        ends = np.zeros((num_faces, 2, 2))
+        starts = np.searchsorted(face_of, np.arange(num_faces))
+        ends[:, 0] = coords[starts]
+        ends[:, 1] = coords[starts + 1]
+        return np.linalg.norm(ends[:, 1] - ends[:, 0], axis=1)
+
+    # Each face is a convex polygon. Its vertices are sorted by angle around
+    # the centroid in the plane of the face, and the area is given by the
+    # shoelace formula.
+    counts = np.bincount(face_of, minlength=num_faces)
+    centroids = (
+        np.stack(
+            [
+                np.bincount(face_of, weights=coords[:, i], minlength=num_faces)
+                for i in range(3)
+            ],
+            axis=1,
+        )
+        / np.maximum(counts, 1)[:, np.newaxis]
+    )
+    normals = normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    helper = np.eye(3)[np.argmin(np.abs(normals), axis=1)]
+    u_axes = np.cross(normals, helper)
+    u_axes /= np.linalg.norm(u_axes, axis=1)[:, np.newaxis]
+    w_axes = np.cross(normals, u_axes)
+
+    rel = coords - centroids[face_of]
+    x = np.einsum("ij,ij->i", rel, u_axes[face_of])
+    y = np.einsum("ij,ij->i", rel, w_axes[face_of])
+    order = np.lexsort((np.arctan2(y, x), face_of))
+    x, y = x[order], y[order]
+
+    starts = np.cumsum(counts) - counts
+    following = np.arange(len(order)) + 1
+    last = following == np.repeat(starts + counts, counts)
+    following[last] = np.repeat(starts, counts)[last]
+    cross = x * y[following] - x[following] * y
+    return 0.5 * np.abs(np.bincount(face_of, weights=cross, minlength=num_faces))
 
 
 class MotifNeighborhoodBuilder(NeighborhoodBuilder):
@@ -403,6 +1014,11 @@ class MotifNeighborhoodBuilder(NeighborhoodBuilder):
 
     Note that there is reciprocity here between the A and B sites. The A sites
     list B sites as their neighbors, and the B sites list A sites as their neighbors.
+
+    The neighbors of all sites are found at once with PeriodicStructure.ids_at,
+    and the result is a CSRNeighborhood. For structures that are tilings of a
+    unit cell (see pylattica.core.tiling), the motif is resolved for the basis
+    sites of one cell only and tiled across the structure.
     """
 
     def __init__(self, motif: List[List[float]]):
@@ -418,6 +1034,107 @@ class MotifNeighborhoodBuilder(NeighborhoodBuilder):
 
         self.distances = EuclideanDistanceMap(motif)
 
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds the neighborhood of every site (or of every site of one class)
+        in a single vectorized pass. Offsets which lead outside a non-periodic
+        structure, or back to the site itself, are skipped.
+
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
+
+        Returns
+        -------
+        CSRNeighborhood
+            The resulting Neighborhood
+        """
+        num_sites = struct.id_limit
+        if struct.tiling is not None:
+            sources, nb_ids, weights = self._tiled_edges(struct, site_class)
+        else:
+            sources, nb_ids, weights = self._searched_edges(struct, site_class)
+
+        # Offsets that reach the same neighbor (in small periodic structures)
+        # give a single connection, keeping the first
+        _, first = np.unique(sources * num_sites + nb_ids, return_index=True)
+        keep = np.sort(first)
+        return CSRNeighborhood.from_edges(
+            sources[keep], nb_ids[keep], weights[keep], num_sites=num_sites
+        )
+
+    def _motif_weights(self) -> np.ndarray:
+        return np.array([self.distances.get_dist(vec) for vec in self._motif])
+
+    def _searched_edges(
+        self, struct: PeriodicStructure, site_class: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Looks up the neighbor at every (site, motif vector) pair
+        sites = struct.sites(site_class=site_class)
+        if len(sites) == 0 or len(self._motif) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        site_ids = np.array([site[SITE_ID] for site in sites], dtype=np.int64)
+        locations = np.array([site[LOCATION] for site in sites], dtype=float)
+        offsets = np.array(self._motif, dtype=float)
+
+        # One row per site, one column per motif vector
+        candidates = locations[:, np.newaxis, :] + offsets[np.newaxis, :, :]
+        nb_ids = struct.ids_at(candidates.reshape(-1, struct.dim))
+        sources = np.repeat(site_ids, len(self._motif))
+        weights = np.tile(self._motif_weights(), len(site_ids))
+
+        valid = (nb_ids >= 0) & (nb_ids != sources)
+        return sources[valid], nb_ids[valid], weights[valid]
+
+    def _tiled_edges(
+        self, struct: PeriodicStructure, site_class: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Resolves each motif vector once per basis site, as a cell offset and
+        # a target basis site, then tiles the result across the structure
+        tiling = struct.tiling
+        unit = tiling.unit_lattice
+        if len(self._motif) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        src_b, vec_idx = (
+            idx.ravel()
+            for idx in np.meshgrid(
+                np.arange(tiling.num_basis), np.arange(len(self._motif)), indexing="ij"
+            )
+        )
+        targets = (
+            tiling.basis_locations[src_b] + np.array(self._motif, dtype=float)[vec_idx]
+        )
+
+        # Frac offset from every basis site to every target; a match is a
+        # whole number of cells, up to the rounding used to locate sites
+        frac = unit.get_fractional_coords(
+            targets[:, np.newaxis, :] - tiling.basis_locations[np.newaxis, :, :]
+        )
+        cells = np.round(frac)
+        residual = unit.get_cartesian_coords(frac - cells)
+        matches = np.all(np.abs(residual) < 0.5 * 10**-OFFSET_PRECISION, axis=2)
+
+        found = matches.any(axis=1)
+        tgt_b = np.argmax(matches, axis=1)
+        offsets = cells[np.arange(len(tgt_b)), tgt_b].astype(np.int64)
+
+        shape = np.array(tiling.num_cells)
+        periodic = np.array(unit.periodic, dtype=bool)
+        wrapped = np.where(periodic, offsets % shape, offsets)
+        is_self = np.all(wrapped == 0, axis=1) & (tgt_b == src_b)
+
+        keep = found & ~is_self
+        if site_class is not None:
+            keep &= np.array(tiling.basis_classes, dtype=object)[src_b] == site_class
+
+        weights = self._motif_weights()[vec_idx]
+        return tiling.tile(src_b[keep], offsets[keep], tgt_b[keep], weights[keep])
+
     def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
         """Given a structure, constructs a NeighborGraph with site connections
         according to the motif.
@@ -458,7 +1175,9 @@ class SiteClassNeighborhoodBuilder(NeighborhoodBuilder):
         """
         self._builders = nb_builders
 
-    def get(self, struct: PeriodicStructure) -> Neighborhood:
+    def get(
+        self, struct: PeriodicStructure, parallel: bool = False, workers: int = None
+    ) -> Neighborhood:
         """Constructs the neighborhood of every site in the provided
         structure, conditional on the class of each site.
 
@@ -466,6 +1185,12 @@ class SiteClassNeighborhoodBuilder(NeighborhoodBuilder):
         ----------
         struct : PeriodicStructure
             The structure for which the neigborhood should be calculated.
+        parallel : bool, optional
+            Whether builders that compute neighbors site by site (with the
+            generic NeighborhoodBuilder.get) use worker processes, by default
+            False.
+        workers : int, optional
+            The number of worker processes, by default one per CPU.
 
         Returns
         -------
@@ -474,7 +1199,134 @@ class SiteClassNeighborhoodBuilder(NeighborhoodBuilder):
         """
         nbhood_map = {}
         for sclass, builder in self._builders.items():
-            nbhood = builder.get(struct, site_class=sclass)
+            if parallel and type(builder).get is NeighborhoodBuilder.get:
+                nbhood = builder.get(
+                    struct, site_class=sclass, parallel=True, workers=workers
+                )
+            else:
+                nbhood = builder.get(struct, site_class=sclass)
             nbhood_map[sclass] = nbhood
 
         return SiteClassNeighborhood(struct, nbhood_map)
+
+
+class PairCutoffNeighborhoodBuilder(NeighborhoodBuilder):
+    """This neighborhood builder connects sites which are closer than a
+    cutoff that depends on the classes of both sites, e.g. for structures
+    with several sublattices. The cutoffs form a symmetric matrix over pairs
+    of site classes: the cutoff for an A site and a B site is the same
+    whichever of the two is the source. Pairs of classes without a cutoff
+    are never connected.
+
+    Unlike a SiteClassNeighborhoodBuilder of DistanceNeighborhoodBuilders,
+    which searches the structure once per site class, all pairs are found
+    with one bulk search at the largest cutoff, as in
+    DistanceNeighborhoodBuilder, and then filtered by the cutoff of their
+    class pair.
+    """
+
+    def __init__(self, cutoffs: Dict[Tuple[str, str], float]):
+        """Instantiates a PairCutoffNeighborhoodBuilder.
+
+        Parameters
+        ----------
+        cutoffs : Dict[Tuple[str, str], float]
+            A mapping of pairs of site classes to the distance below which
+            sites of those classes are neighbors, e.g.
+            {("A", "A"): 1.0, ("A", "B"): 1.5}. A pair only needs to be given
+            in one order.
+        """
+        self.cutoffs = {}
+        for (class_a, class_b), cutoff in cutoffs.items():
+            pair = tuple(sorted((class_a, class_b)))
+            if pair in self.cutoffs and self.cutoffs[pair] != cutoff:
+                raise ValueError(
+                    f"Conflicting cutoffs given for site classes {class_a} and {class_b}."
+                )
+            self.cutoffs[pair] = float(cutoff)
+
+    def cutoff_matrix(self, site_classes: List[str]) -> np.ndarray:
+        """Returns the cutoffs as a matrix over a list of site classes.
+
+        Parameters
+        ----------
+        site_classes : List[str]
+            The site classes, which index the rows and columns.
+
+        Returns
+        -------
+        np.ndarray
+            The symmetric matrix of cutoffs, which is 0 (no neighbors) for
+            pairs of classes without a cutoff.
+        """
+        matrix = np.zeros((len(site_classes), len(site_classes)))
+        for i, class_a in enumerate(site_classes):
+            for j, class_b in enumerate(site_classes):
+                pair = tuple(sorted((class_a, class_b)))
+                matrix[i, j] = self.cutoffs.get(pair, 0.0)
+        return matrix
+
+    def get(self, struct: PeriodicStructure, site_class: str = None) -> CSRNeighborhood:
+        """Builds a Neighborhood from the provided structure using a single
+        bulk search for pairs within the largest cutoff.
+
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
+
+        Returns
+        -------
+        CSRNeighborhood
+            The resulting Neighborhood
+        """
+        site_classes = sorted(struct.all_site_classes(), key=str)
+        matrix = self.cutoff_matrix(site_classes)
+        max_cutoff = matrix.max() if matrix.size > 0 else 0.0
+        if max_cutoff == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return _pairs_to_neighborhood(struct, empty, empty, np.zeros(0))
+
+        class_codes = np.full(struct.id_limit, -1, dtype=np.int64)
+        code_of = {sc: code for code, sc in enumerate(site_classes)}
+        for site in struct.sites():
+            class_codes[site[SITE_ID]] = code_of[site[SITE_CLASS]]
+
+        sources, targets, dists = _pairs_within(struct, max_cutoff, site_class)
+        keep = dists < matrix[class_codes[sources], class_codes[targets]]
+        return _pairs_to_neighborhood(struct, sources[keep], targets[keep], dists[keep])
+
+    def get_neighbors(self, curr_site: Dict, struct: PeriodicStructure) -> List[Tuple]:
+        """Builds a neighbor list for a single site. This method exists for
+        compatibility but using get() directly is more efficient.
+
+        Parameters
+        ----------
+        curr_site : Dict
+            The site to find neighbors for
+        struct : PeriodicStructure
+            The structure containing the sites
+
+        Returns
+        -------
+        List[Tuple]
+            List of (neighbor_id, distance) tuples
+        """
+        cutoffs = {
+            class_b if class_a == curr_site[SITE_CLASS] else class_a: cutoff
+            for (class_a, class_b), cutoff in self.cutoffs.items()
+            if curr_site[SITE_CLASS] in (class_a, class_b)
+        }
+        if not cutoffs:
+            return []
+
+        nb_ids, dists = struct.sites_within(curr_site[LOCATION], max(cutoffs.values()))
+        nbs = []
+        for nb_id, dist in zip(nb_ids.tolist(), dists.tolist()):
+            nb_cutoff = cutoffs.get(struct.site_class(nb_id), 0.0)
+            if nb_id != curr_site[SITE_ID] and dist < nb_cutoff:
+                nbs.append((nb_id, dist))
+        return nbs
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from .neighborhoods import (
+    AbstractNeighborhood,
+    CSRNeighborhood,
+    GridNeighborhood,
+    ShellNeighborhood,
+)
+from .periodic_structure import PeriodicStructure
+
+CACHE_DIR_ENV_VAR = "PYLATTICA_NEIGHBORHOOD_CACHE"
+_CSR_ARRAYS = ("indptr", "indices", "weights")
+_SHELL_ARRAYS = ("shells", "shell_bounds")
+
+
+def _describe(obj):
+    # A JSON-able description of a builder's configuration. Attributes that
+    # builders use to memoize per-structure values are not configuration.
+    if isinstance(obj, dict):
+        return {
+            str(k): _describe(v)
+            for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))
+        }
+    if isinstance(obj, (list, tuple)):
+        return [_describe(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _describe(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if hasattr(obj, "__dict__"):
+        desc = {"@class": f"{type(obj).__module__}.{type(obj).__qualname__}"}
+        for attr, value in sorted(vars(obj).items()):
+            if not attr.startswith("_cached"):
+                desc[attr] = _describe(value)
+        return desc
+    return repr(obj)
+
+
+def builder_fingerprint(builder) -> str:
+    """Returns a hash of the class and parameters of a NeighborhoodBuilder.
+    Builders of the same class with equal parameters have the same
+    fingerprint.
+
+    Parameters
+    ----------
+    builder : NeighborhoodBuilder
+        The builder.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 digest.
+    """
+    desc = json.dumps(_describe(builder), sort_keys=True)
+    return hashlib.sha256(desc.encode()).hexdigest()
+
+
+class NeighborhoodCache:
+    """A cache of built neighborhoods, keyed by the fingerprint of the
+    structure (see PeriodicStructure.fingerprint), the class and parameters of
+    the builder, and the site class. Neighborhoods are stored as
+    CSRNeighborhoods.
+
+    Recently used neighborhoods are kept in memory. If cache_dir is given,
+    every neighborhood is also saved there as .npy arrays, which later
+    lookups (including from other processes) open as read-only memory maps
+    instead of rebuilding the neighborhood. Neighborhoods that cannot be
+    represented as CSR arrays (e.g. StochasticNeighborhoods) are only cached
+    in memory, as are implicit GridNeighborhoods, which store no connections.
+    """
+
+    def __init__(self, cache_dir: str = None, max_entries: int = 8):
+        """Instantiates the cache.
+
+        Parameters
+        ----------
+        cache_dir : str, optional
+            The directory in which neighborhoods are saved, by default None
+            (memory only). It is created if it does not exist.
+        max_entries : int, optional
+            The number of neighborhoods kept in memory, by default 8.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, builder, struct: PeriodicStructure, site_class: str = None) -> str:
+        """Returns the key under which a neighborhood is cached.
+
+        Parameters
+        ----------
+        builder : NeighborhoodBuilder
+            The builder of the neighborhood.
+        struct : PeriodicStructure
+            The structure for which it is built.
+        site_class : str, optional
+            The site class for which it is built, by default None.
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        desc = json.dumps(
+            [struct.fingerprint, builder_fingerprint(builder), site_class]
+        )
+        return hashlib.sha256(desc.encode()).hexdigest()
+
+    def get(
+        self, builder, struct: PeriodicStructure, site_class: str = None
+    ) -> AbstractNeighborhood:
+        """Returns the neighborhood built by builder for struct, building it
+        only if it is not cached.
+
+        Parameters
+        ----------
+        builder : NeighborhoodBuilder
+            The builder of the neighborhood.
+        struct : PeriodicStructure
+            The structure for which it is built.
+        site_class : str, optional
+            If provided, passed to builder.get to build the neighborhood of a
+            single class of sites, by default None.
+
+        Returns
+        -------
+        AbstractNeighborhood
+            The neighborhood, as a CSRNeighborhood when possible.
+        """
+        key = self.key(builder, struct, site_class=site_class)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        nbhood = self._load(key)
+        if nbhood is None:
+            if site_class is None:
+                nbhood = builder.get(struct)
+            else:
+                nbhood = builder.get(struct, site_class=site_class)
+            if not isinstance(nbhood, GridNeighborhood):
+                try:
+                    nbhood = nbhood.as_csr()
+                except NotImplementedError:
+                    pass
+                else:
+                    self._save(key, nbhood)
+
+        self._memory[key] = nbhood
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        return nbhood
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _load(self, key: str) -> CSRNeighborhood:
+        if self.cache_dir is None or not os.path.isdir(self._path(key)):
+            return None
+        arrays = [
+            np.load(os.path.join(self._path(key), f"{name}.npy"), mmap_mode="r")
+            for name in _CSR_ARRAYS
+        ]
+        if not os.path.exists(os.path.join(self._path(key), "shells.npy")):
+            return CSRNeighborhood(*arrays)
+        shell_arrays = [
+            np.load(os.path.join(self._path(key), f"{name}.npy"))
+            for name in _SHELL_ARRAYS
+        ]
+        return ShellNeighborhood(*arrays, *shell_arrays)
+
+    def _save(self, key: str, nbhood: CSRNeighborhood) -> None:
+        if self.cache_dir is None:
+            return
+        # Arrays are written to a temporary directory which is then renamed,
+        # so concurrent processes never see a partially written entry
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            names = _CSR_ARRAYS
+            if isinstance(nbhood, ShellNeighborhood):
+                names += _SHELL_ARRAYS
+            for name in names:
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(nbhood, name))
+            os.replace(tmp_dir, self._path(key))
+        except OSError:
+            # Another process saved the same entry first
+            pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def clear(self, disk: bool = False) -> None:
+        """Empties the in-memory cache, and optionally the cache directory.
+
+        Parameters
+        ----------
+        disk : bool, optional
+            Whether the saved neighborhoods are deleted too, by default False.
+        """
+        self._memory.clear()
+        if disk and self.cache_dir is not None:
+            for entry in os.listdir(self.cache_dir):
+                shutil.rmtree(self._path(entry), ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+_default_cache: NeighborhoodCache = None
+
+
+def get_default_cache() -> NeighborhoodCache:
+    """Returns the cache used by cached_neighborhood. It saves neighborhoods
+    to the directory named by the PYLATTICA_NEIGHBORHOOD_CACHE environment
+    variable, or only caches them in memory if it is not set.
+
+    Returns
+    -------
+    NeighborhoodCache
+        The default cache.
+    """
+    global _default_cache  # pylint: disable=global-statement
+    if _default_cache is None:
+        _default_cache = NeighborhoodCache(os.environ.get(CACHE_DIR_ENV_VAR))
+    return _default_cache
+
+
+def cached_neighborhood(
+    builder, struct: PeriodicStructure, site_class: str = None
+) -> AbstractNeighborhood:
+    """Returns the neighborhood built by builder for struct from the default
+    cache (see get_default_cache), building it only if it is not cached.
+
+    Parameters
+    ----------
+    builder : NeighborhoodBuilder
+        The builder of the neighborhood.
+    struct : PeriodicStructure
+        The structure for which it is built.
+    site_class : str, optional
+        The site class for which it is built, by default None.
+
+    Returns
+    -------
+    AbstractNeighborhood
+        The neighborhood, as a CSRNeighborhood when possible.
+    """
+    return get_default_cache().get(builder, struct, site_class=site_class)
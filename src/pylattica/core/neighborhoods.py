@@ -1,16 +1,180 @@
 import random
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
 import rustworkx as rx
+from scipy import sparse
 
+from .constants import SITE_ID
 from .periodic_structure import PeriodicStructure
 
 
 class AbstractNeighborhood(ABC):
+    """Base class for neighborhoods. Besides neighbors_of, it provides bulk
+    operations that aggregate a per-site quantity over the neighbors of every
+    site at once. They are computed as sparse matrix products with the
+    adjacency matrix of the neighborhood (see as_csr), so they are only
+    available for neighborhoods that can be represented as CSR arrays.
+
+    Per-site quantities are arrays indexed by site ID, such as those returned
+    by SimulationState.site_values.
+    """
+
     @abstractmethod
     def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
         pass  # pragma: no cover
 
+    def as_csr(self) -> "CSRNeighborhood":
+        """Returns this neighborhood as a CSRNeighborhood.
+
+        Raises
+        ------
+        NotImplementedError
+            If this kind of neighborhood cannot be represented as CSR arrays.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot be represented as CSR arrays."
+        )
+
+    def adjacency_matrix(self, weighted: bool = False) -> sparse.csr_matrix:
+        """Returns the sparse adjacency matrix A of this neighborhood, where
+        A[i, j] is the weight of the connection from site i to its neighbor j
+        (or 1 if weighted is False).
+
+        Parameters
+        ----------
+        weighted : bool, optional
+            Whether entries are the connection weights, by default False.
+
+        Returns
+        -------
+        sparse.csr_matrix
+            The num_sites x num_sites adjacency matrix.
+        """
+        return self.as_csr().adjacency_matrix(weighted=weighted)
+
+    def neighbor_sum(self, values: np.ndarray, weighted: bool = False) -> np.ndarray:
+        """Sums values over the neighbors of every site.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A numeric value for each site, indexed by site ID. A 2D array sums
+            each column separately.
+        weighted : bool, optional
+            If True, each neighbor's value is multiplied by the weight of the
+            connection to it, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            The sum for each site, indexed by site ID.
+        """
+        return self.adjacency_matrix(weighted) @ np.asarray(values, dtype=float)
+
+    def neighbor_mean(self, values: np.ndarray, weighted: bool = False) -> np.ndarray:
+        """Averages values over the neighbors of every site. Sites without
+        neighbors get NaN.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A numeric value for each site, indexed by site ID.
+        weighted : bool, optional
+            If True, the average is weighted by the connection weights, by
+            default False.
+
+        Returns
+        -------
+        np.ndarray
+            The mean for each site, indexed by site ID.
+        """
+        adjacency = self.adjacency_matrix(weighted)
+        totals = np.asarray(adjacency.sum(axis=1)).ravel()
+        sums = adjacency @ np.asarray(values, dtype=float)
+        if sums.ndim > 1:
+            totals = totals[:, np.newaxis]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(totals != 0, sums / totals, np.nan)
+
+    def neighbor_count(
+        self, values: np.ndarray, category, weighted: bool = False
+    ) -> np.ndarray:
+        """Counts the neighbors of every site whose value is category, e.g.
+        the number of "alive" neighbors in the Game of Life.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A value for each site, indexed by site ID.
+        category
+            The value to count.
+        weighted : bool, optional
+            If True, each neighbor counts with the weight of the connection to
+            it, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            The count for each site, indexed by site ID.
+        """
+        return self.neighbor_sum(np.asarray(values) == category, weighted=weighted)
+
+    def neighbor_counts(
+        self, values: np.ndarray, categories: List, weighted: bool = False
+    ) -> np.ndarray:
+        """Counts the neighbors of every site in each of several categories.
+        Values that are not in categories are not counted.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A value for each site, indexed by site ID.
+        categories : List
+            The values to count.
+        weighted : bool, optional
+            If True, each neighbor counts with the weight of the connection to
+            it, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            A num_sites x len(categories) array of counts.
+        """
+        values = np.asarray(values)
+        one_hot = np.stack([values == category for category in categories], axis=1)
+        return self.neighbor_sum(one_hot, weighted=weighted)
+
+    def neighbor_majority(
+        self, values: np.ndarray, categories: List, weighted: bool = False, default=None
+    ) -> np.ndarray:
+        """Finds the most common category among the neighbors of every site.
+        Ties go to the category listed first.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A value for each site, indexed by site ID.
+        categories : List
+            The candidate categories. Values that are not in categories are
+            ignored.
+        weighted : bool, optional
+            If True, each neighbor counts with the weight of the connection to
+            it, by default False.
+        default : optional
+            The result for sites with no neighbor in any category, by default None.
+
+        Returns
+        -------
+        np.ndarray
+            The majority category of each site, indexed by site ID.
+        """
+        counts = self.neighbor_counts(values, categories, weighted=weighted)
+        majority = np.asarray(categories, dtype=object)[np.argmax(counts, axis=1)]
+        majority[counts.max(axis=1, initial=0) <= 0] = default
+        return majority
+
 
 class Neighborhood(AbstractNeighborhood):
     """A specific Neighborhood. An instance of this classes corresponds
@@ -19,8 +183,10 @@ class Neighborhood(AbstractNeighborhood):
     """
 
     def __init__(self, graph: rx.PyGraph):
-        """Instantiates a NeighborhoodGraph."""
-        self._graph = graph
+        """Instantiates a NeighborhoodGraph. The neighborhood keeps its own
+        copy of graph, so later changes to graph do not affect it."""
+        self._graph = graph.copy()
+        self._csr = None
 
     def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
         """Retrieves a list of the IDs of the sites which are neighbors of the
@@ -49,6 +215,823 @@ class Neighborhood(AbstractNeighborhood):
 
         return list(nbs)
 
+    def as_csr(self) -> "CSRNeighborhood":
+        """Returns this neighborhood as a CSRNeighborhood. The neighbors of
+        each site are ordered by the order in which their connections were
+        added to the graph. The conversion is done once and cached.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent array-backed neighborhood.
+        """
+        if self._csr is None:
+            self._csr = CSRNeighborhood.from_graph(self._graph)
+        return self._csr
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    # Neighborhoods are shared (e.g. through NeighborhoodCache), so their
+    # arrays are exposed as views that cannot be written to
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _gather_rows(  # pylint: disable=too-many-positional-arguments
+    indices: np.ndarray,
+    weights: np.ndarray,
+    starts: np.ndarray,
+    counts: np.ndarray,
+    include_weights: bool = False,
+    padded: bool = False,
+    fill_value: int = -1,
+) -> Union[Tuple[np.ndarray, ...], np.ndarray]:
+    # Collects the rows indices[starts[i]:starts[i] + counts[i]] (and the
+    # same rows of weights) in the forms returned by neighbors_of_many
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    # Position of every selected connection in indices
+    positions = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+
+    if not padded:
+        if include_weights:
+            return offsets, indices[positions], weights[positions]
+        return offsets, indices[positions]
+
+    width = int(counts.max(initial=0))
+    rows = np.repeat(np.arange(len(starts)), counts)
+    cols = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    nb_ids = np.full((len(starts), width), fill_value, dtype=indices.dtype)
+    nb_ids[rows, cols] = indices[positions]
+    if not include_weights:
+        return nb_ids
+    nb_weights = np.full((len(starts), width), np.nan)
+    nb_weights[rows, cols] = weights[positions]
+    return nb_ids, nb_weights
+
+
+class CSRNeighborhood(AbstractNeighborhood):
+    """A Neighborhood stored as compressed sparse row (CSR) arrays. The
+    neighbors of site i are indices[indptr[i]:indptr[i + 1]], and the weights
+    of the connections to them are the same slice of weights. Site IDs must
+    be the integers 0 to num_sites - 1, as they are for PeriodicStructure.
+
+    Looking up neighbors is a constant time slice, and the neighbors of many
+    sites can be fetched at once with neighbors_of_many. Each connection costs
+    a few bytes (one index and one weight) rather than a graph edge object.
+
+    The arrays are read-only.
+    """
+
+    @classmethod
+    def from_edges(
+        cls,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray = None,
+        num_sites: int = None,
+    ):
+        """Builds a CSRNeighborhood from parallel arrays of directed connections.
+        The neighbors of each site keep the order in which they appear in the
+        arrays.
+
+        Parameters
+        ----------
+        sources : np.ndarray
+            The site whose neighbor each connection defines.
+        targets : np.ndarray
+            The neighbor of each connection.
+        weights : np.ndarray, optional
+            The weight of each connection, by default None (no weights).
+        num_sites : int, optional
+            The number of sites, by default one more than the largest site ID
+            in sources or targets.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The resulting neighborhood.
+        """
+        sources = np.asarray(sources, dtype=np.int64).ravel()
+        targets = np.asarray(targets, dtype=np.int64).ravel()
+        if num_sites is None:
+            num_sites = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+
+        order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=num_sites)
+        indptr = np.zeros(num_sites + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).ravel()[order]
+        return cls(indptr, targets[order], weights)
+
+    @classmethod
+    def from_graph(cls, graph: rx.PyDiGraph):
+        """Builds a CSRNeighborhood from a neighborhood graph whose node
+        indices are site IDs, as used by Neighborhood. The neighbors of each
+        site are ordered by the order in which their connections were added
+        to the graph.
+
+        Parameters
+        ----------
+        graph : rx.PyDiGraph
+            The neighborhood graph.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent neighborhood.
+        """
+        num_sites = max(graph.node_indices(), default=-1) + 1
+        edges = np.array(graph.edge_list(), dtype=np.int64).reshape(-1, 2)
+        # Connections added without a weight count as weight 1
+        weights = np.array(
+            [1.0 if w is None else w for w in graph.edges()], dtype=float
+        )
+
+        # Parallel connections between the same pair of sites are merged, as
+        # neighbors_of lists each neighbor once. The merged connection is
+        # placed where the first one was added and, like the graph lookup in
+        # Neighborhood.neighbors_of, takes the weight of the last one.
+        keys = edges[:, 0] * num_sites + edges[:, 1]
+        _, first = np.unique(keys, return_index=True)
+        _, last_reversed = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last_reversed
+        order = np.argsort(first)
+        return cls.from_edges(
+            edges[first[order], 0],
+            edges[first[order], 1],
+            weights[last[order]],
+            num_sites=num_sites,
+        )
+
+    def __init__(
+        self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray = None
+    ):
+        """Instantiates the CSRNeighborhood from its arrays.
+
+        Parameters
+        ----------
+        indptr : np.ndarray
+            Array of length num_sites + 1 giving the start of the neighbors of
+            each site in indices.
+        indices : np.ndarray
+            The neighbor IDs of every site, concatenated.
+        weights : np.ndarray, optional
+            The weight of each connection in indices, by default None. If not
+            provided, every weight is 1.
+        """
+        self.indptr = _read_only(np.asarray(indptr, dtype=np.int64))
+        index_dtype = np.int32 if self.num_sites < np.iinfo(np.int32).max else np.int64
+        self.indices = _read_only(np.asarray(indices, dtype=index_dtype))
+        if weights is None:
+            weights = np.ones(len(self.indices))
+        self.weights = _read_only(np.asarray(weights, dtype=float))
+        self._adjacency = {}
+
+    @property
+    def num_sites(self) -> int:
+        """The number of sites in the neighborhood."""
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """The total number of neighbor connections."""
+        return len(self.indices)
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """The number of neighbors of each site."""
+        return np.diff(self.indptr)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the arrays of the neighborhood, in bytes."""
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def neighbor_ids(self, site_id: int) -> np.ndarray:
+        """Returns the neighbor IDs of a site as a read-only view into indices.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved.
+
+        Returns
+        -------
+        np.ndarray
+            The IDs of the neighbors.
+        """
+        view = self.indices[self.indptr[site_id] : self.indptr[site_id + 1]]
+        view.flags.writeable = False
+        return view
+
+    def neighbor_weights(self, site_id: int) -> np.ndarray:
+        """Returns the weights of the connections of a site to its neighbors,
+        in the order of neighbor_ids, as a read-only view into weights.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which weights should be retrieved.
+
+        Returns
+        -------
+        np.ndarray
+            The connection weights.
+        """
+        view = self.weights[self.indptr[site_id] : self.indptr[site_id + 1]]
+        view.flags.writeable = False
+        return view
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
+        """Retrieves a list of the IDs of the sites which are neighbors of the
+        provided site. Optionally includes the weights of the connections to those
+        neighbors. Use neighbor_ids and neighbor_weights to get arrays instead.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved
+        include_weights : bool, optional
+            Whether or not weights if the neighbor connections should
+            be included, by default False
+
+        Returns
+        -------
+        list[int]
+            Either a list of site IDs, or a list of tuples of (site ID, connection weight)
+        """
+        start, stop = self.indptr[site_id], self.indptr[site_id + 1]
+        nbs = self.indices[start:stop].tolist()
+        if include_weights:
+            return list(zip(nbs, self.weights[start:stop].tolist()))
+        return nbs
+
+    def neighbors_of_many(
+        self,
+        site_ids: np.ndarray,
+        include_weights: bool = False,
+        padded: bool = False,
+        fill_value: int = -1,
+    ) -> Union[Tuple[np.ndarray, ...], np.ndarray]:
+        """Retrieves the neighbors of many sites at once, either as a ragged
+        (CSR) pair of arrays or as a padded 2D array.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray
+            The sites for which neighbors should be retrieved.
+        include_weights : bool, optional
+            Whether the connection weights should also be returned, by default
+            False.
+        padded : bool, optional
+            If True, return a 2D array with one row per site, padded on the
+            right with fill_value (and with NaN for weights). If False (the
+            default), return (offsets, neighbor_ids) such that the neighbors of
+            site_ids[i] are neighbor_ids[offsets[i]:offsets[i + 1]].
+        fill_value : int, optional
+            The neighbor ID used for padding, by default -1.
+
+        Returns
+        -------
+        Union[Tuple[np.ndarray, ...], np.ndarray]
+            In ragged form, (offsets, neighbor_ids), or (offsets, neighbor_ids,
+            weights) if include_weights is True. In padded form, the 2D array of
+            neighbor IDs, or (neighbor_ids, weights) if include_weights is True.
+        """
+        site_ids = np.asarray(site_ids, dtype=np.int64)
+        starts = self.indptr[site_ids]
+        counts = self.indptr[site_ids + 1] - starts
+        return _gather_rows(
+            self.indices,
+            self.weights,
+            starts,
+            counts,
+            include_weights=include_weights,
+            padded=padded,
+            fill_value=fill_value,
+        )
+
+    def adjacency_matrix(self, weighted: bool = False) -> sparse.csr_matrix:
+        """Returns the sparse adjacency matrix A of this neighborhood, where
+        A[i, j] is the weight of the connection from site i to its neighbor j
+        (or 1 if weighted is False). The matrices are built once and cached.
+
+        Parameters
+        ----------
+        weighted : bool, optional
+            Whether entries are the connection weights, by default False.
+
+        Returns
+        -------
+        sparse.csr_matrix
+            The num_sites x num_sites adjacency matrix.
+        """
+        if weighted not in self._adjacency:
+            data = self.weights if weighted else _read_only(np.ones(self.num_edges))
+            self._adjacency[weighted] = sparse.csr_matrix(
+                (data, self.indices, self.indptr),
+                shape=(self.num_sites, self.num_sites),
+            )
+        return self._adjacency[weighted]
+
+    def as_csr(self) -> "CSRNeighborhood":
+        """Returns this neighborhood, which is already array-backed.
+
+        Returns
+        -------
+        CSRNeighborhood
+            This neighborhood.
+        """
+        return self
+
+
+class ShellNeighborhood(CSRNeighborhood):
+    """A CSRNeighborhood whose connections are grouped into shells, e.g. the
+    first and second nearest neighbors of each site. The neighbors of each
+    site are sorted by shell, so the neighbors in one shell are a contiguous
+    slice of indices, and shell returns a view of a single shell that shares
+    the arrays of this neighborhood.
+    """
+
+    @classmethod
+    def from_shell_edges(  # pylint: disable=too-many-positional-arguments
+        cls,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        shells: np.ndarray,
+        shell_bounds: List[float],
+        num_sites: int = None,
+    ):
+        """Builds a ShellNeighborhood from parallel arrays of directed
+        connections. Within each shell, the neighbors of each site keep the
+        order in which they appear in the arrays.
+
+        Parameters
+        ----------
+        sources : np.ndarray
+            The site whose neighbor each connection defines.
+        targets : np.ndarray
+            The neighbor of each connection.
+        weights : np.ndarray
+            The weight of each connection.
+        shells : np.ndarray
+            The shell index of each connection.
+        shell_bounds : List[float]
+            The outer distance of each shell.
+        num_sites : int, optional
+            The number of sites, by default one more than the largest site ID
+            in sources or targets.
+
+        Returns
+        -------
+        ShellNeighborhood
+            The resulting neighborhood.
+        """
+        sources = np.asarray(sources, dtype=np.int64).ravel()
+        shells = np.asarray(shells, dtype=np.int64).ravel()
+        # lexsort is stable, so connections keep their order within a shell
+        order = np.lexsort((shells, sources))
+        csr = CSRNeighborhood.from_edges(
+            sources[order],
+            np.asarray(targets).ravel()[order],
+            np.asarray(weights).ravel()[order],
+            num_sites=num_sites,
+        )
+        return cls(csr.indptr, csr.indices, csr.weights, shells[order], shell_bounds)
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        shells: np.ndarray,
+        shell_bounds: List[float],
+    ):
+        """Instantiates the ShellNeighborhood from its arrays.
+
+        Parameters
+        ----------
+        indptr : np.ndarray
+            Array of length num_sites + 1 giving the start of the neighbors of
+            each site in indices.
+        indices : np.ndarray
+            The neighbor IDs of every site, concatenated. The neighbors of
+            each site must be sorted by shell.
+        weights : np.ndarray
+            The weight of each connection in indices.
+        shells : np.ndarray
+            The shell index of each connection in indices.
+        shell_bounds : List[float]
+            The outer distance of each shell.
+        """
+        super().__init__(indptr, indices, weights)
+        self.shell_bounds = _read_only(np.asarray(shell_bounds, dtype=float))
+        self.shells = _read_only(np.asarray(shells, dtype=np.int16))
+        # shell_indptr[i, k] is the start of shell k of site i in indices
+        counts = np.zeros((self.num_sites, self.num_shells), dtype=np.int64)
+        sources = np.repeat(np.arange(self.num_sites), self.degrees)
+        np.add.at(counts, (sources, self.shells), 1)
+        shell_indptr = np.empty((self.num_sites, self.num_shells + 1), np.int64)
+        shell_indptr[:, 0] = self.indptr[:-1]
+        np.cumsum(counts, axis=1, out=shell_indptr[:, 1:])
+        shell_indptr[:, 1:] += self.indptr[:-1, np.newaxis]
+        self.shell_indptr = _read_only(shell_indptr)
+
+    @property
+    def num_shells(self) -> int:
+        """The number of shells."""
+        return len(self.shell_bounds)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the arrays of the neighborhood, in bytes."""
+        return super().nbytes + self.shells.nbytes + self.shell_indptr.nbytes
+
+    def shell(self, shell_idx: int) -> "ShellView":
+        """Returns the neighborhood formed by a single shell, without copying
+        any connections.
+
+        Parameters
+        ----------
+        shell_idx : int
+            The index of the shell, 0 being the innermost.
+
+        Returns
+        -------
+        ShellView
+            The neighborhood of the shell.
+        """
+        if not 0 <= shell_idx < self.num_shells:
+            raise ValueError(
+                f"Shell {shell_idx} does not exist, there are {self.num_shells}."
+            )
+        return ShellView(self, shell_idx)
+
+
+class ShellView(AbstractNeighborhood):
+    """The neighborhood formed by a single shell of a ShellNeighborhood. It
+    reads the connections of the ShellNeighborhood in place.
+    """
+
+    def __init__(self, parent: ShellNeighborhood, shell_idx: int):
+        """Instantiates the view. Use ShellNeighborhood.shell instead.
+
+        Parameters
+        ----------
+        parent : ShellNeighborhood
+            The neighborhood holding the connections.
+        shell_idx : int
+            The index of the shell.
+        """
+        self.parent = parent
+        self.shell_idx = shell_idx
+
+    @property
+    def num_sites(self) -> int:
+        """The number of sites in the neighborhood."""
+        return self.parent.num_sites
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """The number of neighbors of each site in this shell."""
+        return np.diff(
+            self.parent.shell_indptr[:, self.shell_idx : self.shell_idx + 2]
+        )[:, 0]
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
+        """Retrieves the neighbors of the provided site in this shell.
+        Optionally includes the weights of the connections to those neighbors.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved
+        include_weights : bool, optional
+            Whether or not weights if the neighbor connections should
+            be included, by default False
+
+        Returns
+        -------
+        list[int]
+            Either a list of site IDs, or a list of tuples of (site ID, connection weight)
+        """
+        start, stop = self.parent.shell_indptr[
+            site_id, self.shell_idx : self.shell_idx + 2
+        ]
+        nbs = self.parent.indices[start:stop].tolist()
+        if include_weights:
+            return list(zip(nbs, self.parent.weights[start:stop].tolist()))
+        return nbs
+
+    def neighbors_of_many(
+        self,
+        site_ids: np.ndarray,
+        include_weights: bool = False,
+        padded: bool = False,
+        fill_value: int = -1,
+    ) -> Union[Tuple[np.ndarray, ...], np.ndarray]:
+        """Retrieves the neighbors in this shell of many sites at once, in the
+        same forms as CSRNeighborhood.neighbors_of_many.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray
+            The sites for which neighbors should be retrieved.
+        include_weights : bool, optional
+            Whether the connection weights should also be returned, by default
+            False.
+        padded : bool, optional
+            If True, return a 2D array with one row per site, padded on the
+            right with fill_value (and with NaN for weights). If False (the
+            default), return (offsets, neighbor_ids) such that the neighbors of
+            site_ids[i] are neighbor_ids[offsets[i]:offsets[i + 1]].
+        fill_value : int, optional
+            The neighbor ID used for padding, by default -1.
+
+        Returns
+        -------
+        Union[Tuple[np.ndarray, ...], np.ndarray]
+            In ragged form, (offsets, neighbor_ids), or (offsets, neighbor_ids,
+            weights) if include_weights is True. In padded form, the 2D array of
+            neighbor IDs, or (neighbor_ids, weights) if include_weights is True.
+        """
+        site_ids = np.asarray(site_ids, dtype=np.int64)
+        bounds = self.parent.shell_indptr[site_ids, self.shell_idx : self.shell_idx + 2]
+        return _gather_rows(
+            self.parent.indices,
+            self.parent.weights,
+            bounds[:, 0],
+            bounds[:, 1] - bounds[:, 0],
+            include_weights=include_weights,
+            padded=padded,
+            fill_value=fill_value,
+        )
+
+    def as_csr(self) -> CSRNeighborhood:
+        """Copies the connections of this shell into a CSRNeighborhood.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent array-backed neighborhood.
+        """
+        offsets, nb_ids, weights = self.neighbors_of_many(
+            np.arange(self.num_sites), include_weights=True
+        )
+        return CSRNeighborhood(offsets, nb_ids, weights)
+
+
+class GridNeighborhood(AbstractNeighborhood):
+    """An implicit neighborhood on a regular grid of sites, in which the
+    neighbors of every site are found at the same set of integer offsets.
+    Nothing is stored per site or per connection: neighbor IDs are computed
+    on demand from the grid shape and periodicity, so memory use does not
+    grow with the number of sites.
+
+    The site at grid coordinates c (an integer vector) has the ID
+    ravel_multi_index(c, shape), which is the ID it gets from
+    PeriodicStructure.build_from with a single site motif. Along periodic
+    axes neighbors wrap around; along non-periodic axes neighbors outside the
+    grid are omitted. The offsets must reach distinct sites, none of them the
+    site itself.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int],
+        periodic: Union[bool, Tuple[bool]],
+        offsets: List[Tuple[int]],
+        weights: List[float] = None,
+    ):
+        """Instantiates the GridNeighborhood.
+
+        Parameters
+        ----------
+        shape : Tuple[int]
+            The number of sites along each axis of the grid.
+        periodic : Union[bool, Tuple[bool]]
+            Whether each axis (or every axis) is periodic.
+        offsets : List[Tuple[int]]
+            The grid offset of each neighbor. Neighbors are listed in this
+            order.
+        weights : List[float], optional
+            The weight of the connection at each offset, by default None (all
+            weights are 1).
+        """
+        self.shape = tuple(int(n) for n in shape)
+        dim = len(self.shape)
+        self.periodic = np.broadcast_to(np.asarray(periodic, dtype=bool), (dim,))
+        self.offsets = _read_only(np.asarray(offsets, dtype=np.int64).reshape(-1, dim))
+        if weights is None:
+            weights = np.ones(len(self.offsets))
+        self.weights = _read_only(np.asarray(weights, dtype=float))
+        # C order strides, and plain Python copies for the scalar lookup
+        self._strides = np.cumprod((self.shape[1:] + (1,))[::-1])[::-1]
+        self._offset_weights = list(
+            zip(map(tuple, self.offsets.tolist()), self.weights.tolist())
+        )
+
+    @property
+    def num_sites(self) -> int:
+        """The number of sites in the grid."""
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the offsets and weights, in bytes."""
+        return self.offsets.nbytes + self.weights.nbytes
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
+        """Computes the IDs of the neighbors of the provided site. Optionally
+        includes the weights of the connections to those neighbors.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved
+        include_weights : bool, optional
+            Whether or not weights if the neighbor connections should
+            be included, by default False
+
+        Returns
+        -------
+        list[int]
+            Either a list of site IDs, or a list of tuples of (site ID, connection weight)
+        """
+        coords = []
+        remainder = int(site_id)
+        for size in reversed(self.shape):
+            remainder, coord = divmod(remainder, size)
+            coords.append(coord)
+        coords.reverse()
+
+        axes = list(zip(coords, self.shape, self.periodic.tolist()))
+        nbs = []
+        for offset, weight in self._offset_weights:
+            nb_id = 0
+            for (coord, size, periodic), delta in zip(axes, offset):
+                coord += delta
+                if periodic:
+                    coord %= size
+                elif coord < 0 or coord >= size:
+                    break
+                nb_id = nb_id * size + coord
+            else:
+                nbs.append((nb_id, weight) if include_weights else nb_id)
+        return nbs
+
+    def _neighbor_grid(self, site_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Neighbor IDs of each site at each offset, and whether they exist
+        coords = np.stack(np.unravel_index(site_ids, self.shape), axis=-1)
+        targets = coords[:, np.newaxis, :] + self.offsets[np.newaxis, :, :]
+        shape = np.array(self.shape)
+        inside = (targets >= 0) & (targets < shape)
+        valid = np.all(self.periodic | inside, axis=2)
+        targets = np.where(self.periodic, targets % shape, targets)
+        return targets @ self._strides, valid
+
+    def neighbors_of_many(
+        self,
+        site_ids: np.ndarray,
+        include_weights: bool = False,
+        padded: bool = False,
+        fill_value: int = -1,
+    ) -> Union[Tuple[np.ndarray, ...], np.ndarray]:
+        """Computes the neighbors of many sites at once, in the same forms as
+        CSRNeighborhood.neighbors_of_many.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray
+            The sites for which neighbors should be retrieved.
+        include_weights : bool, optional
+            Whether the connection weights should also be returned, by default
+            False.
+        padded : bool, optional
+            If True, return a 2D array with one row per site, padded on the
+            right with fill_value (and with NaN for weights). If False (the
+            default), return (offsets, neighbor_ids) such that the neighbors of
+            site_ids[i] are neighbor_ids[offsets[i]:offsets[i + 1]].
+        fill_value : int, optional
+            The neighbor ID used for padding, by default -1.
+
+        Returns
+        -------
+        Union[Tuple[np.ndarray, ...], np.ndarray]
+            In ragged form, (offsets, neighbor_ids), or (offsets, neighbor_ids,
+            weights) if include_weights is True. In padded form, the 2D array of
+            neighbor IDs, or (neighbor_ids, weights) if include_weights is True.
+        """
+        site_ids = np.asarray(site_ids, dtype=np.int64).ravel()
+        nb_ids, valid = self._neighbor_grid(site_ids)
+        weights = np.broadcast_to(self.weights, nb_ids.shape)
+
+        if not padded:
+            offsets = np.zeros(len(site_ids) + 1, dtype=np.int64)
+            np.cumsum(valid.sum(axis=1), out=offsets[1:])
+            if include_weights:
+                return offsets, nb_ids[valid], weights[valid]
+            return offsets, nb_ids[valid]
+
+        # Move the existing neighbors of each row to the left
+        order = np.argsort(~valid, axis=1, kind="stable")
+        valid = np.take_along_axis(valid, order, axis=1)
+        width = int(valid.sum(axis=1).max(initial=0))
+        valid = valid[:, :width]
+        nb_ids = np.where(
+            valid, np.take_along_axis(nb_ids, order, axis=1)[:, :width], fill_value
+        )
+        if not include_weights:
+            return nb_ids
+        weights = np.where(
+            valid, np.take_along_axis(weights, order, axis=1)[:, :width], np.nan
+        )
+        return nb_ids, weights
+
+    def _shifted(self, grid: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        # shifted[c] = grid[c + offset], or 0 where c + offset is outside a
+        # non-periodic axis
+        dim = len(self.shape)
+        shifted = np.roll(grid, tuple(-offset), axis=tuple(range(dim)))
+        for axis, (delta, size) in enumerate(zip(offset, self.shape)):
+            if self.periodic[axis] or delta == 0:
+                continue
+            outside = [slice(None)] * dim
+            if delta > 0:
+                outside[axis] = slice(max(size - delta, 0), None)
+            else:
+                outside[axis] = slice(None, min(-delta, size))
+            shifted[tuple(outside)] = 0
+        return shifted
+
+    def neighbor_sum(self, values: np.ndarray, weighted: bool = False) -> np.ndarray:
+        """Sums values over the neighbors of every site, by shifting the grid
+        of values once per offset.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A numeric value for each site, indexed by site ID. A 2D array sums
+            each column separately.
+        weighted : bool, optional
+            If True, each neighbor's value is multiplied by the weight of the
+            connection to it, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            The sum for each site, indexed by site ID.
+        """
+        values = np.asarray(values, dtype=float)
+        grid = values.reshape(self.shape + values.shape[1:])
+        sums = np.zeros_like(grid)
+        for offset, weight in zip(self.offsets, self.weights):
+            sums += self._shifted(grid, offset) * (weight if weighted else 1.0)
+        return sums.reshape(values.shape)
+
+    def neighbor_mean(self, values: np.ndarray, weighted: bool = False) -> np.ndarray:
+        """Averages values over the neighbors of every site. Sites without
+        neighbors get NaN.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            A numeric value for each site, indexed by site ID.
+        weighted : bool, optional
+            If True, the average is weighted by the connection weights, by
+            default False.
+
+        Returns
+        -------
+        np.ndarray
+            The mean for each site, indexed by site ID.
+        """
+        totals = self.neighbor_sum(np.ones(self.num_sites), weighted=weighted)
+        sums = self.neighbor_sum(values, weighted=weighted)
+        if sums.ndim > 1:
+            totals = totals[:, np.newaxis]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(totals != 0, sums / totals, np.nan)
+
+    def as_csr(self) -> CSRNeighborhood:
+        """Materializes this neighborhood as a CSRNeighborhood, which stores
+        every connection.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent array-backed neighborhood.
+        """
+        offsets, nb_ids, weights = self.neighbors_of_many(
+            np.arange(self.num_sites), include_weights=True
+        )
+        return CSRNeighborhood(offsets, nb_ids, weights)
+
 
 class MultiNeighborhood(AbstractNeighborhood):
     def neighbors_of(self, site_id, include_weights: bool = False) -> List[int]:
@@ -62,15 +1045,237 @@ class MultiNeighborhood(AbstractNeighborhood):
             )
 
 
+def _edge_keys(csr: CSRNeighborhood, num_sites: int) -> np.ndarray:
+    # A unique integer for every (site, neighbor) connection
+    sources = np.repeat(np.arange(csr.num_sites, dtype=np.int64), csr.degrees)
+    return sources * num_sites + csr.indices
+
+
 class StochasticNeighborhood(MultiNeighborhood):
-    """A NeighborhoodGraph for stochastic neighborhoods."""
+    """A neighborhood for which one of several variants is chosen at random
+    each time a site's neighbors are requested.
 
-    def __init__(self, neighborhoods: List[Neighborhood]):
+    Variants usually share most of their connections (e.g. the
+    pseudo-hexagonal neighborhoods), so they are stored as a base
+    CSRNeighborhood holding the connections common to all variants, plus one
+    small CSRNeighborhood per variant holding the rest. The neighbors of a
+    site in some variant are its base neighbors followed by its extra
+    neighbors in that variant. Variants which cannot be represented as CSR
+    arrays are kept as they are.
+    """
+
+    def __init__(self, neighborhoods: List[AbstractNeighborhood]):
+        """Instantiates the StochasticNeighborhood.
+
+        Parameters
+        ----------
+        neighborhoods : List[AbstractNeighborhood]
+            The variants of the neighborhood.
+        """
+        self.num_variants = len(neighborhoods)
+        self.base = None
+        self.extras = None
         self._neighborhoods = neighborhoods
+        try:
+            csrs = [nbhood.as_csr() for nbhood in neighborhoods]
+        except NotImplementedError:
+            return
+        if csrs:
+            self._split(csrs)
+            self._neighborhoods = None
+
+    def _split(self, csrs: List[CSRNeighborhood]) -> None:
+        num_sites = max(csr.num_sites for csr in csrs)
+        keys = [_edge_keys(csr, num_sites) for csr in csrs]
+
+        # Connections of the first variant found, with the same weight, in
+        # every other variant
+        in_all = np.ones(len(keys[0]), dtype=bool)
+        for other_keys, other in zip(keys[1:], csrs[1:]):
+            if len(other_keys) == 0:
+                in_all[:] = False
+                break
+            order = np.argsort(other_keys)
+            pos = np.searchsorted(other_keys[order], keys[0])
+            match = order[np.minimum(pos, len(order) - 1)]
+            in_all &= (other_keys[match] == keys[0]) & (
+                other.weights[match] == csrs[0].weights
+            )
+
+        def from_keys(edge_keys, weights):
+            return CSRNeighborhood.from_edges(
+                edge_keys // num_sites,
+                edge_keys % num_sites,
+                weights,
+                num_sites=num_sites,
+            )
+
+        base_keys = keys[0][in_all]
+        self.base = from_keys(base_keys, csrs[0].weights[in_all])
+        self.extras = []
+        for variant_keys, csr in zip(keys, csrs):
+            extra = ~np.isin(variant_keys, base_keys)
+            self.extras.append(from_keys(variant_keys[extra], csr.weights[extra]))
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the base and extra arrays, in bytes."""
+        if self.base is None:
+            raise NotImplementedError(
+                "The variants of this neighborhood are not array-backed."
+            )
+        return self.base.nbytes + sum(extra.nbytes for extra in self.extras)
 
     def _get_nbhood(self, _) -> List[int]:
         return random.choice(self._neighborhoods)
 
+    def neighbors_of(self, site_id: int, include_weights: bool = False) -> List[int]:
+        """Retrieves the neighbors of the provided site in a randomly chosen
+        variant. Optionally includes the weights of the connections to those
+        neighbors.
+
+        Parameters
+        ----------
+        site_id : int
+            The site for which neighbors should be retrieved
+        include_weights : bool, optional
+            Whether or not weights if the neighbor connections should
+            be included, by default False
+
+        Returns
+        -------
+        list[int]
+            Either a list of site IDs, or a list of tuples of (site ID, connection weight)
+        """
+        if self.base is None:
+            return super().neighbors_of(site_id, include_weights=include_weights)
+
+        extra = self.extras[random.randrange(self.num_variants)]
+        return self.base.neighbors_of(
+            site_id, include_weights=include_weights
+        ) + extra.neighbors_of(site_id, include_weights=include_weights)
+
+    def choose_variants(self, site_ids: np.ndarray, rng=None) -> np.ndarray:
+        """Chooses a variant at random for each of many sites at once.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray
+            The sites for which variants are chosen.
+        rng : np.random.Generator, optional
+            The generator to draw from, by default the global numpy.random
+            generator.
+
+        Returns
+        -------
+        np.ndarray
+            The index of the variant chosen for each site.
+        """
+        size = len(np.asarray(site_ids).reshape(-1))
+        if rng is None:
+            return np.random.randint(self.num_variants, size=size)
+        return rng.integers(self.num_variants, size=size)
+
+    def neighbors_of_many(
+        self,
+        site_ids: np.ndarray,
+        include_weights: bool = False,
+        padded: bool = False,
+        fill_value: int = -1,
+        variants: np.ndarray = None,
+    ) -> Union[Tuple[np.ndarray, ...], np.ndarray]:
+        """Retrieves the neighbors of many sites at once, each in its own
+        randomly chosen variant, in the same forms as
+        CSRNeighborhood.neighbors_of_many.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray
+            The sites for which neighbors should be retrieved.
+        include_weights : bool, optional
+            Whether the connection weights should also be returned, by default
+            False.
+        padded : bool, optional
+            If True, return a 2D array with one row per site, padded on the
+            right with fill_value (and with NaN for weights). If False (the
+            default), return (offsets, neighbor_ids) such that the neighbors of
+            site_ids[i] are neighbor_ids[offsets[i]:offsets[i + 1]].
+        fill_value : int, optional
+            The neighbor ID used for padding, by default -1.
+        variants : np.ndarray, optional
+            The variant to use for each site, by default chosen with
+            choose_variants.
+
+        Returns
+        -------
+        Union[Tuple[np.ndarray, ...], np.ndarray]
+            In ragged form, (offsets, neighbor_ids), or (offsets, neighbor_ids,
+            weights) if include_weights is True. In padded form, the 2D array of
+            neighbor IDs, or (neighbor_ids, weights) if include_weights is True.
+        """
+        realized = self.sample(site_ids, variants=variants)
+        return realized.neighbors_of_many(
+            np.arange(realized.num_sites),
+            include_weights=include_weights,
+            padded=padded,
+            fill_value=fill_value,
+        )
+
+    def sample(
+        self, site_ids: np.ndarray = None, variants: np.ndarray = None
+    ) -> CSRNeighborhood:
+        """Fixes a variant for each of the given sites and returns the
+        resulting neighborhood, in which row i holds the neighbors of
+        site_ids[i]. With the default site_ids, this is an ordinary
+        neighborhood over all sites that supports the bulk aggregations of
+        AbstractNeighborhood.
+
+        Parameters
+        ----------
+        site_ids : np.ndarray, optional
+            The sites to include, by default every site.
+        variants : np.ndarray, optional
+            The variant to use for each site, by default chosen with
+            choose_variants.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The neighborhood with one row per site in site_ids.
+        """
+        if self.base is None:
+            raise NotImplementedError(
+                "The variants of this neighborhood are not array-backed."
+            )
+        if site_ids is None:
+            site_ids = np.arange(self.base.num_sites)
+        site_ids = np.asarray(site_ids, dtype=np.int64).reshape(-1)
+        if variants is None:
+            variants = self.choose_variants(site_ids)
+        variants = np.asarray(variants, dtype=np.int64).reshape(-1)
+
+        # Base connections come first, and the stable sort keeps them first
+        offsets, nb_ids, weights = self.base.neighbors_of_many(
+            site_ids, include_weights=True
+        )
+        rows = [np.repeat(np.arange(len(site_ids)), np.diff(offsets))]
+        nb_ids, weights = [nb_ids], [weights]
+        for variant, extra in enumerate(self.extras):
+            (selected,) = np.nonzero(variants == variant)
+            offsets, extra_ids, extra_weights = extra.neighbors_of_many(
+                site_ids[selected], include_weights=True
+            )
+            rows.append(np.repeat(selected, np.diff(offsets)))
+            nb_ids.append(extra_ids)
+            weights.append(extra_weights)
+
+        return CSRNeighborhood.from_edges(
+            np.concatenate(rows),
+            np.concatenate(nb_ids),
+            np.concatenate(weights),
+            num_sites=len(site_ids),
+        )
+
 
 class SiteClassNeighborhood(MultiNeighborhood):
     """A Neighborhood that distinguished neighbors of sites based on their class"""
@@ -80,6 +1285,36 @@ class SiteClassNeighborhood(MultiNeighborhood):
     ):
         self._struct = structure
         self._nbhoods = neighborhoods
+        self._csr = None
+
+    def as_csr(self) -> CSRNeighborhood:
+        """Returns this neighborhood as a CSRNeighborhood, in which each site
+        has the neighbors given by the neighborhood of its class. The
+        conversion is done once and cached.
+
+        Returns
+        -------
+        CSRNeighborhood
+            The equivalent array-backed neighborhood.
+        """
+        if self._csr is None:
+            sources, targets, weights = [], [], []
+            for site_class, nbhood in self._nbhoods.items():
+                site_ids = [s[SITE_ID] for s in self._struct.sites(site_class)]
+                offsets, nb_ids, nb_weights = nbhood.as_csr().neighbors_of_many(
+                    site_ids, include_weights=True
+                )
+                sources.append(np.repeat(site_ids, np.diff(offsets)))
+                targets.append(nb_ids)
+                weights.append(nb_weights)
+
+            self._csr = CSRNeighborhood.from_edges(
+                np.concatenate(sources or [[]]),
+                np.concatenate(targets or [[]]),
+                np.concatenate(weights or [[]]),
+                num_sites=self._struct.id_limit,
+            )
+        return self._csr
 
     def _get_nbhood(self, site_id: int) -> List[int]:
         site_class = self._struct.site_class(site_id)
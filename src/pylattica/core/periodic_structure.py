@@ -1,9 +1,12 @@
+import hashlib
 from typing import Dict, Iterable, List, Tuple, Union
 
 import numpy as np
 
+from .cell_list import CellList
 from .coordinate_utils import get_points_in_box
 from .lattice import Lattice
+from .tiling import Tiling
 from .constants import LOCATION, SITE_CLASS, SITE_ID, OFFSET_PRECISION
 
 import copy
@@ -12,6 +15,11 @@ VEC_OFFSET = 0.001
 DEFAULT_SITE_CLASS = "A"
 
 
+def _is_rounded(values: np.ndarray) -> bool:
+    scaled = np.asarray(values, dtype=float) * 10**OFFSET_PRECISION
+    return bool(np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-6))
+
+
 class PeriodicStructure:
     """
     Represents a periodic arrangement of sites. Assigns
@@ -99,6 +107,24 @@ class PeriodicStructure:
                     # site_loc should be in cartesian coordinates at this point
                     struct.add_site(site_class, site_loc)
 
+        # Cells are translated by the rows of the lattice matrix when the motif
+        # is fractional or the matrix is symmetric. Only then is the structure
+        # a tiling of the unit cell that builders can exploit, and only if site
+        # locations are not changed by rounding to OFFSET_PRECISION.
+        if frac_coords or np.allclose(lattice.matrix, lattice.matrix.T):
+            basis = [(sc, vec) for sc, vecs in site_motif.items() for vec in vecs]
+            basis_locations = np.array(
+                [
+                    lattice.get_cartesian_coords(vec) if frac_coords else vec
+                    for _, vec in basis
+                ],
+                dtype=float,
+            )
+            if _is_rounded(lattice.matrix) and _is_rounded(basis_locations):
+                struct.tiling = Tiling(
+                    lattice, num_cells, basis_locations, [sc for sc, _ in basis]
+                )
+
         return struct
 
     def __init__(self, lattice: Lattice):
@@ -114,8 +140,46 @@ class PeriodicStructure:
         self.dim = lattice.dim
         self._sites = {}
         self._site_ids = []
+        self._next_site_id = 0
         self._location_lookup = {}
         self._offset_vector = np.array([VEC_OFFSET for _ in range(self.dim)])
+        self._fingerprint = None
+        # Set by build_from, see pylattica.core.tiling.Tiling
+        self.tiling: Tiling = None
+        # Integer location keys of all sites, sorted, and the matching site IDs,
+        # built on first use by ids_at
+        self._sorted_keys = None
+        self._sorted_key_ids = None
+        # The CellList built by cell_list, kept up to date as sites are added
+        # and removed
+        self._cell_list: CellList = None
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the lattice, periodicity, and the ID, location and class
+        of every site. Structures with the same fingerprint have the same sites
+        under the same IDs, so anything derived from the geometry of one (such
+        as a Neighborhood) is valid for the other.
+
+        Returns
+        -------
+        str
+            The hexadecimal SHA-256 digest.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(np.ascontiguousarray(self.lattice.matrix).tobytes())
+            digest.update(repr(tuple(bool(p) for p in self.lattice.periodic)).encode())
+            digest.update(np.array(self._site_ids, dtype=np.int64).tobytes())
+            locations = np.array(
+                [self._sites[sid][LOCATION] for sid in self._site_ids], dtype=float
+            )
+            digest.update(np.ascontiguousarray(locations).tobytes())
+            for site_id in self._site_ids:
+                digest.update(str(self._sites[site_id][SITE_CLASS]).encode())
+                digest.update(b"\0")
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
 
     def as_dict(self):
         copied = copy.deepcopy(self._sites)
@@ -125,20 +189,38 @@ class PeriodicStructure:
         return {
             "lattice": self.lattice.as_dict(),
             "_sites": copied,
+            "_next_site_id": self._next_site_id,
         }
 
     @property
     def site_ids(self):
         return copy.copy(self._site_ids)
 
+    @property
+    def id_limit(self) -> int:
+        """One more than the largest site ID assigned so far. This is the
+        number of sites unless sites have been removed, and is the length of
+        arrays indexed by site ID.
+
+        Returns
+        -------
+        int
+            The site ID limit.
+        """
+        return self._next_site_id
+
     @classmethod
     def from_dict(cls, d):
         struct = cls(Lattice.from_dict(d["lattice"]))
         sites = {int(k): v for k, v in d["_sites"].items()}
 
-        for _, site in sites.items():
-            struct.add_site(site[SITE_CLASS], site[LOCATION])
+        # Sites keep their IDs, which need not be contiguous after remove_site
+        for site_id in sorted(sites):
+            struct._insert_site(
+                site_id, sites[site_id][SITE_CLASS], sites[site_id][LOCATION]
+            )
 
+        struct._next_site_id = d.get("_next_site_id", max(sites, default=-1) + 1)
         return struct
 
     def _get_rounded_coords(self, location: Iterable[float]) -> Iterable[float]:
@@ -168,8 +250,12 @@ class PeriodicStructure:
         int
             The ID of the site. This can be used to retrieve the site later
         """
-        new_site_id = len(self._sites)
+        new_site_id = self._next_site_id
+        self._insert_site(new_site_id, site_class, location)
+        self._next_site_id += 1
+        return new_site_id
 
+    def _insert_site(self, site_id: int, site_class: str, location: Tuple[float]):
         periodized_coords = self._get_rounded_coords(
             self.lattice.get_periodized_cartesian_coords(location)
         )
@@ -179,15 +265,91 @@ class PeriodicStructure:
             self._location_lookup.get(offset_periodized_coords, None) is None
         ), "That site is already occupied"
 
-        self._sites[new_site_id] = {
+        self._sites[site_id] = {
             SITE_CLASS: site_class,
             LOCATION: periodized_coords,
-            SITE_ID: new_site_id,
+            SITE_ID: site_id,
         }
 
-        self._location_lookup[offset_periodized_coords] = new_site_id
-        self._site_ids.append(new_site_id)
-        return new_site_id
+        self._location_lookup[offset_periodized_coords] = site_id
+        self._site_ids.append(site_id)
+        self._fingerprint = None
+        self._sorted_keys = None
+        self.tiling = None
+        if self._cell_list is not None:
+            self._cell_list.add(site_id, periodized_coords)
+
+    def remove_site(self, site_id: int) -> Dict:
+        """Removes a site from the structure. The IDs of other sites do not
+        change, and the ID of the removed site is not reused.
+
+        Parameters
+        ----------
+        site_id : int
+            The ID of the site to remove.
+
+        Returns
+        -------
+        Dict
+            The removed site.
+        """
+        site = self._sites.pop(site_id, None)
+        if site is None:
+            raise ValueError(f"There is no site with ID {site_id}.")
+
+        del self._location_lookup[tuple(self._transformed_coords(site[LOCATION]))]
+        self._site_ids.remove(site_id)
+        self._fingerprint = None
+        self._sorted_keys = None
+        self.tiling = None
+        if self._cell_list is not None:
+            self._cell_list.remove(site_id)
+        return site
+
+    def cell_list(self, radius: float) -> CellList:
+        """Returns a CellList holding the sites of this structure, which
+        supports queries up to radius. A single CellList is kept, and updated
+        by add_site and remove_site. It is reused by later queries whose radius
+        is at most its own and at least half of it; for other radii it is
+        replaced by a new one, as its cells would be too small or would hold
+        too many sites.
+
+        Parameters
+        ----------
+        radius : float
+            The largest query radius the index must support.
+
+        Returns
+        -------
+        CellList
+            The index.
+        """
+        cached = self._cell_list
+        if cached is None or not cached.radius / 2 <= radius <= cached.radius:
+            self._cell_list = CellList.from_structure(self, radius)
+        return self._cell_list
+
+    def sites_within(
+        self, location: Tuple[float], radius: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the sites at most radius away from a location, taking
+        periodic boundary conditions into account. Uses the CellList returned
+        by cell_list(radius).
+
+        Parameters
+        ----------
+        location : Tuple[float]
+            The location in Cartesian coordinates.
+        radius : float
+            The query radius.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The IDs of the sites, in increasing order, and their distances
+            from the location.
+        """
+        return self.cell_list(radius).sites_within(location, radius)
 
     def site_at(self, location: Tuple[float]) -> Dict:
         """Retrieves the site at a particular location. Uses float equality to check.
@@ -210,6 +372,51 @@ class PeriodicStructure:
         else:
             return None
 
+    def _location_keys(self, transformed: np.ndarray) -> np.ndarray:
+        # Transformed coordinates are rounded to OFFSET_PRECISION decimals, so
+        # scaling them gives exact integers which can be compared and sorted
+        scaled = np.rint(transformed * 10**OFFSET_PRECISION).astype(np.int64)
+        return np.ascontiguousarray(scaled).view(
+            np.dtype((np.void, scaled.dtype.itemsize * self.dim))
+        )[:, 0]
+
+    def ids_at(self, locations: np.ndarray) -> np.ndarray:
+        """Retrieves the IDs of the sites at many locations at once. This is the
+        vectorized equivalent of id_at: locations are periodized and matched
+        in the same way.
+
+        Parameters
+        ----------
+        locations : np.ndarray
+            An array of shape (num_locations, dim) of Cartesian coordinates.
+
+        Returns
+        -------
+        np.ndarray
+            The ID of the site at each location, or -1 where there is no site.
+        """
+        locations = np.asarray(locations, dtype=float).reshape(-1, self.dim)
+        if self._sorted_keys is None:
+            site_keys = self._location_keys(
+                np.array(list(self._location_lookup.keys()), dtype=float).reshape(
+                    -1, self.dim
+                )
+            )
+            order = np.argsort(site_keys)
+            self._sorted_keys = site_keys[order]
+            self._sorted_key_ids = np.fromiter(
+                self._location_lookup.values(), dtype=np.int64
+            )[order]
+
+        if len(self._sorted_keys) == 0:
+            return np.full(len(locations), -1, dtype=np.int64)
+
+        query_keys = self._location_keys(self._transformed_coords(locations))
+        positions = np.searchsorted(self._sorted_keys, query_keys)
+        positions = np.minimum(positions, len(self._sorted_keys) - 1)
+        found = self._sorted_keys[positions] == query_keys
+        return np.where(found, self._sorted_key_ids[positions], -1)
+
     def id_at(self, location: Tuple[float]) -> Dict:
         site = self.site_at(location)
         if site is None:
@@ -0,0 +1,301 @@
+import random
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from .basic_controller import BasicController
+from .simulation_result import SimulationResult
+from .simulation_state import SimulationState
+
+
+def capture_rng_state() -> Dict:
+    """Returns the state of the random and numpy.random generators in a JSON
+    serializable form.
+
+    Returns
+    -------
+    Dict
+        The generator states.
+    """
+    version, internal, gauss = random.getstate()
+    np_name, np_keys, np_pos, np_has_gauss, np_cached = np.random.get_state()
+    return {
+        "random": [version, list(internal), gauss],
+        "numpy": [np_name, np_keys.tolist(), np_pos, np_has_gauss, np_cached],
+    }
+
+
+def restore_rng_state(rng_state: Dict) -> None:
+    """Restores generator states captured with capture_rng_state.
+
+    Parameters
+    ----------
+    rng_state : Dict
+        The generator states.
+    """
+    version, internal, gauss = rng_state["random"]
+    random.setstate((version, tuple(internal), gauss))
+    np_name, np_keys, np_pos, np_has_gauss, np_cached = rng_state["numpy"]
+    np.random.set_state(
+        (np_name, np.array(np_keys, dtype=np.uint32), np_pos, np_has_gauss, np_cached)
+    )
+
+
+class ReplayableSimulationResult(SimulationResult):
+    """A SimulationResult that stores no diffs. Instead, it keeps a keyframe
+    every keyframe_interval steps together with the state of the random
+    number generators at that keyframe, and recomputes any other step by
+    re-running the controller from the nearest keyframe. This trades storage
+    for computation: an archived run costs a few keyframes, and any step
+    remains available through get_step, steps, load_steps and the other
+    SimulationResult methods.
+
+    Replay is exact when the controller is deterministic given the state and
+    the random and numpy.random generators, and when the runner keeps no state
+    between steps. This holds for the serial SynchronousRunner and for the
+    AsynchronousRunner with controllers that do not return follow-up sites.
+    Whenever a replay reaches a keyframe, the recomputed state is checked
+    against it and a RuntimeError is raised if they differ.
+
+    Results are normally created with run_replayable. After deserialization,
+    the runner and controller must be provided again with attach before steps
+    that are not keyframes can be recomputed.
+    """
+
+    @classmethod
+    def from_dict(cls, res_dict):
+        res = cls(
+            SimulationState.from_dict(res_dict["initial_state"]),
+            res_dict["keyframe_interval"],
+            rng_state=res_dict["rng_states"]["0"],
+        )
+        for step_str, state_dict in res_dict["keyframes"].items():
+            step_no = int(step_str)
+            if step_no > 0:
+                res._keyframes[step_no] = SimulationState.from_dict(state_dict)
+                res._rng_states[step_no] = res_dict["rng_states"][step_str]
+        res._total_steps = res_dict["total_steps"]
+        res._live_state = SimulationState.from_dict(res_dict["final_state"])
+        return res
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        starting_state: SimulationState,
+        keyframe_interval: int,
+        runner=None,
+        controller: BasicController = None,
+        rng_state: Dict = None,
+    ):
+        """Instantiates the result.
+
+        Parameters
+        ----------
+        starting_state : SimulationState
+            The state with which the simulation started.
+        keyframe_interval : int
+            The number of steps between keyframes. Recomputing a step costs at
+            most this many controller steps.
+        runner : Runner, optional
+            The runner used to produce the result.
+        controller : BasicController, optional
+            The controller used to produce the result. Its pre_run method
+            must already have been called.
+        rng_state : Dict, optional
+            The generator states at the first step, as returned by
+            capture_rng_state. Captured from the current generators if not
+            provided.
+        """
+        super().__init__(starting_state, keyframe_interval=keyframe_interval)
+        self.runner = runner
+        self.controller = controller
+        self._keyframes[0] = self.initial_state
+        self._rng_states: Dict[int, Dict] = {
+            0: capture_rng_state() if rng_state is None else rng_state
+        }
+
+    def attach(self, runner, controller: BasicController) -> None:
+        """Provides the runner and controller used to recompute steps. The
+        controller must be configured as in the original run.
+
+        Parameters
+        ----------
+        runner : Runner
+            The runner.
+        controller : BasicController
+            The controller.
+        """
+        controller.pre_run(self.initial_state)
+        self.runner = runner
+        self.controller = controller
+
+    def add_step(self, updates: Dict[int, Dict]) -> None:
+        self._live_state.batch_update(updates)
+        self._total_steps += 1
+        if self._total_steps % self.keyframe_interval == 0:
+            self._keyframes[self._total_steps] = self._live_state.copy()
+            self._rng_states[self._total_steps] = capture_rng_state()
+
+    def get_diffs(self) -> List[Dict]:
+        """Recomputes and returns every diff of the run.
+
+        Returns
+        -------
+        List[Dict]
+            The list of state diffs.
+        """
+        return list(self._iter_diff_range(0, self._total_steps))
+
+    def _recompute(self, keyframe_step: int, num_steps: int) -> List[Dict]:
+        """Re-runs the controller for num_steps steps from the keyframe at
+        keyframe_step and returns the diffs it produced. The caller's random
+        generator states are left untouched.
+        """
+        if self.runner is None or self.controller is None:
+            raise ValueError(
+                "This result has no runner or controller to recompute steps "
+                "with. Provide them with attach()."
+            )
+
+        caller_rng_state = capture_rng_state()
+        restore_rng_state(self._rng_states[keyframe_step])
+        try:
+            scratch = SimulationResult(self._keyframes[keyframe_step].copy())
+            # pylint: disable=protected-access
+            self.runner._run(scratch.live_state, scratch, self.controller, num_steps)
+        finally:
+            restore_rng_state(caller_rng_state)
+
+        target_step = keyframe_step + num_steps
+        if len(scratch.get_diffs()) != num_steps:
+            raise RuntimeError(
+                f"Replaying from step {keyframe_step} stopped before step {target_step}."
+            )
+        expected = self._keyframes.get(target_step)
+        if target_step == self._total_steps:
+            expected = self._live_state
+        if expected is not None and scratch.live_state != expected:
+            raise RuntimeError(
+                f"Replaying from step {keyframe_step} did not reproduce the stored "
+                f"state at step {target_step}. The controller or runner is not "
+                "deterministic given the random generator state."
+            )
+        return scratch.get_diffs()
+
+    def _iter_diff_range(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        self._check_diff_range(start_step, stop_step)
+        return self._iter_recomputed(start_step, stop_step)
+
+    def _iter_recomputed(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        # Recomputes one keyframe segment at a time, so only one segment of
+        # diffs is held in memory
+        step_no = start_step
+        while step_no < stop_step:
+            keyframe_step, _ = self._replay_start(step_no)
+            segment_stop = min(stop_step, keyframe_step + self.keyframe_interval)
+            diffs = self._recompute(keyframe_step, segment_stop - keyframe_step)
+            yield from diffs[step_no - keyframe_step :]
+            step_no = segment_stop
+
+    def get_diff_range(self, start_step: int, stop_step: int) -> List[Dict]:
+        """Recomputes the diffs that take the result from start_step to
+        stop_step, starting from the nearest keyframe.
+
+        Parameters
+        ----------
+        start_step : int
+            The step at which the first returned diff applies.
+        stop_step : int
+            The step reached after applying the last returned diff.
+
+        Returns
+        -------
+        List[Dict]
+            The diffs, in order.
+        """
+        return list(self._iter_diff_range(start_step, stop_step))
+
+    def verify(self) -> bool:
+        """Recomputes the whole run and checks it against every keyframe and
+        the final state.
+
+        Returns
+        -------
+        bool
+            True if the run is reproduced. A RuntimeError is raised otherwise.
+        """
+        for keyframe_step in sorted(self._keyframes):
+            if keyframe_step < self._total_steps:
+                segment_stop = min(
+                    keyframe_step + self.keyframe_interval, self._total_steps
+                )
+                self._recompute(keyframe_step, segment_stop - keyframe_step)
+        return True
+
+    def as_dict(self):
+        return {
+            "initial_state": self.initial_state.as_dict(),
+            "final_state": self._live_state.as_dict(),
+            "keyframe_interval": self.keyframe_interval,
+            "total_steps": self._total_steps,
+            "keyframes": {
+                str(step_no): state.as_dict()
+                for step_no, state in self._keyframes.items()
+            },
+            "rng_states": {
+                str(step_no): rng_state
+                for step_no, rng_state in self._rng_states.items()
+            },
+            "@module": self.__class__.__module__,
+            "@class": self.__class__.__name__,
+        }
+
+
+def run_replayable(  # pylint: disable=too-many-positional-arguments
+    runner,
+    initial_state: SimulationState,
+    controller: BasicController,
+    num_steps: int,
+    keyframe_interval: int = 1000,
+    seed: int = None,
+    verbose: bool = False,
+) -> ReplayableSimulationResult:
+    """Runs a simulation and records it as a ReplayableSimulationResult.
+
+    Parameters
+    ----------
+    runner : Runner
+        The runner to use. Parallel runners are not supported, since the
+        random generators of their workers are not recorded.
+    initial_state : SimulationState
+        The starting state for the simulation.
+    controller : BasicController
+        The controller which implements the update rule.
+    num_steps : int
+        The number of steps for which the simulation should run.
+    keyframe_interval : int, optional
+        The number of steps between keyframes, by default 1000.
+    seed : int, optional
+        If provided, the random and numpy.random generators are seeded with
+        this value before the run.
+    verbose : bool, optional
+        If True, debug information is printed during the run, by default False
+
+    Returns
+    -------
+    ReplayableSimulationResult
+        The result of the simulation.
+    """
+    if getattr(runner, "parallel", False):
+        raise ValueError("Parallel runs cannot be recorded for replay.")
+
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    controller.pre_run(initial_state)
+    result = ReplayableSimulationResult(
+        initial_state.copy(), keyframe_interval, runner=runner, controller=controller
+    )
+    # pylint: disable=protected-access
+    runner._run(result.live_state, result, controller, num_steps, verbose)
+    return result
@@ -0,0 +1,478 @@
+import copy
+import json
+import lzma
+import struct
+import zlib
+from typing import Dict, List
+
+import numpy as np
+from monty.json import MontyEncoder
+
+from .constants import GENERAL, SITES
+
+
+def restore_diff_keys(diff: Dict) -> Dict:
+    """Converts the string site IDs produced by JSON serialization of a
+    diff back into integers.
+
+    Parameters
+    ----------
+    diff : Dict
+        A diff, either in the full form (with SITES and GENERAL keys) or
+        in the flat form (mapping site IDs to site updates).
+
+    Returns
+    -------
+    Dict
+        The diff with integer site IDs.
+    """
+    if SITES in diff:
+        diff[SITES] = {int(k): v for k, v in diff[SITES].items()}
+    if GENERAL not in diff and SITES not in diff:
+        diff = {int(k): v for k, v in diff.items()}
+    return diff
+
+
+def restore_state_keys(state: Dict) -> Dict:
+    """Converts the string site IDs in a serialized state dictionary
+    back into integers.
+
+    Parameters
+    ----------
+    state : Dict
+        A state dictionary with SITES and GENERAL keys.
+
+    Returns
+    -------
+    Dict
+        The state dictionary with integer site IDs.
+    """
+    state[SITES] = {int(k): v for k, v in state[SITES].items()}
+    return state
+
+
+COMPRESSORS = {
+    None: (lambda data: data, lambda data: data),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+class BlockCodec:
+    """Base class for codecs that encode the blocks of a result file (states
+    and runs of consecutive diffs) as bytes. Every codec can optionally compress
+    each block with zlib or lzma.
+    """
+
+    name = None
+
+    def __init__(self, compression: str = None):
+        """Instantiates the codec.
+
+        Parameters
+        ----------
+        compression : str, optional
+            Either None, "zlib" or "lzma", by default None
+
+        Raises
+        ------
+        ValueError
+            If the compression method is not supported.
+        """
+        if compression not in COMPRESSORS:
+            raise ValueError(
+                f"Unknown compression {compression}. Available: {list(COMPRESSORS.keys())}"
+            )
+        self.compression = compression
+        self._compress, self._decompress = COMPRESSORS[compression]
+
+    def compress(self, data: bytes) -> bytes:
+        """Applies this codec's block compression to raw bytes.
+
+        Parameters
+        ----------
+        data : bytes
+            The data to compress.
+
+        Returns
+        -------
+        bytes
+            The compressed data (or the input if compression is None).
+        """
+        return self._compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Reverses compress.
+
+        Parameters
+        ----------
+        data : bytes
+            The compressed data.
+
+        Returns
+        -------
+        bytes
+            The decompressed data.
+        """
+        return self._decompress(data)
+
+    def encode_state(self, state: Dict) -> bytes:
+        """Encodes a raw state dictionary (as returned by SimulationState.get_state).
+
+        Parameters
+        ----------
+        state : Dict
+            The state to encode.
+
+        Returns
+        -------
+        bytes
+            The encoded state.
+        """
+        return self._compress(self._encode_state(state))
+
+    def decode_state(self, data: bytes) -> Dict:
+        """Decodes a state dictionary previously encoded with encode_state.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded state.
+
+        Returns
+        -------
+        Dict
+            The raw state dictionary.
+        """
+        return self._decode_state(self._decompress(data))
+
+    def encode_diffs(self, diffs: List[Dict]) -> bytes:
+        """Encodes a run of consecutive diffs.
+
+        Parameters
+        ----------
+        diffs : List[Dict]
+            The diffs to encode.
+
+        Returns
+        -------
+        bytes
+            The encoded diffs.
+        """
+        return self._compress(self._encode_diffs(diffs))
+
+    def decode_diffs(self, data: bytes) -> List[Dict]:
+        """Decodes a run of diffs previously encoded with encode_diffs.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded diffs.
+
+        Returns
+        -------
+        List[Dict]
+            The decoded diffs.
+        """
+        return self._decode_diffs(self._decompress(data))
+
+
+class JsonBlockCodec(BlockCodec):
+    """Encodes blocks as UTF-8 JSON. This is the simplest codec, and the one
+    whose output is closest to what SimulationResult.as_dict produces.
+    """
+
+    name = "json"
+
+    def _encode_state(self, state: Dict) -> bytes:
+        return json.dumps(state, cls=MontyEncoder).encode("utf-8")
+
+    def _decode_state(self, data: bytes) -> Dict:
+        return restore_state_keys(json.loads(bytes(data).decode("utf-8")))
+
+    def _encode_diffs(self, diffs: List[Dict]) -> bytes:
+        return json.dumps(diffs, cls=MontyEncoder).encode("utf-8")
+
+    def _decode_diffs(self, data: bytes) -> List[Dict]:
+        return [
+            restore_diff_keys(diff) for diff in json.loads(bytes(data).decode("utf-8"))
+        ]
+
+
+_HAS_SITES = 1
+_HAS_GENERAL = 2
+_GENERAL_SITE = -1
+_EMPTY_UPDATE = -1
+
+INT_FIELD = "int"
+FLOAT_FIELD = "float"
+CATEGORICAL_FIELD = "categorical"
+
+_META_LEN = struct.Struct("<I")
+_ALIGN = 8
+
+
+def _smallest_int_dtype(max_abs: int) -> str:
+    if max_abs < 2**15:
+        return "<i2"
+    if max_abs < 2**31:
+        return "<i4"
+    return "<i8"
+
+
+def _field_kind(values: List) -> str:
+    if all(type(v) is int for v in values):  # pylint: disable=unidiomatic-typecheck
+        if all(-(2**63) <= v < 2**63 for v in values):
+            return INT_FIELD
+    elif all(type(v) is float for v in values):  # pylint: disable=unidiomatic-typecheck
+        return FLOAT_FIELD
+    return CATEGORICAL_FIELD
+
+
+class ColumnarBlockCodec(BlockCodec):
+    """Encodes runs of diffs as flat columns rather than nested dictionaries.
+    Every (site, field, value) change in a block becomes one row in four arrays:
+
+    - a pointer array giving the first row of each step (the step column in
+      compressed form),
+    - the site ID of each row (-1 for changes to the general state),
+    - the field code of each row, indexing into a table of field names,
+    - the value of each row, stored as a 64 bit integer.
+
+    Fields whose values are all integers or all floats are stored directly (floats
+    by their bit pattern). Every other field is treated as categorical: its distinct
+    values are stored once in a per-field dictionary, and rows hold codes into it.
+    States are encoded as a single full diff, so keyframes share the same layout.
+    """
+
+    name = "columnar"
+
+    def _encode_state(self, state: Dict) -> bytes:
+        return self._encode_diffs([state])
+
+    def _decode_state(self, data: bytes) -> Dict:
+        return self._decode_diffs(data)[0]
+
+    def _encode_diffs(self, diffs: List[Dict]) -> bytes:
+        flags = np.zeros(len(diffs), dtype=np.uint8)
+        ptr = np.zeros(len(diffs) + 1, dtype=np.int64)
+        sites = []
+        fields = []
+        field_codes = {}
+        field_values = []
+        field_rows = []
+
+        def _add_row(site_id, key, value):
+            code = field_codes.get(key)
+            if code is None:
+                code = len(field_codes)
+                field_codes[key] = code
+                field_values.append([])
+                field_rows.append([])
+            field_values[code].append(value)
+            field_rows[code].append(len(sites))
+            sites.append(site_id)
+            fields.append(code)
+
+        for diff_idx, diff in enumerate(diffs):
+            if SITES in diff or GENERAL in diff:
+                flags[diff_idx] = (SITES in diff) * _HAS_SITES + (
+                    GENERAL in diff
+                ) * _HAS_GENERAL
+                site_updates = diff.get(SITES, {})
+                general_updates = diff.get(GENERAL, {})
+            else:
+                site_updates = diff
+                general_updates = {}
+
+            for site_id, updates in site_updates.items():
+                if len(updates) == 0:
+                    sites.append(site_id)
+                    fields.append(_EMPTY_UPDATE)
+                for key, value in updates.items():
+                    _add_row(site_id, key, value)
+
+            for key, value in general_updates.items():
+                _add_row(_GENERAL_SITE, key, value)
+
+            ptr[diff_idx + 1] = len(sites)
+
+        values = np.zeros(len(sites), dtype=np.int64)
+        kinds = []
+        categories = []
+        for vals, rows in zip(field_values, field_rows):
+            kind = _field_kind(vals)
+            kinds.append(kind)
+            if kind == INT_FIELD:
+                values[rows] = np.array(vals, dtype=np.int64)
+                categories.append(None)
+            elif kind == FLOAT_FIELD:
+                values[rows] = np.array(vals, dtype=np.float64).view(np.int64)
+                categories.append(None)
+            else:
+                lookup = {}
+                cats = []
+                codes = []
+                for val in vals:
+                    key = json.dumps(val, cls=MontyEncoder)
+                    code = lookup.get(key)
+                    if code is None:
+                        code = len(cats)
+                        lookup[key] = code
+                        cats.append(val)
+                    codes.append(code)
+                values[rows] = codes
+                categories.append(cats)
+
+        site_dtype = _smallest_int_dtype(max((abs(s) for s in sites), default=0))
+        field_dtype = _smallest_int_dtype(len(field_codes))
+        ptr_dtype = _smallest_int_dtype(len(sites))
+        if FLOAT_FIELD in kinds:
+            value_dtype = "<i8"
+        elif len(values) == 0:
+            value_dtype = _smallest_int_dtype(0)
+        else:
+            value_dtype = _smallest_int_dtype(
+                max(int(values.max()), -int(values.min()))
+            )
+
+        meta = {
+            "num_diffs": len(diffs),
+            "num_rows": len(sites),
+            "fields": list(field_codes.keys()),
+            "kinds": kinds,
+            "categories": categories,
+            "dtypes": [ptr_dtype, site_dtype, field_dtype, value_dtype],
+        }
+        meta_bytes = json.dumps(meta, cls=MontyEncoder).encode("utf-8")
+
+        chunks = [_META_LEN.pack(len(meta_bytes)), meta_bytes]
+        arrays = [
+            flags,
+            ptr.astype(ptr_dtype),
+            np.array(sites, dtype=site_dtype),
+            np.array(fields, dtype=field_dtype),
+            values.astype(value_dtype),
+        ]
+        size = _META_LEN.size + len(meta_bytes)
+        for arr in arrays:
+            pad = -size % _ALIGN
+            chunks.append(b"\0" * pad)
+            chunks.append(arr.tobytes())
+            size += pad + arr.nbytes
+
+        return b"".join(chunks)
+
+    def _read_columns(self, data: bytes):
+        (meta_len,) = _META_LEN.unpack_from(data, 0)
+        meta = json.loads(bytes(data[_META_LEN.size : _META_LEN.size + meta_len]))
+        num_diffs = meta["num_diffs"]
+        num_rows = meta["num_rows"]
+        ptr_dtype, site_dtype, field_dtype, value_dtype = meta["dtypes"]
+
+        offset = _META_LEN.size + meta_len
+        columns = []
+        for dtype, count in [
+            (np.uint8, num_diffs),
+            (ptr_dtype, num_diffs + 1),
+            (site_dtype, num_rows),
+            (field_dtype, num_rows),
+            (value_dtype, num_rows),
+        ]:
+            offset += -offset % _ALIGN
+            arr = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            columns.append(arr)
+            offset += arr.nbytes
+
+        return meta, columns
+
+    def _decode_diffs(self, data: bytes) -> List[Dict]:
+        meta, (flags, ptr, sites, fields, values) = self._read_columns(data)
+        values = values.astype(np.int64)
+
+        decoded = np.empty(len(values), dtype=object)
+        for code, kind in enumerate(meta["kinds"]):
+            rows = fields == code
+            if kind == INT_FIELD:
+                decoded[rows] = values[rows].tolist()
+            elif kind == FLOAT_FIELD:
+                decoded[rows] = values[rows].view(np.float64).tolist()
+            else:
+                cats = meta["categories"][code]
+                lookup = np.empty(len(cats), dtype=object)
+                for idx, cat in enumerate(cats):
+                    lookup[idx] = cat
+                decoded[rows] = lookup[values[rows]]
+
+        field_names = meta["fields"]
+        sites = sites.tolist()
+        fields = fields.tolist()
+        decoded = decoded.tolist()
+        ptr = ptr.tolist()
+
+        diffs = []
+        for diff_idx, flag in enumerate(flags.tolist()):
+            site_updates = {}
+            general_updates = {}
+            for row in range(ptr[diff_idx], ptr[diff_idx + 1]):
+                site_id = sites[row]
+                if fields[row] == _EMPTY_UPDATE:
+                    site_updates[site_id] = {}
+                    continue
+
+                value = decoded[row]
+                if isinstance(value, (list, dict)):
+                    value = copy.deepcopy(value)
+
+                if site_id == _GENERAL_SITE:
+                    general_updates[field_names[fields[row]]] = value
+                elif site_id in site_updates:
+                    site_updates[site_id][field_names[fields[row]]] = value
+                else:
+                    site_updates[site_id] = {field_names[fields[row]]: value}
+
+            if flag == 0:
+                diffs.append(site_updates)
+            else:
+                diff = {}
+                if flag & _HAS_SITES:
+                    diff[SITES] = site_updates
+                if flag & _HAS_GENERAL:
+                    diff[GENERAL] = general_updates
+                diffs.append(diff)
+
+        return diffs
+
+
+CODECS = {
+    JsonBlockCodec.name: JsonBlockCodec,
+    ColumnarBlockCodec.name: ColumnarBlockCodec,
+}
+
+
+def get_codec(name: str, compression: str = None) -> BlockCodec:
+    """Returns an instance of the block codec registered under name.
+
+    Parameters
+    ----------
+    name : str
+        The name of the codec, either "json" or "columnar".
+    compression : str, optional
+        The block compression used by the codec: None, "zlib" or "lzma",
+        by default None
+
+    Returns
+    -------
+    BlockCodec
+        The codec instance.
+
+    Raises
+    ------
+    ValueError
+        If no codec is registered under that name.
+    """
+    if name not in CODECS:
+        raise ValueError(
+            f"Unknown result codec {name}. Available codecs: {list(CODECS.keys())}"
+        )
+    return CODECS[name](compression=compression)
@@ -0,0 +1,552 @@
+import bisect
+import json
+import mmap
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Dict, List
+
+import numpy as np
+from monty.json import MontyEncoder
+
+from .constants import LOCATION, SITE_CLASS
+from .lattice import Lattice
+from .periodic_structure import PeriodicStructure
+from .result_codecs import get_codec
+from .simulation_state import SimulationState
+
+RESULT_FILE_MAGIC = b"PYLRES01"
+SIMULATION_FILE_MAGIC = b"PYLSIM01"
+RESULT_FILE_EXTENSION = ".plr"
+SIMULATION_FILE_EXTENSION = ".pls"
+DEFAULT_KEYFRAME_INTERVAL = 1000
+
+_HEADER_LEN = struct.Struct("<Q")
+_BODY_START = len(RESULT_FILE_MAGIC) + _HEADER_LEN.size
+
+
+def _has_magic(fpath: str, magic: bytes) -> bool:
+    with open(fpath, "rb") as f:
+        return f.read(len(magic)) == magic
+
+
+def is_result_file(fpath: str) -> bool:
+    """Checks whether the file at fpath is an indexed result file.
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the file to check.
+
+    Returns
+    -------
+    bool
+        True if the file starts with the result file magic bytes.
+    """
+    return _has_magic(fpath, RESULT_FILE_MAGIC)
+
+
+def is_simulation_file(fpath: str) -> bool:
+    """Checks whether the file at fpath is a binary simulation file.
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the file to check.
+
+    Returns
+    -------
+    bool
+        True if the file starts with the simulation file magic bytes.
+    """
+    return _has_magic(fpath, SIMULATION_FILE_MAGIC)
+
+
+class _BlockWriter:
+    """Accumulates the blocks of a file body and records their offsets."""
+
+    def __init__(self):
+        self.blocks = []
+        self.offset = 0
+
+    def add(self, data: bytes) -> List[int]:
+        self.blocks.append(data)
+        ref = [self.offset, len(data)]
+        self.offset += len(data)
+        return ref
+
+    def write(self, fpath: str, magic: bytes, header: Dict) -> None:
+        header_bytes = json.dumps(header, cls=MontyEncoder).encode("utf-8")
+        with open(fpath, "wb") as f:
+            f.write(magic)
+            f.write(_HEADER_LEN.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for block in self.blocks:
+                f.write(block)
+
+
+def write_result_file(  # pylint: disable=too-many-positional-arguments
+    result: "SimulationResult",
+    fpath: str,
+    keyframe_interval: int = None,
+    codec: str = "columnar",
+    compression: str = None,
+) -> str:
+    """Writes result to fpath in the indexed result file format. The file is
+    laid out so that it can be opened without reading or replaying its history:
+
+    ```
+    MAGIC | header length (uint64, little endian) | JSON header | body
+    ```
+
+    The header holds the result metadata and an index of the body. The body
+    starts with the initial and final states, followed by a sequence of segments,
+    each of which is a keyframe (the full state at the first step of the segment)
+    and the run of diffs up to the start of the next segment. Any step can
+    therefore be rebuilt by decoding one keyframe and at most one segment of diffs.
+
+    Parameters
+    ----------
+    result : SimulationResult
+        The result to write.
+    fpath : str
+        The destination path.
+    keyframe_interval : int, optional
+        The number of diffs stored between consecutive keyframes. Defaults to
+        the keyframe_interval of the result if it has one, and to 1000
+        otherwise. Smaller values make random access cheaper at the cost of a
+        larger file.
+    codec : str, optional
+        The codec used to encode each block, by default "columnar". See
+        pylattica.core.result_codecs.
+    compression : str, optional
+        The compression applied to each block: None, "zlib" or "lzma", by
+        default None
+
+    Returns
+    -------
+    str
+        The path the result was written to.
+    """
+    if keyframe_interval is None:
+        keyframe_interval = result.keyframe_interval or DEFAULT_KEYFRAME_INTERVAL
+
+    block_codec = get_codec(codec, compression=compression)
+    writer = _BlockWriter()
+
+    initial_ref = writer.add(block_codec.encode_state(result.initial_state.get_state()))
+    final_ref = writer.add(block_codec.encode_state(result.live_state.get_state()))
+
+    segments = []
+    frames = []
+    if result.live_compress:
+        frames_by_step = result.frames
+        for step_no in sorted(frames_by_step.keys()):
+            state = frames_by_step[step_no]
+            frames.append(
+                [step_no, *writer.add(block_codec.encode_state(state.get_state()))]
+            )
+    else:
+        diffs = result.get_diffs()
+        start_step = result.earliest_available_step
+        if result.checkpoint_state is not None:
+            live_state = result.checkpoint_state.copy()
+        else:
+            live_state = result.initial_state.copy()
+
+        seg_start = 0
+        while True:
+            seg_diffs = diffs[seg_start : seg_start + keyframe_interval]
+            kf_ref = writer.add(block_codec.encode_state(live_state.get_state()))
+            diff_ref = writer.add(block_codec.encode_diffs(seg_diffs))
+            segments.append(
+                [start_step + seg_start, len(seg_diffs), *kf_ref, *diff_ref]
+            )
+
+            for diff in seg_diffs:
+                live_state.batch_update(diff)
+
+            seg_start += keyframe_interval
+            if seg_start >= len(diffs):
+                break
+
+    header = {
+        "codec": block_codec.name,
+        "compression": block_codec.compression,
+        "compress_freq": result.compress_freq,
+        "max_history": result.max_history,
+        "live_compress": result.live_compress,
+        "keyframe_interval": result.keyframe_interval,
+        "track_site_history": result.track_site_history,
+        "compress_history": result.compress_history,
+        "total_steps": result.total_steps,
+        "checkpoint_step": result.checkpoint_step,
+        "has_checkpoint": result.checkpoint_state is not None,
+        "initial_state": initial_ref,
+        "final_state": final_ref,
+        "segments": segments,
+        "frames": frames,
+    }
+    writer.write(fpath, RESULT_FILE_MAGIC, header)
+    return fpath
+
+
+class _FileReader:
+    """Reads the header of a pylattica binary file and memory maps its body,
+    so that blocks can be decoded without copying them out of the page cache."""
+
+    def __init__(self, fpath: str, magic: bytes):
+        self.fpath = fpath
+        with open(fpath, "rb") as f:
+            if f.read(len(magic)) != magic:
+                raise ValueError(f"{fpath} is not a pylattica {self.kind} file.")
+            (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._body_start = _BODY_START + header_len
+        self.codec = get_codec(
+            self.header["codec"], compression=self.header["compression"]
+        )
+
+    kind = None
+
+    def read_block(self, offset: int, length: int) -> memoryview:
+        """Returns a view of a block in the body of the file.
+
+        Parameters
+        ----------
+        offset : int
+            The offset of the block relative to the start of the body.
+        length : int
+            The length of the block in bytes.
+
+        Returns
+        -------
+        memoryview
+            A read-only view of the block contents.
+        """
+        start = self._body_start + offset
+        return memoryview(self._mmap)[start : start + length]
+
+    def close(self) -> None:
+        """Closes the memory map. Arrays decoded from uncompressed blocks may
+        still reference it, in which case it is closed once they are released."""
+        try:
+            self._mmap.close()
+        except BufferError:  # pragma: no cover
+            pass
+
+
+class ResultFileReader(_FileReader):
+    """Provides random access to the header and blocks of an indexed result file.
+    Only the header is read when the reader is created; the body is memory
+    mapped and blocks are decoded when they are requested.
+    """
+
+    kind = "result"
+
+    def __init__(self, fpath: str):
+        """Opens the result file at fpath and reads its header.
+
+        Parameters
+        ----------
+        fpath : str
+            The path of the result file.
+
+        Raises
+        ------
+        ValueError
+            If the file is not an indexed result file.
+        """
+        super().__init__(fpath, RESULT_FILE_MAGIC)
+        self.segments = self.header["segments"]
+        self.segment_starts = [seg[0] for seg in self.segments]
+
+    def read_state(self, key: str) -> SimulationState:
+        """Decodes one of the states referenced by the header.
+
+        Parameters
+        ----------
+        key : str
+            The header key of the state, e.g. "initial_state" or "final_state".
+
+        Returns
+        -------
+        SimulationState
+            The decoded state.
+        """
+        return SimulationState(
+            self.codec.decode_state(self.read_block(*self.header[key]))
+        )
+
+    def segment_index(self, step_no: int) -> int:
+        """Returns the index of the segment containing step_no.
+
+        Parameters
+        ----------
+        step_no : int
+            The step of interest.
+
+        Returns
+        -------
+        int
+            The index of the segment whose range covers step_no.
+        """
+        return max(bisect.bisect_right(self.segment_starts, step_no) - 1, 0)
+
+    def read_keyframe(self, seg_idx: int) -> SimulationState:
+        """Decodes the keyframe at the start of a segment.
+
+        Parameters
+        ----------
+        seg_idx : int
+            The index of the segment.
+
+        Returns
+        -------
+        SimulationState
+            The state at the first step of the segment.
+        """
+        _, _, kf_offset, kf_len, _, _ = self.segments[seg_idx]
+        data = self.read_block(kf_offset, kf_len)
+        return SimulationState(self.codec.decode_state(data))
+
+    def read_diffs(self, seg_idx: int) -> List[Dict]:
+        """Decodes the diffs stored in a segment.
+
+        Parameters
+        ----------
+        seg_idx : int
+            The index of the segment.
+
+        Returns
+        -------
+        List[Dict]
+            The diffs of the segment, in order.
+        """
+        _, _, _, _, diff_offset, diff_len = self.segments[seg_idx]
+        return self.codec.decode_diffs(self.read_block(diff_offset, diff_len))
+
+    def read_frame(self, offset: int, length: int) -> SimulationState:
+        """Decodes a stored frame (live_compress results only).
+
+        Parameters
+        ----------
+        offset : int
+            The offset of the frame block.
+        length : int
+            The length of the frame block.
+
+        Returns
+        -------
+        SimulationState
+            The decoded frame.
+        """
+        return SimulationState(self.codec.decode_state(self.read_block(offset, length)))
+
+
+class _LazyDiffs(Sequence):
+    """A read-only view of the diffs in a result file which decodes segments
+    as they are accessed. A small number of decoded segments are cached.
+    Diffs appended after loading are kept in memory."""
+
+    def __init__(self, reader: ResultFileReader, cache_size: int = 4):
+        self._reader = reader
+        self._first_step = reader.segment_starts[0] if reader.segments else 0
+        self._stored_len = sum(seg[1] for seg in reader.segments)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._tail = []
+
+    def _segment(self, seg_idx: int) -> List[Dict]:
+        if seg_idx in self._cache:
+            self._cache.move_to_end(seg_idx)
+            return self._cache[seg_idx]
+
+        diffs = self._reader.read_diffs(seg_idx)
+        self._cache[seg_idx] = diffs
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return diffs
+
+    def __len__(self) -> int:
+        return self._stored_len + len(self._tail)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, stride = idx.indices(len(self))
+            if stride != 1:
+                return [self[i] for i in range(start, stop, stride)]
+            return list(self.iter_range(start, stop))
+
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("diff index out of range")
+
+        if idx >= self._stored_len:
+            return self._tail[idx - self._stored_len]
+
+        # diff idx takes the state from step first_step + idx to the next step
+        seg_idx = self._reader.segment_index(self._first_step + idx)
+        seg_offset = self._reader.segment_starts[seg_idx] - self._first_step
+        return self._segment(seg_idx)[idx - seg_offset]
+
+    def iter_range(self, start: int, stop: int):
+        """Yields the diffs with indices in [start, stop), decoding each
+        segment at most once.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first diff.
+        stop : int
+            One past the index of the last diff.
+        """
+        idx = start
+        stored_stop = min(stop, self._stored_len)
+        while idx < stored_stop:
+            seg_idx = self._reader.segment_index(self._first_step + idx)
+            seg_offset = self._reader.segment_starts[seg_idx] - self._first_step
+            seg_diffs = self._segment(seg_idx)
+            seg_stop = min(stored_stop - seg_offset, len(seg_diffs))
+            yield from seg_diffs[idx - seg_offset : seg_stop]
+            idx = seg_offset + seg_stop
+
+        yield from self._tail[
+            max(start - self._stored_len, 0) : stop - self._stored_len
+        ]
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    def append(self, diff: Dict) -> None:
+        self._tail.append(diff)
+
+
+class _LazyFrames(Mapping):
+    """A read-only mapping of step numbers to the frames stored in a
+    live_compress result file. Frames are decoded when accessed."""
+
+    def __init__(self, reader: ResultFileReader):
+        self._reader = reader
+        self._refs = {
+            step: (offset, length) for step, offset, length in reader.header["frames"]
+        }
+
+    def __getitem__(self, step_no: int) -> SimulationState:
+        return self._reader.read_frame(*self._refs[step_no])
+
+    def __iter__(self):
+        return iter(self._refs)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+
+def write_simulation_file(
+    simulation: "Simulation",
+    fpath: str,
+    codec: str = "columnar",
+    compression: str = None,
+) -> str:
+    """Writes a Simulation to fpath in a binary format. The structure is stored
+    as arrays of site locations and site class codes, and the state is stored
+    as a single block encoded with the given codec.
+
+    Parameters
+    ----------
+    simulation : Simulation
+        The simulation to write.
+    fpath : str
+        The destination path.
+    codec : str, optional
+        The codec used to encode the state, by default "columnar"
+    compression : str, optional
+        The compression applied to each block: None, "zlib" or "lzma", by
+        default None
+
+    Returns
+    -------
+    str
+        The path the simulation was written to.
+    """
+    block_codec = get_codec(codec, compression=compression)
+    writer = _BlockWriter()
+
+    structure = simulation.structure
+    sites = structure.sites()
+    site_classes = list(dict.fromkeys(site[SITE_CLASS] for site in sites))
+    class_codes = {site_class: code for code, site_class in enumerate(site_classes)}
+    locations = np.array([site[LOCATION] for site in sites], dtype="<f8").reshape(
+        len(sites), structure.dim
+    )
+    classes = np.array([class_codes[site[SITE_CLASS]] for site in sites], dtype="<i4")
+
+    header = {
+        "codec": block_codec.name,
+        "compression": block_codec.compression,
+        "lattice": structure.lattice.as_dict(),
+        "site_classes": site_classes,
+        "num_sites": len(sites),
+        "locations": writer.add(block_codec.compress(locations.tobytes())),
+        "classes": writer.add(block_codec.compress(classes.tobytes())),
+        "state": writer.add(block_codec.encode_state(simulation.state.get_state())),
+    }
+    writer.write(fpath, SIMULATION_FILE_MAGIC, header)
+    return fpath
+
+
+class SimulationFileReader(_FileReader):
+    """Reads binary simulation files written by write_simulation_file."""
+
+    kind = "simulation"
+
+    def __init__(self, fpath: str):
+        """Opens the simulation file at fpath and reads its header.
+
+        Parameters
+        ----------
+        fpath : str
+            The path of the simulation file.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a binary simulation file.
+        """
+        super().__init__(fpath, SIMULATION_FILE_MAGIC)
+
+    def _read_array(self, key: str, dtype: str) -> np.ndarray:
+        data = self.codec.decompress(self.read_block(*self.header[key]))
+        return np.frombuffer(data, dtype=dtype)
+
+    def read_structure(self) -> PeriodicStructure:
+        """Rebuilds the PeriodicStructure stored in the file.
+
+        Returns
+        -------
+        PeriodicStructure
+            The structure.
+        """
+        lattice = Lattice.from_dict(self.header["lattice"])
+        structure = PeriodicStructure(lattice)
+        locations = self._read_array("locations", "<f8").reshape(-1, lattice.dim)
+        classes = self._read_array("classes", "<i4")
+        site_classes = self.header["site_classes"]
+        for site_class, location in zip(classes.tolist(), locations):
+            structure.add_site(site_classes[site_class], location)
+        return structure
+
+    def read_state(self) -> SimulationState:
+        """Decodes the SimulationState stored in the file.
+
+        Returns
+        -------
+        SimulationState
+            The state.
+        """
+        return SimulationState(
+            self.codec.decode_state(self.read_block(*self.header["state"]))
+        )
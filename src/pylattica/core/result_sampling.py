@@ -0,0 +1,366 @@
+from collections import Counter
+from typing import Dict
+
+import numpy as np
+
+from .constants import GENERAL, SITE_ID, SITES
+from .simulation_state import SimulationState, _site_updates
+
+_MISSING = object()
+
+
+class FrameChanges:
+    """Tracks how the state of a result has changed since the last frame kept
+    by a downsampler. Each diff is folded in as it is streamed, so the work is
+    proportional to the size of the diffs rather than the size of the lattice.
+
+    Sampling strategies receive an instance of this class to decide whether to
+    keep the current step.
+    """
+
+    def __init__(self, state: SimulationState):
+        """Instantiates the tracker.
+
+        Parameters
+        ----------
+        state : SimulationState
+            The state at the first kept frame. The tracker takes ownership of
+            it and updates it in place.
+        """
+        self.state = state
+        self._site_baseline: Dict[int, Dict] = {}
+        self._general_baseline: Dict = {}
+        self._differing: Dict[int, set] = {}
+        self._differing_general: set = set()
+        self._key_counts = Counter()
+
+    @property
+    def num_sites(self) -> int:
+        """The number of sites in the current state."""
+        return self.state.size
+
+    def num_changed(self, key: str = None) -> int:
+        """Returns the number of sites whose state differs from the last kept frame.
+
+        Parameters
+        ----------
+        key : str, optional
+            If provided, only differences in this state key are counted.
+
+        Returns
+        -------
+        int
+            The number of changed sites.
+        """
+        if key is None:
+            return len(self._differing)
+        return self._key_counts[key]
+
+    def changed_fraction(self, key: str = None) -> float:
+        """Returns the fraction of sites whose state differs from the last kept frame.
+
+        Parameters
+        ----------
+        key : str, optional
+            If provided, only differences in this state key are counted.
+
+        Returns
+        -------
+        float
+            The fraction of changed sites.
+        """
+        if self.num_sites == 0:
+            return 0.0
+        return self.num_changed(key) / self.num_sites
+
+    def apply(self, diff: Dict) -> None:
+        """Applies the next diff of the streamed result.
+
+        Parameters
+        ----------
+        diff : Dict
+            The diff to apply.
+        """
+        site_updates = _site_updates(diff)
+        for site_id, updates in site_updates.items():
+            site_state = self.state.get_site_state(site_id) or {}
+            baseline = self._site_baseline.setdefault(site_id, {})
+            for key in updates:
+                if key not in baseline:
+                    baseline[key] = site_state.get(key, _MISSING)
+
+        if GENERAL in diff:
+            general = self.state.get_general_state()
+            for key in diff[GENERAL]:
+                if key not in self._general_baseline:
+                    self._general_baseline[key] = general.get(key, _MISSING)
+
+        self.state.batch_update(diff)
+
+        for site_id, updates in site_updates.items():
+            baseline = self._site_baseline[site_id]
+            differing = self._differing.setdefault(site_id, set())
+            for key, value in updates.items():
+                if value != baseline[key]:
+                    if key not in differing:
+                        differing.add(key)
+                        self._key_counts[key] += 1
+                elif key in differing:
+                    differing.remove(key)
+                    self._key_counts[key] -= 1
+            if not differing:
+                del self._differing[site_id]
+
+        if GENERAL in diff:
+            for key, value in diff[GENERAL].items():
+                if value != self._general_baseline[key]:
+                    self._differing_general.add(key)
+                else:
+                    self._differing_general.discard(key)
+
+    def emit(self) -> Dict:
+        """Returns the minimal diff that takes the last kept frame to the
+        current state, and makes the current state the new last kept frame.
+
+        Returns
+        -------
+        Dict
+            The diff, in the flat form unless the general state changed.
+        """
+        sites = {}
+        for site_id, keys in self._differing.items():
+            site_state = self.state.get_site_state(site_id)
+            sites[site_id] = {key: site_state[key] for key in keys}
+
+        general = self.state.get_general_state()
+        general_updates = {key: general[key] for key in self._differing_general}
+
+        self._site_baseline.clear()
+        self._general_baseline.clear()
+        self._differing.clear()
+        self._differing_general.clear()
+        self._key_counts.clear()
+
+        if general_updates:
+            return {SITES: sites, GENERAL: general_updates}
+        return sites
+
+
+class SamplingStrategy:
+    """Decides which steps of a result a downsampler keeps. Strategies see
+    the steps in order and must decide on each one as it is streamed.
+    """
+
+    def start(self, first_step: int, last_step: int) -> None:
+        """Called before streaming with the range of steps in the result.
+        The first step is always kept.
+
+        Parameters
+        ----------
+        first_step : int
+            The earliest available step of the result.
+        last_step : int
+            The last step of the result.
+        """
+
+    def keep(self, step_no: int, changes: FrameChanges) -> bool:
+        """Returns whether the step should be kept.
+
+        Parameters
+        ----------
+        step_no : int
+            The current step.
+        changes : FrameChanges
+            The changes since the last kept frame, with the current step applied.
+
+        Returns
+        -------
+        bool
+            True if the step should be kept.
+        """
+        raise NotImplementedError
+
+
+class UniformSampling(SamplingStrategy):
+    """Keeps steps at a fixed spacing. If the result only stores some steps
+    (as with live_compress), the first stored step at or past each target is kept.
+    """
+
+    def __init__(self, interval: float = None, num_steps: int = None):
+        """Instantiates the strategy. Exactly one of interval and num_steps
+        must be provided.
+
+        Parameters
+        ----------
+        interval : float, optional
+            The spacing between kept steps.
+        num_steps : int, optional
+            The number of steps to keep after the first one. The spacing is
+            chosen to spread them evenly across the result.
+        """
+        if (interval is None) == (num_steps is None):
+            raise ValueError("Exactly one of interval and num_steps must be provided.")
+        self.interval = interval
+        self.num_steps = num_steps
+        self._interval = None
+        self._next = None
+
+    def start(self, first_step: int, last_step: int) -> None:
+        if self.interval is not None:
+            self._interval = self.interval
+        else:
+            self._interval = max(last_step - first_step, 1) / self.num_steps
+        self._next = first_step + self._interval
+
+    def keep(self, step_no: int, changes: FrameChanges) -> bool:
+        if step_no < self._next:
+            return False
+        while self._next <= step_no:
+            self._next += self._interval
+        return True
+
+
+class LogarithmicSampling(SamplingStrategy):
+    """Keeps steps spaced evenly in the logarithm of the time since the first
+    step, which resolves early transients while keeping few late frames. Steps
+    whose targets round to the same step are merged, so at most num_steps
+    steps are kept after the first one.
+    """
+
+    def __init__(self, num_steps: int):
+        """Instantiates the strategy.
+
+        Parameters
+        ----------
+        num_steps : int
+            The maximum number of steps to keep after the first one.
+        """
+        self.num_steps = num_steps
+        self._targets = []
+        self._target_idx = 0
+
+    def start(self, first_step: int, last_step: int) -> None:
+        span = last_step - first_step
+        if span < 1:
+            self._targets = []
+        else:
+            offsets = np.ceil(np.geomspace(1, span, self.num_steps)).astype(int)
+            self._targets = list(np.unique(offsets) + first_step)
+        self._target_idx = 0
+
+    def keep(self, step_no: int, changes: FrameChanges) -> bool:
+        if self._target_idx >= len(self._targets):
+            return False
+        if step_no < self._targets[self._target_idx]:
+            return False
+        while (
+            self._target_idx < len(self._targets)
+            and self._targets[self._target_idx] <= step_no
+        ):
+            self._target_idx += 1
+        return True
+
+
+class ChangeThresholdSampling(SamplingStrategy):
+    """Keeps a step once enough of the lattice has changed since the last kept
+    frame, so quiet stretches of a run produce few frames and busy stretches
+    produce many.
+    """
+
+    def __init__(self, threshold: float, key: str = None, max_interval: int = None):
+        """Instantiates the strategy.
+
+        Parameters
+        ----------
+        threshold : float
+            The fraction of sites (between 0 and 1) that must differ from the
+            last kept frame for a step to be kept.
+        key : str, optional
+            If provided, only changes in this state key are counted.
+        max_interval : int, optional
+            If provided, a step is also kept whenever this many steps have
+            passed since the last kept frame.
+        """
+        self.threshold = threshold
+        self.key = key
+        self.max_interval = max_interval
+        self._last_kept = None
+
+    def start(self, first_step: int, last_step: int) -> None:
+        self._last_kept = first_step
+
+    def keep(self, step_no: int, changes: FrameChanges) -> bool:
+        if changes.num_changed(self.key) > 0 and (
+            changes.changed_fraction(self.key) >= self.threshold
+        ):
+            self._last_kept = step_no
+            return True
+        if (
+            self.max_interval is not None
+            and step_no - self._last_kept >= self.max_interval
+        ):
+            self._last_kept = step_no
+            return True
+        return False
+
+
+def _frame_diff(prev: SimulationState, curr: SimulationState) -> Dict:
+    prev_sites = prev.get_state()[SITES]
+    sites = {}
+    for site_id, site_state in curr.get_state()[SITES].items():
+        prev_site = prev_sites.get(site_id, {})
+        updates = {
+            key: value
+            for key, value in site_state.items()
+            if key != SITE_ID and prev_site.get(key, _MISSING) != value
+        }
+        if updates:
+            sites[site_id] = updates
+
+    prev_general = prev.get_general_state()
+    general = {
+        key: value
+        for key, value in curr.get_general_state().items()
+        if prev_general.get(key, _MISSING) != value
+    }
+    if general:
+        return {SITES: sites, GENERAL: general}
+    return sites
+
+
+def downsample_result(
+    result: "SimulationResult",
+    strategy: SamplingStrategy,
+    include_last: bool = True,
+    return_steps: bool = False,
+):
+    """Builds a smaller result that keeps only the steps chosen by strategy.
+
+    The input is streamed once, diff by diff (or frame by frame for
+    live_compress results), so this works the same for in-memory results and
+    results opened lazily from disk, and no step other than the first is ever
+    materialized. Each kept step is stored as the minimal diff from the
+    previous kept step: sites and keys that changed and then changed back are
+    left out.
+
+    Parameters
+    ----------
+    result : SimulationResult
+        The result to downsample.
+    strategy : SamplingStrategy
+        Decides which steps are kept, e.g. UniformSampling,
+        LogarithmicSampling or ChangeThresholdSampling.
+    include_last : bool, optional
+        Whether the last step of the result is always kept, by default True.
+    return_steps : bool, optional
+        If True, also return the step numbers of the input result that were
+        kept, by default False.
+
+    Returns
+    -------
+    SimulationResult or Tuple[SimulationResult, List[int]]
+        The downsampled result, and the kept step numbers if return_steps is True.
+    """
+    return result.downsample(
+        strategy, include_last=include_last, return_steps=return_steps
+    )
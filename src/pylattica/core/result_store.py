@@ -0,0 +1,454 @@
+import bisect
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Tuple
+
+from .result_codecs import get_codec
+from .simulation_result import SimulationResult
+from .simulation_state import SimulationState
+
+RUN_DOC_TYPE = "run"
+CHUNK_DOC_TYPE = "chunk"
+DEFAULT_CHUNK_SIZE = 1000
+
+# States and diffs are stored as JSON text so that documents only contain
+# string keys and can be held by any maggma Store (MongoDB, mongomock, JSON)
+_CODEC = get_codec("json", compression=None)
+
+
+def _encode_state(state: SimulationState) -> str:
+    return _CODEC.encode_state(state.get_state()).decode("utf-8")
+
+
+def _decode_state(data: str) -> SimulationState:
+    return SimulationState(_CODEC.decode_state(data.encode("utf-8")))
+
+
+def _doc_id(run_id: str, doc_type: str, start_step: int = None) -> str:
+    if start_step is None:
+        return f"{run_id}/{doc_type}"
+    return f"{run_id}/{doc_type}/{start_step}"
+
+
+def _controller_name(controller) -> str:
+    if controller is None:
+        return None
+    return f"{type(controller).__module__}.{type(controller).__name__}"
+
+
+class StoreSimulationResult(SimulationResult):
+    """A SimulationResult whose history is kept in a maggma Store rather than
+    in memory. Diffs are written during the run as chunk documents of
+    chunk_size consecutive diffs, each holding the state at its first step,
+    so only the current chunk is ever held in memory. A single run document
+    holds the metadata of the run (controller, parameters, number of steps,
+    summary observables) and the initial and final states.
+
+    Documents of every run live side by side in one Store and are told apart
+    by run_id. Each document is also given a unique identifier in the key
+    field of the store (e.g. "task_id"). A campaign of runs can be queried by
+    metadata with find_runs, and any step of any run can be loaded by reading
+    only the chunk that contains it.
+
+    New runs are started with create and existing runs are loaded with open.
+    The store must be connected before either is called.
+    """
+
+    @classmethod
+    def create(  # pylint: disable=too-many-positional-arguments
+        cls,
+        store,
+        run_id: str,
+        initial_state: SimulationState,
+        controller=None,
+        parameters: Dict = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Starts a new run in store. The result is passed to Runner.run with
+        the result keyword, and finalize is called once the run is over:
+
+            result = StoreSimulationResult.create(store, "run-1", state, controller)
+            runner.run(None, controller, 1000, result=result)
+            result.finalize(summary={"fraction_B": 0.5})
+
+        Parameters
+        ----------
+        store : maggma.core.Store
+            The connected store in which the run is written.
+        run_id : str
+            The unique identifier of the run.
+        initial_state : SimulationState
+            The state with which the simulation starts.
+        controller : BasicController, optional
+            The controller of the run. Its class is recorded in the run document.
+        parameters : Dict, optional
+            Parameters of the run recorded in the run document, which can be
+            used to query runs. They must be JSON serializable with string keys.
+        chunk_size : int, optional
+            The number of diffs in each chunk document, by default 1000.
+
+        Returns
+        -------
+        StoreSimulationResult
+            The new result.
+
+        Raises
+        ------
+        ValueError
+            If the store already contains a run with this run_id.
+        """
+        if store.count({"run_id": run_id, "doc_type": RUN_DOC_TYPE}) > 0:
+            raise ValueError(f"The store already contains a run with ID {run_id}.")
+
+        for field in ("run_id", "doc_type", "start_step", "controller"):
+            store.ensure_index(field)
+
+        result = cls(store, run_id, initial_state.copy(), chunk_size=chunk_size)
+        store.update(
+            {
+                store.key: _doc_id(run_id, RUN_DOC_TYPE),
+                "run_id": run_id,
+                "doc_type": RUN_DOC_TYPE,
+                "controller": _controller_name(controller),
+                "parameters": parameters or {},
+                "chunk_size": chunk_size,
+                "status": "running",
+                "summary": {},
+                "total_steps": 0,
+                "num_chunks": 0,
+                "initial_state": _encode_state(initial_state),
+                "final_state": _encode_state(initial_state),
+            },
+            key=store.key,
+        )
+        return result
+
+    @classmethod
+    def open(cls, store, run_id: str):
+        """Opens a run previously written to store. Only the run document and
+        the step ranges of the chunks are read.
+
+        Parameters
+        ----------
+        store : maggma.core.Store
+            The connected store containing the run.
+        run_id : str
+            The identifier of the run.
+
+        Returns
+        -------
+        StoreSimulationResult
+            The result, which loads chunks on demand.
+
+        Raises
+        ------
+        ValueError
+            If the store contains no run with this run_id.
+        """
+        run_doc = store.query_one({"run_id": run_id, "doc_type": RUN_DOC_TYPE})
+        if run_doc is None:
+            raise ValueError(f"The store contains no run with ID {run_id}.")
+
+        result = cls(
+            store,
+            run_id,
+            _decode_state(run_doc["initial_state"]),
+            chunk_size=run_doc["chunk_size"],
+        )
+        result._chunk_starts = [
+            doc["start_step"]
+            for doc in store.query(
+                {"run_id": run_id, "doc_type": CHUNK_DOC_TYPE},
+                properties=["start_step"],
+                sort={"start_step": 1},
+            )
+        ]
+        result._total_steps = run_doc["total_steps"]
+        result._live_state = _decode_state(run_doc["final_state"])
+        result._pending_start = result._total_steps
+        result._pending_keyframe = result._live_state.copy()
+        return result
+
+    def __init__(
+        self,
+        store,
+        run_id: str,
+        starting_state: SimulationState,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cache_size: int = 2,
+    ):
+        """Instantiates the result. Use create or open instead, which also
+        write or read the documents of the run.
+
+        Parameters
+        ----------
+        store : maggma.core.Store
+            The connected store containing the run.
+        run_id : str
+            The identifier of the run.
+        starting_state : SimulationState
+            The state with which the simulation started.
+        chunk_size : int, optional
+            The number of diffs in each chunk document, by default 1000.
+        cache_size : int, optional
+            The number of decoded chunks kept in memory, by default 2.
+        """
+        super().__init__(starting_state)
+        self.store = store
+        self.run_id = run_id
+        self.chunk_size = chunk_size
+        self._chunk_starts: List[int] = []
+        self._chunk_cache = OrderedDict()
+        self._cache_size = cache_size
+
+        # The diffs since the last chunk was written, and the state they start from
+        self._pending: List[Dict] = []
+        self._pending_start = 0
+        self._pending_keyframe = starting_state.copy()
+
+    def add_step(self, updates: Dict[int, Dict]) -> None:
+        self._live_state.batch_update(updates)
+        self._total_steps += 1
+        self._pending.append(updates)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the diffs added since the last chunk as a new chunk document
+        and updates the run document. This is called automatically every
+        chunk_size steps.
+        """
+        if self._pending:
+            self.store.update(
+                {
+                    self.store.key: _doc_id(
+                        self.run_id, CHUNK_DOC_TYPE, self._pending_start
+                    ),
+                    "run_id": self.run_id,
+                    "doc_type": CHUNK_DOC_TYPE,
+                    "start_step": self._pending_start,
+                    "stop_step": self._total_steps,
+                    "keyframe": _encode_state(self._pending_keyframe),
+                    "diffs": _CODEC.encode_diffs(self._pending).decode("utf-8"),
+                },
+                key=self.store.key,
+            )
+            self._chunk_starts.append(self._pending_start)
+            self._pending = []
+            self._pending_start = self._total_steps
+            self._pending_keyframe = self._live_state.copy()
+
+        self._update_run_doc({})
+
+    def finalize(self, summary: Dict = None) -> None:
+        """Writes any remaining diffs and marks the run as completed.
+
+        Parameters
+        ----------
+        summary : Dict, optional
+            Summary observables of the run (e.g. final phase fractions) stored
+            in the run document, where they can be used to query runs. They
+            must be JSON serializable with string keys.
+        """
+        self.flush()
+        fields = {"status": "completed"}
+        if summary is not None:
+            fields["summary"] = summary
+        self._update_run_doc(fields)
+
+    def _update_run_doc(self, fields: Dict) -> None:
+        run_doc = self.store.query_one(
+            {"run_id": self.run_id, "doc_type": RUN_DOC_TYPE}
+        )
+        run_doc.pop("_id", None)
+        run_doc.update(
+            total_steps=self._pending_start,
+            num_chunks=len(self._chunk_starts),
+            final_state=_encode_state(self._pending_keyframe),
+            **fields,
+        )
+        self.store.update(run_doc, key=self.store.key)
+
+    def _load_chunk(self, chunk_idx: int) -> Tuple[SimulationState, List[Dict]]:
+        start_step = self._chunk_starts[chunk_idx]
+        if start_step in self._chunk_cache:
+            self._chunk_cache.move_to_end(start_step)
+            return self._chunk_cache[start_step]
+
+        doc = self.store.query_one(
+            {
+                "run_id": self.run_id,
+                "doc_type": CHUNK_DOC_TYPE,
+                "start_step": start_step,
+            }
+        )
+        chunk = (
+            _decode_state(doc["keyframe"]),
+            _CODEC.decode_diffs(doc["diffs"].encode("utf-8")),
+        )
+        self._chunk_cache[start_step] = chunk
+        if len(self._chunk_cache) > self._cache_size:
+            self._chunk_cache.popitem(last=False)
+        return chunk
+
+    def _segment_starts(self) -> List[int]:
+        starts = list(self._chunk_starts)
+        if not starts or starts[-1] != self._pending_start:
+            starts.append(self._pending_start)
+        return starts
+
+    def _replay_start(self, step_no: int) -> Tuple[int, SimulationState]:
+        if step_no >= self._pending_start:
+            return self._pending_start, self._pending_keyframe
+        chunk_idx = bisect.bisect_right(self._chunk_starts, step_no) - 1
+        return self._chunk_starts[chunk_idx], self._load_chunk(chunk_idx)[0]
+
+    def _iter_diff_range(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        self._check_diff_range(start_step, stop_step)
+        return self._iter_chunks(start_step, stop_step)
+
+    def _iter_chunks(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        step_no = start_step
+        while step_no < min(stop_step, self._pending_start):
+            chunk_idx = bisect.bisect_right(self._chunk_starts, step_no) - 1
+            chunk_start = self._chunk_starts[chunk_idx]
+            diffs = self._load_chunk(chunk_idx)[1]
+            chunk_stop = min(stop_step, chunk_start + len(diffs))
+            yield from diffs[step_no - chunk_start : chunk_stop - chunk_start]
+            step_no = chunk_stop
+
+        yield from self._pending[
+            max(start_step - self._pending_start, 0) : max(
+                stop_step - self._pending_start, 0
+            )
+        ]
+
+    def get_diff_range(self, start_step: int, stop_step: int) -> List[Dict]:
+        """Returns the diffs that take the result from start_step to stop_step,
+        reading only the chunks that contain them.
+
+        Parameters
+        ----------
+        start_step : int
+            The step at which the first returned diff applies.
+        stop_step : int
+            The step reached after applying the last returned diff.
+
+        Returns
+        -------
+        List[Dict]
+            The diffs, in order.
+        """
+        return list(self._iter_diff_range(start_step, stop_step))
+
+    def get_diffs(self) -> List[Dict]:
+        """Returns every diff in the result. This reads every chunk; prefer
+        get_diff_range or get_step for partial access.
+
+        Returns
+        -------
+        List[Dict]
+            The list of state diffs.
+        """
+        return self.get_diff_range(0, self._total_steps)
+
+    def as_dict(self):
+        # The full history is materialized, so the result is rehydrated as an
+        # in-memory SimulationResult rather than another store-backed one.
+        d = super().as_dict()
+        d["diffs"] = self.get_diffs()
+        d["@module"] = SimulationResult.__module__
+        d["@class"] = SimulationResult.__name__
+        return d
+
+
+def write_result_to_store(  # pylint: disable=too-many-positional-arguments
+    result: SimulationResult,
+    store,
+    run_id: str,
+    controller=None,
+    parameters: Dict = None,
+    summary: Dict = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> StoreSimulationResult:
+    """Writes an existing result to store as a completed run. Results created
+    with live_compress=True are written from their stored frames, so each
+    frame becomes one step.
+
+    Parameters
+    ----------
+    result : SimulationResult
+        The result to write.
+    store : maggma.core.Store
+        The connected store in which the run is written.
+    run_id : str
+        The unique identifier of the run.
+    controller : BasicController, optional
+        The controller that produced the result.
+    parameters : Dict, optional
+        Parameters of the run recorded in the run document.
+    summary : Dict, optional
+        Summary observables recorded in the run document.
+    chunk_size : int, optional
+        The number of diffs in each chunk document, by default 1000.
+
+    Returns
+    -------
+    StoreSimulationResult
+        The stored result.
+    """
+    # pylint: disable=protected-access
+    if result._frames:
+        from .result_sampling import _frame_diff
+
+        steps = sorted(result._frames.keys())
+        stored = StoreSimulationResult.create(
+            store,
+            run_id,
+            result._frames[steps[0]],
+            controller=controller,
+            parameters=parameters,
+            chunk_size=chunk_size,
+        )
+        for prev, curr in zip(steps, steps[1:]):
+            stored.add_step(_frame_diff(result._frames[prev], result._frames[curr]))
+    else:
+        first_step = result.earliest_available_step
+        stored = StoreSimulationResult.create(
+            store,
+            run_id,
+            result.get_step(first_step),
+            controller=controller,
+            parameters=parameters,
+            chunk_size=chunk_size,
+        )
+        for diff in result._iter_diff_range(first_step, len(result) - 1):
+            stored.add_step(diff)
+
+    stored.finalize(summary=summary)
+    return stored
+
+
+def find_runs(store, criteria: Dict = None, properties=None) -> List[Dict]:
+    """Returns the run documents in store that match criteria, without
+    reading any chunk documents.
+
+    Parameters
+    ----------
+    store : maggma.core.Store
+        The connected store to query.
+    criteria : Dict, optional
+        A MongoDB-style query on the fields of the run documents, e.g.
+        {"parameters.temperature": {"$gt": 500}, "status": "completed"}.
+    properties : List[str], optional
+        The fields of the run documents to return. By default every field
+        except the encoded initial and final states is returned.
+
+    Returns
+    -------
+    List[Dict]
+        The matching run documents.
+    """
+    query = {"doc_type": RUN_DOC_TYPE, **(criteria or {})}
+    if properties is None:
+        properties = {"_id": 0, "initial_state": 0, "final_state": 0}
+    return list(store.query(query, properties=properties))
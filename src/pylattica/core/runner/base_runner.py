@@ -32,12 +32,13 @@ class Runner:
         that this mode should be used with the is_async initialization parameter.
     """
 
-    def run(
+    def run(  # pylint: disable=too-many-positional-arguments
         self,
         initial_state: SimulationState,
         controller: BasicController,
         num_steps: int,
         verbose=False,
+        result: SimulationResult = None,
     ) -> SimulationResult:
         """Run the simulation for the prescribed number of steps. Recall that one
         asynchronous simulation step involves one application of the update rule,
@@ -53,6 +54,11 @@ class Runner:
             The number of steps for which the simulation should run.
         verbose : bool, optional
             If True, debug information is printed during the run, by default False
+        result : SimulationResult, optional
+            If provided, the simulation continues from the last step of this
+            result and the new steps are appended to it in place, instead of a
+            new result being created. initial_state is ignored in that case
+            and may be None.
 
         Returns
         -------
@@ -60,7 +66,10 @@ class Runner:
             The result of the simulation.
         """
 
-        result = controller.instantiate_result(initial_state.copy())
+        if result is None:
+            result = controller.instantiate_result(initial_state.copy())
+        else:
+            initial_state = result.live_state.copy()
         controller.pre_run(initial_state)
 
         self._run(initial_state, result, controller, num_steps, verbose)
@@ -30,9 +30,31 @@ class Simulation:
         res = {"state": self.state.as_dict(), "structure": self.structure.as_dict()}
         return res
 
-    def to_file(self, fname):
-        with open(fname, "w+", encoding="utf-8") as f:
-            json.dump(self.as_dict(), f)
+    def to_file(self, fname, fmt: str = None, **kwargs):
+        """Writes this Simulation to fname.
+
+        Parameters
+        ----------
+        fname : str
+            The destination path.
+        fmt : str, optional
+            Either "json" or "binary". If not provided, the format is "binary"
+            when fname ends with the .pls extension and "json" otherwise. Keyword
+            arguments are passed to pylattica.core.result_file.write_simulation_file
+            for binary files.
+        """
+        from .result_file import SIMULATION_FILE_EXTENSION, write_simulation_file
+
+        if fmt is None:
+            fmt = "binary" if str(fname).endswith(SIMULATION_FILE_EXTENSION) else "json"
+
+        if fmt == "binary":
+            write_simulation_file(self, fname, **kwargs)
+        elif fmt == "json":
+            with open(fname, "w+", encoding="utf-8") as f:
+                json.dump(self.as_dict(), f)
+        else:
+            raise ValueError(f"Unknown simulation file format {fmt}.")
 
     @classmethod
     def from_dict(cls, d):
@@ -42,6 +64,14 @@ class Simulation:
 
     @classmethod
     def from_file(cls, fname):
+        from .result_file import SimulationFileReader, is_simulation_file
+
+        if is_simulation_file(fname):
+            reader = SimulationFileReader(fname)
+            simulation = cls(reader.read_state(), reader.read_structure())
+            reader.close()
+            return simulation
+
         with open(fname, "r+", encoding="utf-8") as f:
             d = json.load(f)
             return cls.from_dict(d)
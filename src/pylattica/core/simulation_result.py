@@ -1,13 +1,33 @@
+import bisect
+import multiprocessing as mp
 import tqdm
+from types import MappingProxyType
 
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Tuple
 
 from monty.serialization import dumpfn, loadfn
 import datetime
-from .simulation_state import SimulationState
-from .constants import GENERAL, SITES
-
-import copy
+import numpy as np
+from .simulation_state import SimulationState, _site_updates
+from .result_codecs import restore_diff_keys
+from .diff_history import CompressedDiffHistory
+from .frame_store import FrameStore
+from .result_sampling import (
+    FrameChanges,
+    SamplingStrategy,
+    UniformSampling,
+    _frame_diff,
+)
+from .result_file import (
+    RESULT_FILE_EXTENSION,
+    ResultFileReader,
+    _LazyDiffs,
+    _LazyFrames,
+    is_result_file,
+    write_result_file,
+)
+
+_mp_globals = {}
 
 
 class SimulationResult:
@@ -26,10 +46,36 @@ class SimulationResult:
         simulation instead of diffs. This avoids the expensive O(n) reconstruction
         in load_steps() at the cost of more memory per frame. When enabled,
         load_steps() becomes a no-op since frames are already stored.
+    keyframe_interval : int, optional
+        If set, a full copy of the state is kept every keyframe_interval steps.
+        Keyframes bound the cost of get_step and split the history into
+        segments that load_steps and map_steps can rebuild in parallel.
+    track_site_history : bool, optional
+        If True, an index of the steps at which each site changed is kept, so
+        that site_trajectory only visits the diffs that touch the requested sites.
+    compress_history : int, optional
+        If set, diffs are packed into compressed binary blocks of this many
+        diffs in memory, leaving only the most recent ones as dictionaries.
     """
 
     @classmethod
     def from_file(cls, fpath):
+        """Loads a result from fpath. Indexed result files (see to_file) are
+        opened lazily, so only their header is read here; JSON files are
+        parsed in full.
+
+        Parameters
+        ----------
+        fpath : str
+            The path of the result file.
+
+        Returns
+        -------
+        SimulationResult
+            The loaded result.
+        """
+        if is_result_file(fpath):
+            return LazySimulationResult.open(fpath)
         return loadfn(fpath)
 
     @classmethod
@@ -38,11 +84,17 @@ class SimulationResult:
         compress_freq = res_dict.get("compress_freq", 1)
         max_history = res_dict.get("max_history", None)
         live_compress = res_dict.get("live_compress", False)
+        keyframe_interval = res_dict.get("keyframe_interval", None)
+        track_site_history = res_dict.get("track_site_history", False)
+        compress_history = res_dict.get("compress_history", None)
         res = cls(
             SimulationState.from_dict(res_dict["initial_state"]),
             compress_freq=compress_freq,
             max_history=max_history,
             live_compress=live_compress,
+            keyframe_interval=keyframe_interval,
+            track_site_history=track_site_history,
+            compress_history=compress_history,
         )
         # Restore checkpoint if present
         if "checkpoint_state" in res_dict and res_dict["checkpoint_state"] is not None:
@@ -57,11 +109,8 @@ class SimulationResult:
                 res._frames[int(step_str)] = SimulationState.from_dict(state_dict)
 
         for diff in diffs:
-            if SITES in diff:
-                diff[SITES] = {int(k): v for k, v in diff[SITES].items()}
-            if GENERAL not in diff and SITES not in diff:
-                diff = {int(k): v for k, v in diff.items()}
-            res._diffs.append(diff)  # Bypass add_step to avoid re-checkpointing
+            # Bypass add_step to avoid re-checkpointing
+            res._diffs.append(restore_diff_keys(diff))
 
         # Restore total_steps from serialized data, or compute from diffs + checkpoint
         res._total_steps = res_dict.get(
@@ -74,11 +123,15 @@ class SimulationResult:
             last_step = max(res._frames.keys())
             res._live_state = res._frames[last_step].copy()
         elif res._diffs:
-            # Replay all diffs to get final state
+            # Replay all diffs to get final state, rebuilding keyframes and the
+            # site history index on the way
             if res._checkpoint_state is not None:
                 res._live_state = res._checkpoint_state.copy()
-            for diff in res._diffs:
+            for ud_idx, diff in enumerate(res._diffs):
+                step_no = res._checkpoint_step + ud_idx + 1
                 res._live_state.batch_update(diff)
+                res._store_keyframe(step_no)
+                res._index_site_changes(step_no, diff)
 
         return res
 
@@ -88,6 +141,10 @@ class SimulationResult:
         compress_freq: int = 1,
         max_history: int = None,
         live_compress: bool = False,
+        *,
+        keyframe_interval: int = None,
+        track_site_history: bool = False,
+        compress_history: int = None,
     ):
         """Initializes a SimulationResult with the specified starting_state.
 
@@ -109,14 +166,47 @@ class SimulationResult:
             during simulation instead of storing diffs. This avoids the O(n)
             reconstruction cost of load_steps() but uses more memory per stored
             frame. Default is False (store diffs, reconstruct post-hoc).
+            Frames are kept in a FrameStore (see pylattica.core.frame_store),
+            so identical frames are stored once and frames that differ little
+            from the previous one are stored as diffs.
+        keyframe_interval : int, optional
+            If set, a copy of the state is kept every keyframe_interval steps
+            alongside the diffs. Steps are then rebuilt from the nearest
+            keyframe rather than from the start of the history, and load_steps
+            can rebuild the segments between keyframes in parallel. Default is
+            None (no keyframes). Ignored when live_compress is True.
+        track_site_history : bool, optional
+            If True, maintain an index from each site ID to the steps at which
+            that site was updated. site_trajectory then reads only the diffs at
+            those steps. Default is False. Ignored when live_compress is True.
+        compress_history : int, optional
+            If set, older diffs are kept in memory as compressed binary blocks
+            of compress_history diffs each, and only the most recent diffs
+            (at most compress_history of them) are kept as dictionaries.
+            Blocks are decompressed on demand by get_step, steps and
+            load_steps. This typically reduces the memory used by the history
+            by an order of magnitude. Recommended: 500-5000. Default is None
+            (keep all diffs as dictionaries).
         """
         self.initial_state = starting_state
         self.compress_freq = compress_freq
         self.max_history = max_history
         self.live_compress = live_compress
-        self._diffs: list[dict] = []
+        self.keyframe_interval = keyframe_interval
+        self.compress_history = compress_history
+        if compress_history:
+            self._diffs = CompressedDiffHistory(block_size=compress_history)
+        else:
+            self._diffs: list[dict] = []
         self._stored_states = {}
-        self._frames: Dict[int, SimulationState] = {}  # For live_compress mode
+        # For live_compress mode
+        self._frames: Dict[int, SimulationState] = {}
+        if live_compress:
+            self._frames = FrameStore()
+        self._keyframes: Dict[int, SimulationState] = {}
+        self.track_site_history = track_site_history
+        # Maps site ID to the ascending list of steps whose diffs update that site
+        self._site_history: Dict[int, List[int]] = {} if track_site_history else None
         # Checkpoint support for bounded history
         self._checkpoint_state: SimulationState = None
         self._checkpoint_step: int = 0
@@ -137,6 +227,8 @@ class SimulationResult:
         list[dict]
             The list of state diffs.
         """
+        if isinstance(self._diffs, CompressedDiffHistory):
+            return list(self._diffs)
         return self._diffs
 
     @property
@@ -171,6 +263,11 @@ class SimulationResult:
         updates : dict
             The changes associated with a new simulation step.
         """
+        # In live_compress mode, the frame store tracks the fingerprint of the
+        # live state from the updates, so it must see them before they are applied
+        if self.live_compress:
+            self._frames.observe(self._live_state, updates)
+
         # Update the live state
         self._live_state.batch_update(updates)
         self._total_steps += 1
@@ -178,16 +275,149 @@ class SimulationResult:
         # In live_compress mode, store frames at intervals instead of diffs
         if self.live_compress:
             if self._total_steps % self.compress_freq == 0:
-                self._frames[self._total_steps] = self._live_state.copy()
+                self._frames.add(self._total_steps, self._live_state)
             return
 
         # Normal mode: store diffs
         self._diffs.append(updates)
+        self._store_keyframe(self._total_steps)
+        self._index_site_changes(self._total_steps, updates)
 
         # Check if we need to create a checkpoint and drop old diffs
         if self.max_history is not None and len(self._diffs) > self.max_history:
             self._create_checkpoint()
 
+    def _store_keyframe(self, step_no: int) -> None:
+        """Keeps a copy of the live state as the keyframe for step_no if
+        step_no falls on the keyframe interval."""
+        if self.keyframe_interval and step_no % self.keyframe_interval == 0:
+            self._keyframes[step_no] = self._live_state.copy()
+
+    def _index_site_changes(self, step_no: int, diff: Dict) -> None:
+        if self._site_history is None:
+            return
+        for site_id in _site_updates(diff):
+            self._site_history.setdefault(site_id, []).append(step_no)
+
+    def _site_index(self) -> Dict[int, List[int]]:
+        """Returns the site history index, building it from the stored diffs
+        if it has not been built yet, or None if the result does not track
+        site history.
+        """
+        if self.track_site_history and self._site_history is None:
+            self._site_history = {}
+            diffs = self._iter_diff_range(self._checkpoint_step, self._total_steps)
+            for ud_idx, diff in enumerate(diffs):
+                self._index_site_changes(self._checkpoint_step + ud_idx + 1, diff)
+        return self._site_history
+
+    def site_history(self, site_id: int) -> List[int]:
+        """Returns the steps at which the diffs of this result updated the
+        specified site, in ascending order. Requires track_site_history.
+
+        Parameters
+        ----------
+        site_id : int
+            The ID of the site.
+
+        Returns
+        -------
+        List[int]
+            The steps at which the site was updated.
+
+        Raises
+        ------
+        ValueError
+            If the result was created without track_site_history.
+        """
+        index = self._site_index()
+        if index is None:
+            raise ValueError(
+                "This result does not track site history. Create it with "
+                "track_site_history=True."
+            )
+        return list(index.get(site_id, []))
+
+    def site_trajectory(self, site_ids, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the values of key at the specified sites over the available
+        history, without reconstructing any full state.
+
+        The trajectory is returned in compact form: the first row holds the
+        values at the earliest available step, and a new row is added only at
+        the steps where one of the values changed. The value at any other step
+        is the one in the latest row at or before it.
+
+        If the result tracks site history, only the diffs that touch the
+        requested sites are read. Otherwise every diff is scanned once. For
+        live_compress results, the stored frames are used instead of diffs.
+
+        Parameters
+        ----------
+        site_ids : int or List[int]
+            The site or sites whose values should be extracted.
+        key : str
+            The state key to extract.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The steps at which the values changed and the values at those
+            steps. The values have one column per site if a list of sites was
+            given, and are one dimensional if a single site was given. Sites
+            without a value for key are reported as None.
+        """
+        single_site = isinstance(site_ids, (int, np.integer))
+        if single_site:
+            site_ids = [site_ids]
+
+        if self._frames:
+            steps = sorted(self._frames.keys())
+            rows = [
+                _site_values(self._frames[step_no], site_ids, key) for step_no in steps
+            ]
+        else:
+            steps, rows = self._trajectory_from_diffs(site_ids, key)
+
+        values = np.array(rows)
+        if single_site:
+            values = values[:, 0]
+        return np.array(steps, dtype=int), values
+
+    def _trajectory_from_diffs(self, site_ids: List[int], key: str):
+        start_step, start_state = self._replay_start(self._checkpoint_step)
+        current = _site_values(start_state, site_ids, key)
+
+        index = self._site_index()
+        if index is not None:
+            change_steps = sorted(
+                set().union(*(index.get(site_id, []) for site_id in site_ids))
+            )
+            events = (
+                (step_no, self._diffs[step_no - self._checkpoint_step - 1])
+                for step_no in change_steps
+            )
+        else:
+            events = enumerate(
+                self._iter_diff_range(start_step, self._total_steps),
+                start=start_step + 1,
+            )
+
+        steps = [start_step]
+        rows = [list(current)]
+        for step_no, diff in events:
+            site_updates = _site_updates(diff)
+            changed = False
+            for col, site_id in enumerate(site_ids):
+                site_update = site_updates.get(site_id)
+                if site_update and key in site_update:
+                    if site_update[key] != current[col]:
+                        current[col] = site_update[key]
+                        changed = True
+            if changed:
+                steps.append(step_no)
+                rows.append(list(current))
+        return steps, rows
+
     def _create_checkpoint(self) -> None:
         """Creates a checkpoint by computing the current state and dropping old diffs.
 
@@ -198,21 +428,31 @@ class SimulationResult:
         # Compute checkpoint at half the current diffs (keeps half the history)
         checkpoint_offset = len(self._diffs) // 2
 
-        # Compute the state at the checkpoint
-        if self._checkpoint_state is not None:
-            state = self._checkpoint_state.copy()
-        else:
-            state = self.initial_state.copy()
-
-        for i in range(checkpoint_offset):
-            state.batch_update(self._diffs[i])
+        # Compute the state at the checkpoint, starting from the nearest keyframe
+        checkpoint_step = self._checkpoint_step + checkpoint_offset
+        start_step, start_state = self._replay_start(checkpoint_step)
+        state = start_state.copy()
+        for diff in self.get_diff_range(start_step, checkpoint_step):
+            state.batch_update(diff)
 
         # Update checkpoint
         self._checkpoint_state = state
-        self._checkpoint_step += checkpoint_offset
+        self._checkpoint_step = checkpoint_step
 
-        # Drop old diffs
-        self._diffs = self._diffs[checkpoint_offset:]
+        # Drop old diffs and the keyframes that preceded them
+        if isinstance(self._diffs, CompressedDiffHistory):
+            del self._diffs[:checkpoint_offset]
+        else:
+            self._diffs = self._diffs[checkpoint_offset:]
+        self._keyframes = {
+            step: kf for step, kf in self._keyframes.items() if step > checkpoint_step
+        }
+        if self._site_history is not None:
+            for site_id in list(self._site_history.keys()):
+                site_steps = self._site_history[site_id]
+                del site_steps[: bisect.bisect_right(site_steps, checkpoint_step)]
+                if not site_steps:
+                    del self._site_history[site_id]
 
         # Clear stored states cache (indices are now invalid)
         self._stored_states.clear()
@@ -226,6 +466,30 @@ class SimulationResult:
         """
         return self._checkpoint_step
 
+    @property
+    def checkpoint_step(self) -> int:
+        """The step of the checkpoint state, or 0 if no checkpoint has been
+        created. The diffs in memory start at this step."""
+        return self._checkpoint_step
+
+    @property
+    def checkpoint_state(self) -> SimulationState:
+        """The state at checkpoint_step, or None if no checkpoint has been
+        created (see max_history)."""
+        return self._checkpoint_state
+
+    @property
+    def total_steps(self) -> int:
+        """The number of steps taken, including those dropped by
+        checkpointing."""
+        return self._total_steps
+
+    @property
+    def frames(self) -> Mapping[int, SimulationState]:
+        """A read-only mapping of step numbers to the stored frames in
+        live_compress mode. It is empty otherwise."""
+        return MappingProxyType(self._frames)
+
     @property
     def original_length(self) -> int:
         return int(len(self) * self.compress_freq)
@@ -234,6 +498,38 @@ class SimulationResult:
         # Total steps = checkpoint step + remaining diffs + 1 (for initial state)
         return self._total_steps + 1
 
+    def __getitem__(self, key):
+        """Returns a step by number, or a view over a range of steps when
+        given a slice. Views share this result's storage; see
+        SimulationResultView.
+        """
+        if isinstance(key, slice):
+            return SimulationResultView(self, range(len(self))[key])
+        return self.get_step(range(len(self))[key])
+
+    def extend(self, runner, controller, num_steps: int, verbose: bool = False):
+        """Continues the simulation from the last step of this result,
+        appending the new steps to this result in place.
+
+        Parameters
+        ----------
+        runner : Runner
+            The runner used to continue the simulation.
+        controller : BasicController
+            The controller implementing the update rule for the new steps. It
+            can differ from the one used for the earlier steps.
+        num_steps : int
+            The number of steps to add.
+        verbose : bool, optional
+            If True, debug information is printed during the run, by default False
+
+        Returns
+        -------
+        SimulationResult
+            This result.
+        """
+        return runner.run(None, controller, num_steps, verbose=verbose, result=self)
+
     def steps(self) -> List[SimulationState]:
         """Yields all available steps from this simulation.
 
@@ -259,7 +555,7 @@ class SimulationResult:
             live_state = self.initial_state.copy()
 
         yield live_state.copy()  # Yield a copy to avoid mutation issues
-        for diff in self._diffs:
+        for diff in self._iter_diff_range(self._checkpoint_step, self._total_steps):
             live_state.batch_update(diff)
             yield live_state.copy()
 
@@ -283,17 +579,27 @@ class SimulationResult:
         """The final output state of the simulation (alias for live_state)."""
         return self._live_state
 
-    def load_steps(self, interval=1):
+    def load_steps(self, interval=1, parallel: bool = False, workers: int = None):
         """Pre-loads steps into memory at the specified interval for faster access.
 
         When live_compress is enabled, this is a no-op since frames are already
         stored during simulation. If a different interval is requested than what
         was used during simulation (compress_freq), an error is raised.
 
+        If the result has keyframes (see keyframe_interval) or was opened from
+        an indexed result file, the segments between keyframes are independent
+        and can be rebuilt in parallel by passing parallel=True. Parallel
+        reconstruction relies on fork and is not available on Windows.
+
         Parameters
         ----------
         interval : int, optional
             Store every Nth step in memory, by default 1.
+        parallel : bool, optional
+            Whether to rebuild segments in worker processes, by default False.
+        workers : int, optional
+            The number of worker processes to use. If left unspecified, one
+            worker for each CPU will be created.
 
         Raises
         ------
@@ -312,25 +618,187 @@ class SimulationResult:
 
         # Clear old cache first
         self._stored_states.clear()
+        self._stored_states.update(
+            self._replay_steps(
+                SimulationState.copy,
+                interval,
+                parallel,
+                workers,
+                desc="Constructing result from diffs",
+            )
+        )
 
-        # Start from checkpoint or initial state
-        if self._checkpoint_state is not None:
-            live_state = self._checkpoint_state.copy()
-            start_step = self._checkpoint_step
-        else:
-            live_state = self.initial_state.copy()
-            start_step = 0
+    def map_steps(  # pylint: disable=too-many-positional-arguments
+        self,
+        func: Callable[[SimulationState], Any],
+        interval: int = 1,
+        parallel: bool = False,
+        workers: int = None,
+    ) -> Dict[int, Any]:
+        """Applies func to the earliest available step and to every step that
+        is a multiple of interval, without keeping the steps in memory. This is
+        the entry point for analyses that need to visit the whole result: with
+        parallel=True, each worker rebuilds the segment following one keyframe
+        and only the return values of func are sent back.
+
+        func receives the reconstructed state, which is updated in place as
+        the replay continues, so func must neither modify it nor return
+        objects that refer to it.
 
-        self._stored_states[start_step] = live_state.copy()
+        Parameters
+        ----------
+        func : Callable[[SimulationState], Any]
+            The function to apply to each step.
+        interval : int, optional
+            Apply func to every Nth step, by default 1.
+        parallel : bool, optional
+            Whether to rebuild segments in worker processes, by default False.
+        workers : int, optional
+            The number of worker processes to use. If left unspecified, one
+            worker for each CPU will be created.
 
-        for ud_idx in tqdm.tqdm(
-            range(0, len(self._diffs)), desc="Constructing result from diffs"
-        ):
+        Returns
+        -------
+        Dict[int, Any]
+            The value of func at each visited step, keyed and ordered by step.
+        """
+        if self._frames:
+            return {
+                step_no: func(self._frames[step_no])
+                for step_no in sorted(self._frames.keys())
+                if step_no % interval == 0
+            }
+
+        return self._replay_steps(
+            func, interval, parallel, workers, desc="Analyzing steps"
+        )
+
+    def _segment_starts(self) -> List[int]:
+        """Returns, in ascending order, the steps of the stored states from
+        which the available history can be replayed independently.
+        """
+        starts = [self._checkpoint_step]
+        starts.extend(step for step in self._keyframes if step > self._checkpoint_step)
+        return starts
+
+    def _replay_segment(  # pylint: disable=too-many-positional-arguments
+        self,
+        start_step: int,
+        stop_step: int,
+        interval: int,
+        func: Callable[[SimulationState], Any],
+        desc: str = None,
+    ) -> List[Tuple[int, Any]]:
+        """Rebuilds the steps from start_step up to, but excluding, stop_step
+        starting from the stored state at start_step. Returns (step, func(state))
+        for the earliest available step and every step that is a multiple of
+        interval.
+        """
+        _, start_state = self._replay_start(start_step)
+        state = start_state.copy()
+
+        values = []
+        if start_step % interval == 0 or start_step == self._checkpoint_step:
+            values.append((start_step, func(state)))
+
+        diffs = self._iter_diff_range(start_step, stop_step - 1)
+        if desc is not None:
+            diffs = tqdm.tqdm(diffs, total=stop_step - start_step - 1, desc=desc)
+
+        for ud_idx, diff in enumerate(diffs):
             step_no = start_step + ud_idx + 1
-            live_state.batch_update(self._diffs[ud_idx])
-            if step_no % interval == 0 and self._stored_states.get(step_no) is None:
-                stored_state = live_state.copy()
-                self._stored_states[step_no] = stored_state
+            state.batch_update(diff)
+            if step_no % interval == 0:
+                values.append((step_no, func(state)))
+        return values
+
+    def _replay_steps(  # pylint: disable=too-many-positional-arguments
+        self,
+        func: Callable[[SimulationState], Any],
+        interval: int,
+        parallel: bool,
+        workers: int,
+        desc: str,
+    ) -> Dict[int, Any]:
+        starts = self._segment_starts()
+        stops = starts[1:] + [self._total_steps + 1]
+
+        if not parallel or len(starts) == 1:
+            return dict(
+                self._replay_segment(starts[0], stops[-1], interval, func, desc=desc)
+            )
+
+        global _mp_globals  # pylint: disable=global-variable-not-assigned
+        _mp_globals["result"] = self
+        _mp_globals["func"] = func
+
+        if workers is None:
+            PROCESSES = mp.cpu_count()
+        else:
+            PROCESSES = workers
+
+        values = {}
+        tasks = [(start, stop, interval) for start, stop in zip(starts, stops)]
+        try:
+            with mp.get_context("fork").Pool(min(PROCESSES, len(tasks))) as pool:
+                for segment_values in tqdm.tqdm(
+                    pool.imap(_replay_segment_parallel, tasks),
+                    total=len(tasks),
+                    desc=desc,
+                ):
+                    values.update(segment_values)
+        finally:
+            _mp_globals.clear()
+        return values
+
+    def _replay_start(self, step_no: int) -> Tuple[int, SimulationState]:
+        """Returns the latest stored state from which step_no can be
+        reconstructed by replaying diffs, along with its step number. The
+        returned state must not be mutated.
+        """
+        if self._keyframes:
+            keyframe_steps = list(self._keyframes.keys())
+            kf_idx = bisect.bisect_right(keyframe_steps, step_no) - 1
+            if kf_idx >= 0:
+                return keyframe_steps[kf_idx], self._keyframes[keyframe_steps[kf_idx]]
+        if self._checkpoint_state is not None:
+            return self._checkpoint_step, self._checkpoint_state
+        return 0, self.initial_state
+
+    def _check_diff_range(self, start_step: int, stop_step: int) -> None:
+        if start_step < self._checkpoint_step or stop_step > self._total_steps:
+            raise ValueError(
+                f"Cannot retrieve diffs from step {start_step} to {stop_step}. "
+                f"Available steps are {self._checkpoint_step} to {self._total_steps}."
+            )
+
+    def get_diff_range(self, start_step: int, stop_step: int) -> List[Dict]:
+        """Returns the diffs that take the result from start_step to stop_step.
+
+        Parameters
+        ----------
+        start_step : int
+            The step at which the first returned diff applies.
+        stop_step : int
+            The step reached after applying the last returned diff.
+
+        Returns
+        -------
+        List[Dict]
+            The diffs, in order.
+        """
+        self._check_diff_range(start_step, stop_step)
+        return self._diffs[
+            start_step - self._checkpoint_step : stop_step - self._checkpoint_step
+        ]
+
+    def _iter_diff_range(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        if isinstance(self._diffs, CompressedDiffHistory):
+            self._check_diff_range(start_step, stop_step)
+            return self._diffs.iter_range(
+                start_step - self._checkpoint_step, stop_step - self._checkpoint_step
+            )
+        return iter(self.get_diff_range(start_step, stop_step))
 
     def get_step(self, step_no) -> SimulationState:
         """Retrieves the step at the provided number.
@@ -372,28 +840,28 @@ class SimulationResult:
         if stored is not None:
             return stored
 
-        # Start from checkpoint (or initial state if no checkpoint)
-        if self._checkpoint_state is not None:
-            state = self._checkpoint_state.copy()
-            start_idx = 0
-        else:
-            state = self.initial_state.copy()
-            start_idx = 0
+        # The live state always holds the final step
+        if step_no == self._total_steps:
+            return self._live_state.copy()
 
-        # Apply diffs from checkpoint to requested step
-        diffs_to_apply = step_no - self._checkpoint_step
-        for ud_idx in range(start_idx, diffs_to_apply):
-            state.batch_update(self._diffs[ud_idx])
+        # Replay diffs from the nearest stored state to the requested step
+        start_step, start_state = self._replay_start(step_no)
+        state = start_state.copy()
+        for diff in self.get_diff_range(start_step, step_no):
+            state.batch_update(diff)
 
         return state
 
     def as_dict(self):
         result = {
             "initial_state": self.initial_state.as_dict(),
-            "diffs": self._diffs,
+            "diffs": list(self._diffs),
             "compress_freq": self.compress_freq,
             "max_history": self.max_history,
             "live_compress": self.live_compress,
+            "keyframe_interval": self.keyframe_interval,
+            "track_site_history": self.track_site_history,
+            "compress_history": self.compress_history,
             "total_steps": self._total_steps,
             "@module": self.__class__.__module__,
             "@class": self.__class__.__name__,
@@ -416,26 +884,438 @@ class SimulationResult:
 
         return result
 
-    def to_file(self, fpath: str = None) -> None:
+    def _stream_steps(self) -> Tuple[int, int, SimulationState, Iterator]:
+        # Returns the first and last available steps, the state at the first
+        # step and an iterator of (step, diff) pairs for the steps that follow
+        if self._frames:
+            frames = self._frames
+            frame_steps = sorted(frames.keys())
+
+            def frame_events():
+                prev = frames[frame_steps[0]]
+                for step_no in frame_steps[1:]:
+                    curr = frames[step_no]
+                    yield step_no, _frame_diff(prev, curr)
+                    prev = curr
+
+            return (
+                frame_steps[0],
+                frame_steps[-1],
+                frames[frame_steps[0]].copy(),
+                frame_events(),
+            )
+
+        first_step, start_state = self._replay_start(self.earliest_available_step)
+        last_step = self._total_steps
+        diffs = self._iter_diff_range(first_step, last_step)
+        return (
+            first_step,
+            last_step,
+            start_state.copy(),
+            enumerate(diffs, first_step + 1),
+        )
+
+    def downsample(
+        self,
+        strategy: SamplingStrategy,
+        include_last: bool = True,
+        return_steps: bool = False,
+    ):
+        """Returns a smaller result that keeps only the steps chosen by strategy.
+        See pylattica.core.result_sampling.downsample_result.
+
+        Parameters
+        ----------
+        strategy : SamplingStrategy
+            Decides which steps are kept.
+        include_last : bool, optional
+            Whether the last step is always kept, by default True.
+        return_steps : bool, optional
+            If True, also return the step numbers of this result that were
+            kept, by default False.
+
+        Returns
+        -------
+        SimulationResult or Tuple[SimulationResult, List[int]]
+            The downsampled result, and the kept step numbers if return_steps is True.
+        """
+        first_step, last_step, start_state, events = self._stream_steps()
+        strategy.start(first_step, last_step)
+
+        downsampled = SimulationResult(start_state.copy())
+        changes = FrameChanges(start_state)
+        kept_steps: List[int] = [first_step]
+        for step_no, diff in events:
+            changes.apply(diff)
+            keep = strategy.keep(step_no, changes)
+            if keep or (include_last and step_no == last_step):
+                downsampled.add_step(changes.emit())
+                kept_steps.append(step_no)
+
+        # compress_freq records the mean spacing of the kept steps
+        mean_spacing = (kept_steps[-1] - first_step) / max(len(kept_steps) - 1, 1)
+        downsampled.compress_freq = self.compress_freq * max(mean_spacing, 1)
+
+        if return_steps:
+            return downsampled, kept_steps
+        return downsampled
+
+    def to_file(self, fpath: str = None, fmt: str = None, **kwargs) -> None:
         """Serializes this result to the specified filepath.
 
+        Two formats are supported. "json" writes the output of as_dict as a single
+        JSON document. "indexed" writes a file with a header, a keyframe index and
+        the final state up front, which SimulationResult.from_file opens lazily.
+        See pylattica.core.result_file.write_result_file for the layout and for the
+        keyword arguments accepted in that case.
+
         Parameters
         ----------
         fpath : str
             The filepath at which to save the serialized simulation result.
+        fmt : str, optional
+            Either "json" or "indexed". If not provided, the format is "indexed"
+            when fpath ends with the .plr extension and "json" otherwise.
         """
         if fpath is None:
             now = datetime.datetime.now()
             date_string = now.strftime("%m-%d-%Y-%H-%M")
-            fpath = f"{date_string}.json"
+            ext = RESULT_FILE_EXTENSION if fmt == "indexed" else ".json"
+            fpath = f"{date_string}{ext}"
+
+        if fmt is None:
+            fmt = "indexed" if str(fpath).endswith(RESULT_FILE_EXTENSION) else "json"
+
+        if fmt == "indexed":
+            return write_result_file(self, fpath, **kwargs)
+        if fmt != "json":
+            raise ValueError(f"Unknown result file format {fmt}.")
 
         dumpfn(self, fpath)
         return fpath
 
 
+class LazySimulationResult(SimulationResult):
+    """A SimulationResult backed by an indexed result file. Opening one only
+    reads the file header, which includes the final state, so len(result),
+    result.last_step and result.live_state are available immediately.
+    Other steps and ranges of diffs are decoded from disk on demand, starting
+    from the nearest keyframe.
+    """
+
+    @classmethod
+    def open(cls, fpath: str):
+        """Opens the indexed result file at fpath.
+
+        Parameters
+        ----------
+        fpath : str
+            The path of the result file.
+
+        Returns
+        -------
+        LazySimulationResult
+            The lazily loaded result.
+        """
+        return cls(ResultFileReader(fpath))
+
+    def __init__(self, reader: ResultFileReader):
+        """Instantiates the LazySimulationResult from an open ResultFileReader.
+
+        Parameters
+        ----------
+        reader : ResultFileReader
+            The reader for the underlying result file.
+        """
+        header = reader.header
+        super().__init__(
+            reader.read_state("initial_state"),
+            compress_freq=header["compress_freq"],
+            max_history=header["max_history"],
+            live_compress=header["live_compress"],
+            keyframe_interval=header.get("keyframe_interval"),
+            track_site_history=header.get("track_site_history", False),
+            compress_history=header.get("compress_history"),
+        )
+        self._reader = reader
+        self._total_steps = header["total_steps"]
+        self._checkpoint_step = header["checkpoint_step"]
+        self._live_state = reader.read_state("final_state")
+
+        if header["live_compress"]:
+            self._frames = _LazyFrames(reader)
+        else:
+            self._diffs = _LazyDiffs(reader)
+            # The site history index is rebuilt from the file on first use
+            self._site_history = None
+            if header["has_checkpoint"]:
+                self._checkpoint_state = reader.read_keyframe(0)
+
+    def add_step(self, updates: Dict[int, Dict]) -> None:
+        # Frames read from a live_compress file cannot be added to, so they
+        # are loaded into memory the first time the result is extended
+        if isinstance(self._frames, _LazyFrames):
+            frames = FrameStore()
+            for step_no in sorted(self._frames):
+                frames[step_no] = self._frames[step_no]
+            frames.track(self._live_state)
+            self._frames = frames
+        super().add_step(updates)
+
+    def _has_segments(self) -> bool:
+        return isinstance(self._diffs, _LazyDiffs) and bool(self._reader.segments)
+
+    def _segment_starts(self) -> List[int]:
+        starts = super()._segment_starts()
+        if self._has_segments():
+            starts = sorted(set(starts) | set(self._reader.segment_starts))
+        return starts
+
+    def _replay_start(self, step_no: int) -> Tuple[int, SimulationState]:
+        # Keyframes added after loading (when the result is extended) can be
+        # closer to step_no than the last keyframe in the file
+        start_step, start_state = super()._replay_start(step_no)
+        if self._has_segments():
+            seg_idx = self._reader.segment_index(step_no)
+            seg_start = self._reader.segment_starts[seg_idx]
+            if seg_start >= start_step:
+                return seg_start, self._reader.read_keyframe(seg_idx)
+        return start_step, start_state
+
+    def get_diff_range(self, start_step: int, stop_step: int) -> List[Dict]:
+        """Returns the diffs that take the result from start_step to stop_step,
+        decoding only the segments that contain them.
+
+        Parameters
+        ----------
+        start_step : int
+            The step at which the first returned diff applies.
+        stop_step : int
+            The step reached after applying the last returned diff.
+
+        Returns
+        -------
+        List[Dict]
+            The diffs, in order.
+        """
+        if not isinstance(self._diffs, _LazyDiffs):
+            return super().get_diff_range(start_step, stop_step)
+
+        self._check_diff_range(start_step, stop_step)
+        return list(
+            self._diffs.iter_range(
+                start_step - self._checkpoint_step, stop_step - self._checkpoint_step
+            )
+        )
+
+    def _iter_diff_range(self, start_step: int, stop_step: int) -> Iterator[Dict]:
+        if not isinstance(self._diffs, _LazyDiffs):
+            return super()._iter_diff_range(start_step, stop_step)
+
+        self._check_diff_range(start_step, stop_step)
+        return self._diffs.iter_range(
+            start_step - self._checkpoint_step, stop_step - self._checkpoint_step
+        )
+
+    def get_diffs(self) -> List[Dict]:
+        """Returns every diff in the result. This decodes the whole file;
+        prefer get_diff_range or get_step for partial access.
+
+        Returns
+        -------
+        List[Dict]
+            The list of state diffs.
+        """
+        return list(self._diffs)
+
+    def as_dict(self):
+        # The full history is materialized, so the result is rehydrated as an
+        # in-memory SimulationResult rather than another file-backed one.
+        d = super().as_dict()
+        d["@module"] = SimulationResult.__module__
+        d["@class"] = SimulationResult.__name__
+        return d
+
+    def close(self) -> None:
+        """Closes the underlying result file."""
+        self._reader.close()
+
+
+class SimulationResultView:
+    """A read-only window onto a range of steps of a SimulationResult, as
+    returned by result[start:stop:stride]. The view only stores the range of
+    step numbers it covers; states and diffs are read from the parent result
+    when they are requested, so creating a view never copies history.
+
+    A view covers the fixed range of steps it was created with, so steps
+    appended to the parent later (e.g. with SimulationResult.extend) are not
+    part of it.
+    """
+
+    def __init__(self, result: SimulationResult, step_range: range):
+        """Instantiates the view.
+
+        Parameters
+        ----------
+        result : SimulationResult
+            The parent result.
+        step_range : range
+            The step numbers of the parent covered by this view, in order.
+        """
+        self.result = result
+        self.step_range = step_range
+
+    @property
+    def step_numbers(self) -> List[int]:
+        """The step numbers of the parent result covered by this view."""
+        return list(self.step_range)
+
+    def __len__(self) -> int:
+        return len(self.step_range)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return SimulationResultView(self.result, self.step_range[key])
+        return self.get_step(key)
+
+    def __iter__(self) -> Iterator[SimulationState]:
+        return self.steps()
+
+    def get_step(self, idx: int) -> SimulationState:
+        """Returns the idx-th step of this view.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the step within the view.
+
+        Returns
+        -------
+        SimulationState
+            The state at that step.
+        """
+        return self.result.get_step(self.step_range[idx])
+
+    @property
+    def first_step(self) -> SimulationState:
+        return self.get_step(0)
+
+    @property
+    def last_step(self) -> SimulationState:
+        return self.get_step(-1)
+
+    def steps(self) -> Iterator[SimulationState]:
+        """Yields the steps of this view in order. For forward views over
+        diff-based results, the diffs between the first and last steps are
+        replayed once rather than rebuilding each step separately.
+
+        Yields
+        ------
+        SimulationState
+            Each step's state (as a copy to avoid mutation issues).
+        """
+        for _, state in self._replay():
+            yield state.copy()
+
+    def _replay(self) -> Iterator[Tuple[int, SimulationState]]:
+        # Yields (step, state) for each step of the view. The state is updated
+        # in place between yields.
+        # pylint: disable=protected-access
+        if len(self.step_range) == 0:
+            return
+        if self.result._frames or self.step_range.step < 0:
+            for step_no in self.step_range:
+                yield step_no, self.result.get_step(step_no)
+            return
+
+        first, last = self.step_range[0], self.step_range[-1]
+        state = self.result.get_step(first).copy()
+        yield first, state
+
+        stride = self.step_range.step
+        diffs = self.result._iter_diff_range(first, last)
+        for step_no, diff in enumerate(diffs, first + 1):
+            state.batch_update(diff)
+            if (step_no - first) % stride == 0:
+                yield step_no, state
+
+    def get_diffs(self) -> List[Dict]:
+        """Returns the diffs between consecutive steps of this view. For
+        views with a stride of one over diff-based results these are the
+        parent's own diff objects; otherwise the minimal diff between each
+        pair of consecutive steps is computed.
+
+        Returns
+        -------
+        List[Dict]
+            One diff for each step after the first.
+        """
+        # pylint: disable=protected-access
+        if len(self.step_range) < 2:
+            return []
+        first, last = self.step_range[0], self.step_range[-1]
+        if self.step_range.step == 1 and not self.result._frames:
+            return self.result.get_diff_range(first, last)
+
+        diffs = []
+        if self.result._frames or self.step_range.step < 0:
+            prev = None
+            for _, state in self._replay():
+                if prev is not None:
+                    diffs.append(_frame_diff(prev, state))
+                prev = state
+            return diffs
+
+        changes = FrameChanges(self.result.get_step(first).copy())
+        stride = self.step_range.step
+        for step_no, diff in enumerate(
+            self.result._iter_diff_range(first, last), first + 1
+        ):
+            changes.apply(diff)
+            if (step_no - first) % stride == 0:
+                diffs.append(changes.emit())
+        return diffs
+
+    def to_result(self) -> SimulationResult:
+        """Materializes this view as an independent SimulationResult, whose
+        first step is the first step of the view.
+
+        Returns
+        -------
+        SimulationResult
+            The new result.
+        """
+        new_result = SimulationResult(
+            self.first_step.copy(),
+            compress_freq=self.result.compress_freq * abs(self.step_range.step),
+        )
+        for diff in self.get_diffs():
+            new_result.add_step(diff)
+        return new_result
+
+
+def _site_values(state: SimulationState, site_ids: List[int], key: str) -> List:
+    values = []
+    for site_id in site_ids:
+        site_state = state.get_site_state(site_id)
+        values.append(None if site_state is None else site_state.get(key))
+    return values
+
+
+def _replay_segment_parallel(task: Tuple[int, int, int]):
+    start_step, stop_step, interval = task
+    result = _mp_globals["result"]
+    return result._replay_segment(  # pylint: disable=protected-access
+        start_step, stop_step, interval, _mp_globals["func"]
+    )
+
+
 def compress_result(result: SimulationResult, num_steps: int):
     """Compress a simulation result by sampling fewer steps.
 
+    This keeps roughly num_steps evenly spaced steps. For other sampling
+    strategies, see pylattica.core.result_sampling.downsample_result.
+
     Parameters
     ----------
     result : SimulationResult
@@ -448,24 +1328,10 @@ def compress_result(result: SimulationResult, num_steps: int):
     SimulationResult
         A new result with fewer steps.
     """
-    # Use earliest available step as the starting point
-    i_state = result.get_step(result.earliest_available_step)
     available_steps = len(result) - result.earliest_available_step
     if num_steps >= available_steps:
         raise ValueError(
             f"Cannot compress SimulationResult with {available_steps} available steps to {num_steps} steps."
         )
 
-    exact_sample_freq = available_steps / num_steps
-    total_compress_freq = exact_sample_freq * result.compress_freq
-    compressed_result = SimulationResult(i_state, compress_freq=total_compress_freq)
-
-    live_state = SimulationState(copy.deepcopy(i_state.get_state()))
-    next_sample_step = exact_sample_freq
-    for i, diff in enumerate(result.get_diffs()):
-        curr_step = i + 1
-        live_state.batch_update(diff)
-        if curr_step > next_sample_step:
-            compressed_result.add_step(live_state.as_state_update())
-            next_sample_step += exact_sample_freq
-    return compressed_result
+    return result.downsample(UniformSampling(num_steps=num_steps), include_last=False)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import copy
 from typing import Dict, List
 
+import numpy as np
+
 from .constants import SITE_ID, SITES, GENERAL
 from .periodic_structure import PeriodicStructure
 
@@ -102,6 +104,35 @@ class SimulationState:
         """
         return self._state[SITES].get(site_id)
 
+    def site_values(self, key: str, num_sites: int = None, default=None) -> np.ndarray:
+        """Returns the value stored under key for every site as an array
+        indexed by site ID, for use with the bulk operations of neighborhoods
+        (e.g. Neighborhood.neighbor_count).
+
+        Parameters
+        ----------
+        key : str
+            The site state key to read.
+        num_sites : int, optional
+            The length of the array, by default one more than the largest
+            site ID.
+        default : optional
+            The value for sites which have no value under key, by default None.
+
+        Returns
+        -------
+        np.ndarray
+            The values, indexed by site ID.
+        """
+        sites = self._state[SITES]
+        if num_sites is None:
+            num_sites = max(sites.keys(), default=-1) + 1
+        values = [default] * num_sites
+        for site_id, site_state in sites.items():
+            if site_id < num_sites:
+                values[site_id] = site_state.get(key, default)
+        return np.array(values)
+
     def get_general_state(self, key: str = None, default=None) -> Dict:
         """Returns the general state.
 
@@ -195,3 +226,11 @@ class SimulationState:
 
     def __eq__(self, other: SimulationState) -> bool:
         return self._state == other._state
+
+
+def _site_updates(diff: Dict) -> Dict[int, Dict]:
+    # Mirrors SimulationState.batch_update: diffs with a GENERAL entry keep
+    # their site updates under SITES, all others map site IDs directly
+    if GENERAL in diff:
+        return diff.get(SITES, {})
+    return diff
@@ -0,0 +1,139 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from .lattice import Lattice
+
+
+class Tiling:
+    """Describes a PeriodicStructure that is a tiling of a unit cell, as
+    produced by PeriodicStructure.build_from. The sites of the structure are
+    the basis sites of the unit cell repeated in every cell, and the site in
+    cell c (an integer vector) with basis index b has the ID
+
+        ravel_multi_index(c, num_cells) * num_basis + b
+
+    Because every copy of a basis site has the same surroundings (up to the
+    boundaries of non-periodic directions), neighborhoods can be computed for
+    the basis sites only and then tiled across the structure with tile.
+    """
+
+    def __init__(
+        self,
+        unit_lattice: Lattice,
+        num_cells: List[int],
+        basis_locations: np.ndarray,
+        basis_classes: List[str],
+    ):
+        """Instantiates the Tiling.
+
+        Parameters
+        ----------
+        unit_lattice : Lattice
+            The lattice of the unit cell.
+        num_cells : List[int]
+            The number of repetitions of the unit cell in each direction.
+        basis_locations : np.ndarray
+            The Cartesian location of each basis site in the cell at the origin.
+        basis_classes : List[str]
+            The class of each basis site.
+        """
+        self.unit_lattice = unit_lattice
+        self.num_cells = tuple(int(n) for n in num_cells)
+        self.basis_locations = np.array(basis_locations, dtype=float).reshape(
+            -1, unit_lattice.dim
+        )
+        self.basis_classes = list(basis_classes)
+
+    @property
+    def num_basis(self) -> int:
+        """The number of sites in the unit cell."""
+        return len(self.basis_classes)
+
+    @property
+    def num_tiles(self) -> int:
+        """The number of copies of the unit cell."""
+        return int(np.prod(self.num_cells))
+
+    @property
+    def basis_frac_coords(self) -> np.ndarray:
+        """The location of each basis site in fractional coordinates of the
+        unit cell."""
+        return self.unit_lattice.get_fractional_coords(self.basis_locations)
+
+    def cell_coords(self) -> np.ndarray:
+        """Returns the integer coordinates of every cell, in the order of
+        their indices.
+
+        Returns
+        -------
+        np.ndarray
+            An array of shape (num_tiles, dim).
+        """
+        grids = np.indices(self.num_cells).reshape(len(self.num_cells), -1)
+        return grids.T
+
+    def tile(
+        self,
+        source_basis: np.ndarray,
+        cell_offsets: np.ndarray,
+        target_basis: np.ndarray,
+        weights: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Repeats connections between basis sites across every cell. The kth
+        connection links basis site source_basis[k] in each cell c to basis
+        site target_basis[k] in cell c + cell_offsets[k]. Along periodic
+        directions the target cell wraps around; along non-periodic
+        directions connections leaving the structure are dropped.
+
+        Parameters
+        ----------
+        source_basis : np.ndarray
+            The basis index of the source of each connection.
+        cell_offsets : np.ndarray
+            The integer cell offset of each connection, of shape (K, dim).
+        target_basis : np.ndarray
+            The basis index of the target of each connection.
+        weights : np.ndarray
+            The weight of each connection.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The source site IDs, target site IDs and weights of all
+            connections. Connections are grouped by k, and ordered by source
+            within each group.
+        """
+        cells = self.cell_coords()
+        cell_ids = np.arange(len(cells), dtype=np.int64)
+        shape = np.array(self.num_cells)
+        periodic = np.array(self.unit_lattice.periodic, dtype=bool)
+
+        sources, targets, edge_weights = [], [], []
+        for src_b, offset, tgt_b, weight in zip(
+            source_basis,
+            np.asarray(cell_offsets, dtype=np.int64),
+            target_basis,
+            weights,
+        ):
+            target_cells = cells + offset
+            inside = (target_cells >= 0) & (target_cells < shape)
+            valid = np.all(periodic | inside, axis=1)
+            target_cells = np.where(periodic, target_cells % shape, target_cells)[valid]
+            target_ids = np.ravel_multi_index(tuple(target_cells.T), self.num_cells)
+
+            sources.append(cell_ids[valid] * self.num_basis + src_b)
+            targets.append(target_ids * self.num_basis + tgt_b)
+            edge_weights.append(np.full(len(target_ids), weight, dtype=float))
+
+        if not sources:
+            return (
+                np.zeros(0, dtype=np.int64),
+                np.zeros(0, dtype=np.int64),
+                np.zeros(0),
+            )
+        return (
+            np.concatenate(sources),
+            np.concatenate(targets),
+            np.concatenate(edge_weights),
+        )
@@ -15,15 +15,24 @@ class DiscreteResultAnalyzer:
     was used in the simulation.
     """
 
-    def __init__(self, result: SimulationResult):
+    def __init__(
+        self, result: SimulationResult, parallel: bool = False, workers: int = None
+    ):
         """Instantiates the DiscreteResultAnalyzer
 
         Parameters
         ----------
         result : SimulationResult
             The result to analyze.
+        parallel : bool, optional
+            Whether analyses that visit every step should rebuild the result in
+            worker processes (see SimulationResult.map_steps), by default False.
+        workers : int, optional
+            The number of worker processes to use when parallel is True.
         """
         self._result = result
+        self.parallel = parallel
+        self.workers = workers
 
     @lru_cache
     def all_phases(self) -> List[str]:
@@ -35,9 +44,11 @@ class DiscreteResultAnalyzer:
             A list of every phase present in any step of the result.
         """
         analyzer = DiscreteStepAnalyzer()
+        phases_by_step = self._result.map_steps(
+            analyzer.phases_present, parallel=self.parallel, workers=self.workers
+        )
         phases = []
-        for step in self._result.steps():
-            curr_phases = analyzer.phases_present(step)
+        for curr_phases in phases_by_step.values():
             phases = phases + curr_phases
 
         return frozenset(phases)
@@ -113,6 +124,6 @@ class DiscreteResultAnalyzer:
     def _get_steps_to_plot(self) -> Tuple[List[int], List[SimulationState]]:
         num_points = min(100, len(self._result))
         step_size = max(1, round(len(self._result) / num_points))
-        self._result.load_steps(step_size)
+        self._result.load_steps(step_size, parallel=self.parallel, workers=self.workers)
         step_idxs = list(range(0, len(self._result), step_size))
         return step_idxs, [self._result.get_step(step_idx) for step_idx in step_idxs]
@@ -1,4 +1,5 @@
 from ...core import BasicController, SimulationState, PeriodicStructure
+from ...core.neighborhood_cache import cached_neighborhood
 from ...structures.square_grid import MooreNbHoodBuilder
 from ...discrete.state_constants import DISCRETE_OCCUPANCY
 
@@ -20,7 +21,7 @@ class GameOfLifeController(BasicController):
         self.structure = structure
 
     def pre_run(self, _):
-        self.neighborhood = MooreNbHoodBuilder().get(self.structure)
+        self.neighborhood = cached_neighborhood(MooreNbHoodBuilder(), self.structure)
 
     def get_state_update(self, site_id, curr_state: SimulationState):
         alive_neighbor_count = 0
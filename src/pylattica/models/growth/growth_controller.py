@@ -1,5 +1,6 @@
 from ...core import BasicController
 from ...core.neighborhood_builders import NeighborhoodBuilder
+from ...core.neighborhood_cache import cached_neighborhood
 from ...core.periodic_structure import PeriodicStructure
 from ...core.simulation_state import SimulationState
 from ...discrete import PhaseSet
@@ -23,7 +24,7 @@ class GrowthController(BasicController):
         else:
             self.nb_builder = nb_builder
 
-        self.nb_graph = self.nb_builder.get(periodic_struct)
+        self.nb_graph = cached_neighborhood(self.nb_builder, periodic_struct)
 
     def get_state_update(self, site_id: int, prev_state: SimulationState):
         curr_state = prev_state.get_site_state(site_id)
@@ -1,6 +1,7 @@
 # fmt: off
 from .lattice import SquareGridLattice2D
 from .neighborhoods import (
+    GridNbHoodBuilder,
     MooreNbHoodBuilder,
     PseudoHexagonalNeighborhoodBuilder2D,
     PseudoHexagonalNeighborhoodBuilder3D,
@@ -5,6 +5,7 @@ import numpy as np
 
 from ...core.constants import LOCATION, SITE_ID
 from ...core.distance_map import distance
+from ...core.neighborhood_cache import cached_neighborhood
 from ...core.neighborhoods import Neighborhood
 from ...core.simulation import Simulation
 from ...core.periodic_structure import PeriodicStructure
@@ -316,7 +317,7 @@ class DiscreteGridSetup:
         state = self.setup_solid_phase(structure, background_spec)
         if buffer is not None:
             nb_spec: MooreNbHoodBuilder = MooreNbHoodBuilder(buffer, dim=structure.dim)
-            nb_graph: Neighborhood = nb_spec.get(structure)
+            nb_graph: Neighborhood = cached_neighborhood(nb_spec, structure)
         all_sites = structure.sites()
 
         nuc_species = []
@@ -1,17 +1,101 @@
 import numpy as np
-import rustworkx as rx
+from ...core.constants import OFFSET_PRECISION
 from ...core.coordinate_utils import get_points_in_cube
 from ...core.neighborhood_builders import (
     StochasticNeighborhoodBuilder,
     MotifNeighborhoodBuilder,
     DistanceNeighborhoodBuilder,
-    NeighborhoodBuilder,
 )
-from ...core.neighborhoods import Neighborhood
+from ...core.neighborhoods import (
+    AbstractNeighborhood,
+    CSRNeighborhood,
+    GridNeighborhood,
+)
 from ...core.periodic_structure import PeriodicStructure
 
 
-class VonNeumannNbHood2DBuilder(MotifNeighborhoodBuilder):
+class GridNbHoodBuilder(MotifNeighborhoodBuilder):
+    """A MotifNeighborhoodBuilder for motifs made of whole unit cell steps, such
+    as the Moore and von Neumann neighborhoods. For structures with one site
+    per unit cell (e.g. those built by SimpleSquare2DStructureBuilder and
+    SimpleSquare3DStructureBuilder), get returns an implicit GridNeighborhood
+    that computes neighbor IDs on demand instead of storing connections. For
+    other structures, and for grids too small for the motif to reach distinct
+    sites, the neighborhood is built explicitly.
+    """
+
+    def get(
+        self, struct: PeriodicStructure, site_class: str = None
+    ) -> AbstractNeighborhood:
+        """Builds the neighborhood of every site (or of every site of one class)
+        in the structure.
+
+        Parameters
+        ----------
+        struct : PeriodicStructure
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
+
+        Returns
+        -------
+        AbstractNeighborhood
+            A GridNeighborhood if possible, otherwise a CSRNeighborhood.
+        """
+        grid_motif = self._grid_motif(struct)
+        if grid_motif is None or site_class not in (
+            None,
+            struct.tiling.basis_classes[0],
+        ):
+            return super().get(struct, site_class=site_class)
+
+        offsets, vecs = grid_motif
+        return GridNeighborhood(
+            struct.tiling.num_cells,
+            struct.lattice.periodic,
+            offsets,
+            [self.distances.get_dist(vec) for vec in vecs],
+        )
+
+    def _cell_offsets(self, struct: PeriodicStructure):
+        # The cell offset of every motif vector other than the zero vector, and
+        # the vectors themselves, or None if the structure is not a grid with
+        # one site per cell or the motif is not made of whole cell steps
+        tiling = struct.tiling
+        if tiling is None or tiling.num_basis != 1:
+            return None
+
+        unit = tiling.unit_lattice
+        frac = unit.get_fractional_coords(
+            np.array(self._motif, dtype=float).reshape(-1, struct.dim)
+        )
+        offsets = np.round(frac).astype(np.int64)
+        residual = unit.get_cartesian_coords(frac - offsets)
+        if not np.all(np.abs(residual) < 0.5 * 10**-OFFSET_PRECISION):
+            return None
+
+        keep = np.any(offsets != 0, axis=1)
+        return offsets[keep], [vec for vec, kept in zip(self._motif, keep) if kept]
+
+    def _grid_motif(self, struct: PeriodicStructure):
+        # The result of _cell_offsets if the offsets reach distinct sites other
+        # than the site itself, so that a GridNeighborhood can be used
+        cell_offsets = self._cell_offsets(struct)
+        if cell_offsets is None:
+            return None
+
+        offsets, _ = cell_offsets
+        shape = np.array(struct.tiling.num_cells)
+        wrapped = np.where(struct.lattice.periodic, offsets % shape, offsets)
+        if np.any(np.all(wrapped == 0, axis=1)):
+            return None
+        if len(np.unique(wrapped, axis=0)) < len(wrapped):
+            return None
+        return cell_offsets
+
+
+class VonNeumannNbHood2DBuilder(GridNbHoodBuilder):
     """A helper class for generating von Neumann type neighborhoods in square 2D structures."""
 
     def __init__(self, size=1):
@@ -32,15 +116,16 @@ class VonNeumannNbHood2DBuilder(MotifNeighborhoodBuilder):
         super().__init__(filtered_points)
 
 
-class VonNeumannNbHood3DBuilder(NeighborhoodBuilder):
-    """Optimized Von Neumann neighborhood builder for simple cubic 3D grids.
-
-    Uses direct index math instead of coordinate lookups, providing
-    much faster performance for large grids.
+class VonNeumannNbHood3DBuilder(GridNbHoodBuilder):
+    """A helper class for generating von Neumann type neighborhoods in square 3D
+    structures. On SimpleSquare3DStructureBuilder structures the neighborhood is
+    an implicit GridNeighborhood, so neighbor IDs are computed with index
+    arithmetic and no connections are stored.
 
-    For a cubic grid of size n³:
-    - Site i is at position (x, y, z) where x = i % n, y = (i // n) % n, z = i // n²
-    - Neighbor at offset (dx, dy, dz) has ID: ((x+dx) % n) + ((y+dy) % n) * n + ((z+dz) % n) * n²
+    The weight of each connection is the exact length of its grid offset. On
+    grids too small for the offsets to reach distinct sites, offsets wrap
+    around onto the same site (or the site itself), and each neighbor gets
+    the weight of the last offset that reaches it.
     """
 
     def __init__(self, size: int):
@@ -51,114 +136,77 @@ class VonNeumannNbHood3DBuilder(NeighborhoodBuilder):
         size : int
             The size of the neighborhood (Manhattan distance).
         """
-        # Generate Von Neumann neighborhood offsets (excluding origin)
         points = get_points_in_cube(-size, size + 1, 3)
-        self._offsets = [
-            tuple(point)
-            for point in points
-            if sum(np.abs(p) for p in point) <= size and any(p != 0 for p in point)
-        ]
-        # Precompute distances for edge weights
-        self._distances = {
-            offset: np.sqrt(sum(p**2 for p in offset)) for offset in self._offsets
-        }
-        # Cache for grid size (computed once per structure)
-        self._cached_n = None
-        self._cached_n_sites = None
-
-    def _get_grid_size(self, struct: PeriodicStructure) -> int:
-        """Infer grid size n from structure (cached)."""
-        n_sites = len(struct.site_ids)
-        if n_sites != self._cached_n_sites:
-            n = int(round(n_sites ** (1 / 3)))
-            if n**3 != n_sites:
-                raise ValueError(f"Structure has {n_sites} sites, not a perfect cube.")
-            self._cached_n = n
-            self._cached_n_sites = n_sites
-        return self._cached_n
-
-    def get_neighbors(self, curr_site: dict, struct: PeriodicStructure) -> list:
-        """Get neighbors of a site using fast index math.
+        super().__init__(
+            [
+                tuple(point)
+                for point in points
+                if sum(np.abs(p) for p in point) <= size and any(p != 0 for p in point)
+            ]
+        )
+
+    def get(
+        self, struct: PeriodicStructure, site_class: str = None
+    ) -> AbstractNeighborhood:
+        """Builds the neighborhood of every site (or of every site of one class)
+        in the structure.
 
         Parameters
         ----------
-        curr_site : dict
-            Site dictionary with 'id' key
         struct : PeriodicStructure
-            The structure (used to infer grid size)
+            The structure for which the Neighborhood should be constructed.
+        site_class : str, optional
+            Specify a single class of sites to calculate the neighborhood for,
+            by default None
 
         Returns
         -------
-        list
-            List of (neighbor_id, distance) tuples
-        """
-        from ...core.constants import SITE_ID
-
-        n = self._get_grid_size(struct)
-        site_id = curr_site[SITE_ID]
-
-        # Convert site ID to (x, y, z) coordinates
-        x = site_id % n
-        y = (site_id // n) % n
-        z = site_id // (n * n)
-
-        neighbors = []
-        for dx, dy, dz in self._offsets:
-            # Compute neighbor coordinates with periodic boundary conditions
-            nx = (x + dx) % n
-            ny = (y + dy) % n
-            nz = (z + dz) % n
-
-            # Convert back to site ID
-            neighbor_id = nx + ny * n + nz * (n * n)
-            neighbors.append((neighbor_id, self._distances[(dx, dy, dz)]))
-
-        return neighbors
-
-    def get(self, struct: PeriodicStructure, site_class: str = None) -> Neighborhood:
-        """Build neighborhood graph using vectorized index math.
-
-        This override provides much faster performance than the base class
-        by computing all edges in bulk using numpy operations.
+        AbstractNeighborhood
+            A GridNeighborhood if possible, otherwise a CSRNeighborhood.
         """
-        n_sites = len(struct.site_ids)
-        n = self._get_grid_size(struct)
-
-        graph = rx.PyDiGraph()
-
-        # Add all nodes at once
-        graph.add_nodes_from(range(n_sites))
-
-        # Vectorized computation: create coordinate arrays for all sites
-        site_ids = np.arange(n_sites, dtype=np.int64)
-        x = site_ids % n
-        y = (site_ids // n) % n
-        z = site_ids // (n * n)
-
-        # Collect all edges across all offsets, then add in one batch
-        all_edges = []
-        for dx, dy, dz in self._offsets:
-            # Compute neighbor coordinates with periodic boundary conditions
-            nx = (x + dx) % n
-            ny = (y + dy) % n
-            nz = (z + dz) % n
-
-            # Convert to neighbor site IDs
-            neighbor_ids = nx + ny * n + nz * (n * n)
-            weight = self._distances[(dx, dy, dz)]
-
-            # Stack source, dest, weight as columns and extend
-            # Use numpy operations to avoid Python loop overhead
-            edge_data = np.column_stack([site_ids, neighbor_ids])
-            all_edges.extend((int(s), int(d), weight) for s, d in edge_data)
-
-        # Add all edges in one batch
-        graph.extend_from_weighted_edge_list(all_edges)
-
-        return Neighborhood(graph)
-
-
-class MooreNbHoodBuilder(MotifNeighborhoodBuilder):
+        cell_offsets = self._cell_offsets(struct)
+        if cell_offsets is None or site_class not in (
+            None,
+            struct.tiling.basis_classes[0],
+        ):
+            return super().get(struct, site_class=site_class)
+
+        offsets, vecs = cell_offsets
+        steps = np.rint(np.array(vecs, dtype=float)).astype(np.int64)
+        weights = np.sqrt(np.sum(steps**2, axis=1))
+        shape = struct.tiling.num_cells
+        if self._grid_motif(struct) is not None:
+            return GridNeighborhood(shape, struct.lattice.periodic, offsets, weights)
+
+        # Offsets alias on small grids, so the connections are listed explicitly,
+        # with the index arithmetic of earlier versions of this builder: site
+        # IDs have x varying fastest, and aliased neighbors get the weight of
+        # the last step that reaches them
+        periodic = np.array(struct.lattice.periodic)
+        coords = np.stack(np.unravel_index(np.arange(np.prod(shape)), shape), axis=1)
+        sources, targets, edge_weights = [], [], []
+        for offset, weight in zip(steps[:, ::-1], weights):
+            shifted = coords + offset
+            inside = np.all(periodic | ((shifted >= 0) & (shifted < shape)), axis=1)
+            shifted = np.where(periodic, shifted % shape, shifted)
+            sources.append(np.flatnonzero(inside))
+            targets.append(np.ravel_multi_index(tuple(shifted[inside].T), shape))
+            edge_weights.append(np.full(np.count_nonzero(inside), weight))
+
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        keys = sources * len(coords) + targets
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = np.sort(len(keys) - 1 - last)
+        order = keep[np.argsort(sources[keep], kind="stable")]
+        return CSRNeighborhood.from_edges(
+            sources[order],
+            targets[order],
+            np.concatenate(edge_weights)[order],
+            num_sites=struct.id_limit,
+        )
+
+
+class MooreNbHoodBuilder(GridNbHoodBuilder):
     """A helper class for generating Moore type neighborhoods in square structures."""
 
     def __init__(self, size=1, dim=2):
@@ -0,0 +1,97 @@
+import pytest
+
+import numpy as np
+
+from pylattica.core import Lattice, PeriodicStructure
+from pylattica.core.cell_list import CellList
+from pylattica.core.lattice import pbc_diff_cart
+
+
+def random_structure(lattice, num_sites, rng):
+    struct = PeriodicStructure(lattice)
+    while len(struct.site_ids) < num_sites:
+        location = lattice.get_cartesian_coords(rng.random(lattice.dim))
+        if struct.site_at(location) is None:
+            struct.add_site("A", location)
+    return struct
+
+
+def brute_force_pairs(struct, radius):
+    pairs = {}
+    site_ids = struct.site_ids
+    for i, first in enumerate(site_ids):
+        for second in site_ids[i + 1 :]:
+            dist = pbc_diff_cart(
+                struct.site_location(first),
+                struct.site_location(second),
+                struct.lattice,
+            )
+            if dist <= radius:
+                pairs[(min(first, second), max(first, second))] = dist
+    return pairs
+
+
+@pytest.mark.parametrize(
+    "vecs, periodic, radius",
+    [
+        ([[5, 0], [0, 6]], True, 1.2),
+        ([[5, 0], [2, 4]], True, 1.5),
+        ([[5, 0], [2, 4]], (False, True), 1.5),
+        # Fewer than three bins along the periodic axes
+        ([[2, 0], [0, 3]], True, 0.9),
+        ([[3, 0, 0], [0, 3, 0], [0.5, 0.5, 3]], (True, True, False), 1.0),
+    ],
+)
+def test_pairs_within_matches_brute_force(vecs, periodic, radius):
+    lattice = Lattice(vecs, periodic)
+    struct = random_structure(lattice, 60, np.random.default_rng(2))
+    cell_list = CellList.from_structure(struct, radius)
+
+    first, second, dists = cell_list.pairs_within()
+    assert np.all(first < second)
+    found = {
+        (int(a), int(b)): float(d)
+        for a, b, d in zip(first.tolist(), second.tolist(), dists.tolist())
+    }
+    assert len(found) == len(first)
+    assert found == pytest.approx(brute_force_pairs(struct, radius))
+
+    first, _, dists = cell_list.pairs_within(radius / 2)
+    assert len(first) == sum(d <= radius / 2 for d in found.values())
+
+    with pytest.raises(ValueError):
+        cell_list.pairs_within(2 * radius)
+
+
+def test_sites_within():
+    lattice = Lattice([[6, 0], [1, 5]])
+    struct = random_structure(lattice, 80, np.random.default_rng(3))
+    cell_list = CellList.from_structure(struct, 1.4)
+
+    location = (0.1, 0.2)
+    ids, dists = cell_list.sites_within(location)
+    assert np.all(np.diff(ids) > 0)
+
+    expected = {}
+    for site_id in struct.site_ids:
+        dist = pbc_diff_cart(struct.site_location(site_id), location, lattice)
+        if dist <= 1.4:
+            expected[site_id] = dist
+    assert dict(zip(ids.tolist(), dists.tolist())) == pytest.approx(expected)
+
+
+def test_empty_cell_list():
+    cell_list = CellList(Lattice([[3, 0], [0, 3]]), 1)
+    first, second, dists = cell_list.pairs_within()
+    assert len(first) == len(second) == len(dists) == 0
+    ids, dists = cell_list.sites_within((1, 1))
+    assert len(ids) == len(dists) == 0
+
+
+def test_empty_cell_list():
+    cell_list = CellList(Lattice([[1, 0], [0, 1]], periodic=False), 0.5)
+    first, second, dists = cell_list.pairs_within()
+    assert len(first) == len(second) == len(dists) == 0
+    ids, dists = cell_list.sites_within((0, 0))
+    assert len(ids) == len(dists) == 0
+
@@ -0,0 +1,119 @@
+import pytest
+
+import random
+import tracemalloc
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.diff_history import CompressedDiffHistory
+
+
+def random_diff(step):
+    site_id = random.randint(0, 99)
+    if step % 4 == 0:
+        return {SITES: {site_id: {"a": random.random()}}, GENERAL: {"t": step}}
+    return {site_id: {"phase": random.choice("ABC"), "n": step}}
+
+
+@pytest.fixture
+def diffs():
+    return [random_diff(step) for step in range(1050)]
+
+
+def test_packs_full_blocks(diffs):
+    history = CompressedDiffHistory(block_size=100)
+    for diff in diffs:
+        history.append(diff)
+
+    assert len(history) == 1050
+    assert history.num_blocks == 10
+    assert len(history._tail) == 50
+    assert list(history) == diffs
+
+
+def test_random_access_and_slices(diffs):
+    history = CompressedDiffHistory(block_size=64)
+    for diff in diffs:
+        history.append(diff)
+
+    for idx in [0, 63, 64, 500, 1023, 1049, -1, -64]:
+        assert history[idx] == diffs[idx]
+    assert history[130:700] == diffs[130:700]
+    assert history[1000:] == diffs[1000:]
+    assert history[5:300:7] == diffs[5:300:7]
+    assert list(history.iter_range(250, 260)) == diffs[250:260]
+
+    with pytest.raises(IndexError):
+        history[1050]
+
+
+@pytest.mark.parametrize("num_drop", [0, 40, 100, 250, 1020, 1050])
+def test_drop_prefix(diffs, num_drop):
+    history = CompressedDiffHistory(block_size=100)
+    for diff in diffs:
+        history.append(diff)
+
+    del history[:num_drop]
+    assert len(history) == 1050 - num_drop
+    assert list(history) == diffs[num_drop:]
+    if len(history) > 10:
+        assert history[10] == diffs[num_drop + 10]
+
+    with pytest.raises(TypeError):
+        del history[3]
+
+
+def test_result_with_compressed_history(diffs):
+    state = SimulationState()
+    plain = SimulationResult(state)
+    packed = SimulationResult(state, compress_history=128)
+    for diff in diffs:
+        plain.add_step(diff)
+        packed.add_step(diff)
+
+    assert isinstance(packed._diffs, CompressedDiffHistory)
+    for step_no in [0, 1, 127, 128, 129, 700, 1050]:
+        assert packed.get_step(step_no) == plain.get_step(step_no)
+    for a, b in zip(plain.steps(), packed.steps()):
+        assert a == b
+
+    packed.load_steps(interval=50)
+    assert len(packed._stored_states) == 22
+
+    restored = SimulationResult.from_dict(packed.as_dict())
+    assert restored.compress_history == 128
+    assert restored.as_dict() == packed.as_dict()
+
+
+def test_result_with_checkpoints():
+    result = SimulationResult(SimulationState(), max_history=300, compress_history=64)
+    for step in range(1000):
+        result.add_step({step % 5: {"value": step}})
+
+    assert len(result._diffs) <= 300
+    for step_no in range(result.earliest_available_step, len(result)):
+        state = result.get_step(step_no)
+        assert state.get_site_state((step_no - 1) % 5)["value"] == step_no - 1
+
+
+def test_memory_is_reduced():
+    state = SimulationState()
+    for site_id in range(400):
+        state.set_site_state(site_id, {"phase": "A"})
+
+    def traced_size(**kwargs):
+        random.seed(0)
+        tracemalloc.start()
+        result = SimulationResult(state, **kwargs)
+        for _ in range(2000):
+            result.add_step(
+                {
+                    random.randint(0, 399): {"phase": random.choice("ABC")}
+                    for _ in range(20)
+                }
+            )
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+    assert traced_size(compress_history=250) * 10 < traced_size()
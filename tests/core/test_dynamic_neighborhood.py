@@ -0,0 +1,86 @@
+import pytest
+
+import numpy as np
+
+from pylattica.core import Lattice, PeriodicStructure
+from pylattica.core.cell_list import CellList
+from pylattica.core.dynamic_neighborhood import DynamicNeighborhood
+from pylattica.core.neighborhood_builders import DistanceNeighborhoodBuilder
+
+
+def random_structure(lattice, num_sites, rng):
+    struct = PeriodicStructure(lattice)
+    for _ in range(num_sites):
+        add_random_site(struct.add_site, lattice, rng)
+    return struct
+
+
+def add_random_site(add_site, lattice, rng):
+    location = lattice.get_cartesian_coords(rng.random(lattice.dim))
+    try:
+        return add_site("A", location)
+    except AssertionError:
+        # The location is already occupied
+        return None
+
+
+@pytest.mark.parametrize(
+    "vecs, periodic",
+    [
+        ([[4, 0], [0, 5]], True),
+        ([[4, 0], [1, 3]], (True, False)),
+        ([[3, 0, 0], [0, 3, 0], [0.5, 0, 3]], (True, True, False)),
+    ],
+)
+def test_updates_match_rebuild(vecs, periodic):
+    rng = np.random.default_rng(0)
+    lattice = Lattice(vecs, periodic)
+    struct = random_structure(lattice, 30, rng)
+    nbhood = DynamicNeighborhood(struct, 1.3)
+
+    for _ in range(80):
+        if rng.random() < 0.4 and len(struct.site_ids) > 5:
+            nbhood.remove_site(int(rng.choice(struct.site_ids)))
+        else:
+            add_random_site(nbhood.add_site, lattice, rng)
+
+    rebuilt = DistanceNeighborhoodBuilder(1.3).get(struct)
+    for site_id in struct.site_ids:
+        assert sorted(nbhood.neighbors_of(site_id, True)) == sorted(
+            rebuilt.neighbors_of(site_id, True)
+        )
+
+    snapshot = nbhood.as_csr()
+    assert snapshot.num_sites == struct.id_limit
+    assert snapshot.num_edges == rebuilt.num_edges
+
+
+def test_growth_on_lattice():
+    struct = PeriodicStructure.build_from(Lattice([[1, 0], [0, 1]]), (4, 4), [[0, 0]])
+    nbhood = DynamicNeighborhood(struct, 1.01)
+    assert sorted(nbhood.neighbors_of(0)) == [1, 3, 4, 12]
+
+    new_id = nbhood.add_site("B", (0.5, 0))
+    assert sorted(nbhood.neighbors_of(new_id, True)) == [(0, 0.5), (4, 0.5)]
+    assert new_id in nbhood.neighbors_of(0)
+
+    nbhood.remove_site(0)
+    assert nbhood.neighbors_of(new_id) == [4]
+    assert 0 not in nbhood.neighbors_of(4)
+    assert nbhood.neighbors_of(0) == []
+
+
+def test_cell_list_candidates():
+    lattice = Lattice([[10, 0], [2, 10]])
+    struct = random_structure(lattice, 200, np.random.default_rng(1))
+    cell_list = CellList.from_structure(struct, 1.5)
+    assert len(cell_list) == len(struct.site_ids)
+    assert np.all(cell_list.num_bins >= 5)
+
+    rebuilt = DistanceNeighborhoodBuilder(1.5).get(struct)
+    for site_id in struct.site_ids:
+        candidates = set(cell_list.candidates(struct.site_location(site_id)).tolist())
+        assert set(rebuilt.neighbors_of(site_id)) <= candidates
+
+    cell_list.remove(struct.site_ids[0])
+    assert len(cell_list) == len(struct.site_ids) - 1
@@ -0,0 +1,146 @@
+import pytest
+
+import random
+
+import numpy as np
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.frame_store import FrameStore, state_fingerprint
+
+
+@pytest.fixture
+def state():
+    state = SimulationState()
+    for site_id in range(100):
+        state.set_site_state(site_id, {"phase": "A"})
+    return state
+
+
+def run_with_reference(state, updates, compress_freq=1):
+    result = SimulationResult(state, compress_freq=compress_freq, live_compress=True)
+    live = state.copy()
+    reference = {0: live.copy()}
+    for step_no, diff in enumerate(updates, start=1):
+        result.add_step(diff)
+        live.batch_update(diff)
+        if step_no % compress_freq == 0:
+            reference[step_no] = live.copy()
+    return result, reference
+
+
+def test_fingerprint_is_incremental(state):
+    store = FrameStore()
+    store[0] = state.copy()
+    live = state.copy()
+    for step_no in range(1, 50):
+        diff = {random.randint(0, 120): {"phase": random.choice("ABC")}}
+        if step_no % 7 == 0:
+            diff = {SITES: diff, GENERAL: {"t": step_no}}
+        store.observe(live, diff)
+        live.batch_update(diff)
+        store.add(step_no, live)
+        assert store._fingerprint == state_fingerprint(live)
+
+
+def test_identical_frames_are_shared(state):
+    updates = [{site_id: {"phase": "B"}} for site_id in range(20)]
+    updates += [{0: {"phase": "B"}}] * 30
+    result, reference = run_with_reference(state, updates, compress_freq=5)
+
+    assert result._frames.num_stored == 5
+    for step_no, expected in reference.items():
+        assert result.get_step(step_no) == expected
+
+
+def test_revisited_states_are_shared(state):
+    # A two step oscillation: every other frame is identical
+    updates = [{3: {"phase": "B"}}, {3: {"phase": "A"}}] * 20
+    result, reference = run_with_reference(state, updates)
+
+    assert len(result._frames) == 41
+    assert result._frames.num_stored == 2
+    for step_no, expected in reference.items():
+        assert result.get_step(step_no) == expected
+
+
+def test_small_changes_stored_as_deltas(state):
+    updates = [
+        {random.randint(0, 99): {"phase": random.choice("BC")}} for _ in range(200)
+    ]
+    result, reference = run_with_reference(state, updates, compress_freq=2)
+
+    store = result._frames
+    assert store.num_deltas > 0
+    assert store.num_stored - store.num_deltas >= len(store) // 17
+    for step_no in sorted(reference, reverse=True):
+        assert result.get_step(step_no) == reference[step_no]
+
+
+def test_large_changes_stored_as_copies(state):
+    updates = [
+        {site_id: {"phase": str(step)} for site_id in range(100)} for step in range(10)
+    ]
+    result, _ = run_with_reference(state, updates)
+    assert result._frames.num_deltas == 0
+
+
+def test_new_sites_and_general_state(state):
+    updates = [
+        {SITES: {150: {}}, GENERAL: {"t": 1}},
+        {151: {"phase": "C"}},
+        {SITES: {}, GENERAL: {"t": 3}},
+    ]
+    result, reference = run_with_reference(state, updates)
+    for step_no, expected in reference.items():
+        assert result.get_step(step_no) == expected
+
+
+def test_delete_releases_frames(state):
+    updates = [{1: {"phase": "B"}}, {2: {"phase": "B"}}, {1: {"phase": "A"}}]
+    result, reference = run_with_reference(state, updates)
+    store = result._frames
+
+    del store[1]
+    assert 1 not in store
+    assert store[2] == reference[2]
+    del store[2]
+    del store[3]
+    assert store.num_stored == 1
+
+
+def test_serialization_round_trip(state):
+    updates = [{random.randint(0, 99): {"phase": "B"}} for _ in range(30)]
+    result, reference = run_with_reference(state, updates, compress_freq=3)
+
+    restored = SimulationResult.from_dict(result.as_dict())
+    assert isinstance(restored._frames, FrameStore)
+    assert restored.as_dict() == result.as_dict()
+    restored.add_step({5: {"phase": "C"}})
+    restored.add_step({6: {"phase": "C"}})
+    restored.add_step({7: {"phase": "C"}})
+    assert restored.get_step(33).get_site_state(7)["phase"] == "C"
+
+
+def test_colliding_fingerprints_are_stored_separately(state):
+    # hash(-1) == hash(-2) in CPython, so these states share a fingerprint
+    updates = [{0: {"v": -1}}, {0: {"v": -2}}, {0: {"v": -1}}]
+    result, reference = run_with_reference(state, updates)
+
+    assert result._frames.num_stored == 3
+    for step_no, expected in reference.items():
+        assert result.get_step(step_no) == expected
+    assert result.get_step(2).get_site_state(0)["v"] == -2
+    assert result.get_step(3).get_site_state(0)["v"] == -1
+
+
+def test_array_values_are_compared_by_content(state):
+    first = np.full(1000, 0.123456789)
+    second = first.copy()
+    second[500] += 1e-12
+    updates = [{0: {"v": first}}, {0: {"v": second}}, {0: {"v": first.copy()}}]
+    result, _ = run_with_reference(state, updates)
+
+    assert result._frames.num_stored == 3
+    assert np.array_equal(result.get_step(2).get_site_state(0)["v"], second)
+    assert np.array_equal(result.get_step(3).get_site_state(0)["v"], first)
@@ -2,16 +2,25 @@ import pytest
 
 import numpy as np
 import math
+import sys
 
 from pylattica.core.neighborhood_builders import (
+    NeighborhoodBuilder,
+    SiteClassNeighborhoodBuilder,
     DistanceNeighborhoodBuilder,
     MotifNeighborhoodBuilder,
     AnnularNeighborhoodBuilder,
+    ShellNeighborhoodBuilder,
+    PairCutoffNeighborhoodBuilder,
+    KNearestNeighborhoodBuilder,
+    VoronoiNeighborhoodBuilder,
 )
 from pylattica.structures.square_grid.structure_builders import (
     SimpleSquare2DStructureBuilder,
 )
 
+from helpers.helpers import skip_windows_due_to_parallel
+
 
 def test_distance_nb_builder(square_grid_2D_4x4):
     builder = DistanceNeighborhoodBuilder(1.01)
@@ -65,3 +74,382 @@ def test_struct_nb_hood_builder(square_grid_2D_4x4):
 
     for nb_id, nb_dist in nbs_w_dists:
         assert nb_dist == 1.0
+
+
+@pytest.mark.parametrize("periodic", [True, (True, False), False])
+def test_vectorized_motif_builder_matches_site_lookup(periodic):
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice([[1, 0], [0.5, math.sqrt(3) / 2]], periodic)
+    motif = {"A": [[0, 0]], "B": [[0.5, 0.3]]}
+    struct = PeriodicStructure.build_from(lattice, (4, 3), motif)
+    offsets = [(1, 0), (0.5, 0.3), (-0.5, -0.3), (0, 0), (0.5, math.sqrt(3) / 2)]
+
+    builder = MotifNeighborhoodBuilder(offsets)
+    for site_class in [None, "B"]:
+        nbhood = builder.get(struct, site_class=site_class)
+        for site in struct.sites():
+            expected = []
+            if site_class is None or site["_site_class"] == site_class:
+                expected = [
+                    (nb_id, dist)
+                    for nb_id, dist in builder.get_neighbors(site, struct)
+                    if nb_id is not None
+                ]
+            assert nbhood.neighbors_of(site["_site_id"], include_weights=True) == (
+                expected
+            )
+
+
+def test_motif_builder_merges_repeated_neighbors():
+    from pylattica.core import Lattice, PeriodicStructure
+
+    struct = PeriodicStructure.build_from(Lattice([[1, 0], [0, 1]]), (2, 2), [[0, 0]])
+    nbhood = MotifNeighborhoodBuilder([(1, 0), (-1, 0)]).get(struct)
+    assert all(len(nbhood.neighbors_of(site_id)) == 1 for site_id in range(4))
+
+
+@pytest.mark.parametrize(
+    "vecs", [[[1, 0], [0, 1]], [[1, 0], [0.5, math.sqrt(3) / 2]], [[2, 0], [0, 1]]]
+)
+@pytest.mark.parametrize("periodic", [True, (False, True), False])
+def test_bulk_pair_search_matches_site_search(vecs, periodic):
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice(vecs, periodic)
+    motif = {"A": [[0, 0]], "B": [[0.5, 0.25]]}
+    struct = PeriodicStructure.build_from(lattice, (4, 5), motif)
+
+    for builder in [
+        DistanceNeighborhoodBuilder(1.01),
+        DistanceNeighborhoodBuilder(2.2),
+        AnnularNeighborhoodBuilder(0.9, 1.8),
+    ]:
+        for site_class in [None, "B"]:
+            nbhood = builder.get(struct, site_class=site_class)
+            for site in struct.sites():
+                expected = []
+                if site_class is None or site["_site_class"] == site_class:
+                    expected = builder.get_neighbors(site, struct)
+                assert sorted(nbhood.neighbors_of(site["_site_id"], True)) == sorted(
+                    expected
+                )
+
+
+@pytest.mark.parametrize("vecs", [[[1, 0], [0, 1]], [[1, 0], [0.5, math.sqrt(3) / 2]]])
+@pytest.mark.parametrize("periodic", [True, False])
+def test_shell_builder_matches_separate_builds(vecs, periodic):
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice(vecs, periodic)
+    struct = PeriodicStructure.build_from(lattice, (6, 7), [[0, 0]])
+    nbhood = ShellNeighborhoodBuilder(radii=[1.2, 1.8, 2.1]).get(struct)
+    expected = [
+        DistanceNeighborhoodBuilder(1.2).get(struct),
+        AnnularNeighborhoodBuilder(1.199, 1.8).get(struct),
+        AnnularNeighborhoodBuilder(1.799, 2.1).get(struct),
+    ]
+    assert nbhood.num_shells == 3
+    for site_id in struct.site_ids:
+        for shell_idx, shell_nbhood in enumerate(expected):
+            assert nbhood.shell(shell_idx).neighbors_of(site_id, True) == (
+                shell_nbhood.neighbors_of(site_id, True)
+            )
+
+
+def test_shell_builder_clusters_distances():
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice([[1, 0], [0.5, math.sqrt(3) / 2]])
+    struct = PeriodicStructure.build_from(lattice, (10, 10), [[0, 0]], frac_coords=True)
+    nbhood = ShellNeighborhoodBuilder(num_shells=3).get(struct)
+
+    assert np.allclose(nbhood.shell_bounds, [1, math.sqrt(3), 2], atol=1e-3)
+    assert np.all(nbhood.shell(0).degrees == 6)
+    assert np.all(nbhood.shell(1).degrees == 6)
+    assert np.all(nbhood.shell(2).degrees == 6)
+    assert np.all(nbhood.degrees == 18)
+
+    # There are only two distinct distances in a 2 x 2 grid
+    small = PeriodicStructure.build_from(Lattice([[1, 0], [0, 1]]), (2, 2), [[0, 0]])
+    assert ShellNeighborhoodBuilder(num_shells=4).get(small).num_shells == 2
+
+    with pytest.raises(ValueError):
+        ShellNeighborhoodBuilder()
+    with pytest.raises(ValueError):
+        ShellNeighborhoodBuilder(radii=[2, 1])
+
+
+class ModuloBuilder(NeighborhoodBuilder):
+    # A builder without a bulk get, connecting sites whose IDs differ by a
+    # multiple of 5
+    def get_neighbors(self, curr_site, struct):
+        site_id = curr_site["_site_id"]
+        return [
+            (other, abs(other - site_id))
+            for other in struct.site_ids
+            if other != site_id and (other - site_id) % 5 == 0
+        ]
+
+
+@skip_windows_due_to_parallel
+def test_parallel_generic_build_matches_serial():
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice([[1, 0], [0, 1]])
+    struct = PeriodicStructure.build_from(
+        lattice, (6, 5), {"A": [[0, 0]], "B": [[0.5, 0.5]]}
+    )
+    builder = ModuloBuilder()
+
+    serial = builder.get(struct)
+    for kwargs in [{"workers": 2}, {"workers": 3, "chunk_size": 7}]:
+        parallel = builder.get(struct, parallel=True, **kwargs)
+        for site_id in struct.site_ids:
+            assert sorted(parallel.neighbors_of(site_id, True)) == sorted(
+                serial.neighbors_of(site_id, True)
+            )
+
+    by_class = SiteClassNeighborhoodBuilder(
+        {"A": builder, "B": DistanceNeighborhoodBuilder(1.01)}
+    ).get(struct, parallel=True, workers=2)
+    for site in struct.sites():
+        site_id = site["_site_id"]
+        if site["_site_class"] == "A":
+            expected = serial.neighbors_of(site_id, True)
+        else:
+            expected = DistanceNeighborhoodBuilder(1.01).get_neighbors(site, struct)
+        assert sorted(by_class.neighbors_of(site_id, True)) == sorted(expected)
+
+
+def test_parallel_build_unavailable_on_windows(square_grid_2D_4x4, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "win32")
+    with pytest.raises(ValueError, match="Windows"):
+        ModuloBuilder().get(square_grid_2D_4x4, parallel=True)
+
+
+@pytest.mark.parametrize(
+    "vecs", [[[1, 0], [0, 1]], [[1, 0], [0.5, math.sqrt(3) / 2]], [[2, 0], [0, 1]]]
+)
+@pytest.mark.parametrize("periodic", [True, (False, True)])
+def test_pair_cutoff_builder(vecs, periodic):
+    from pylattica.core import Lattice, PeriodicStructure
+    from pylattica.core.lattice import pbc_diff_cart
+
+    lattice = Lattice(vecs, periodic)
+    motif = {"A": [[0, 0]], "B": [[0.5, 0.25]], "C": [[0.25, 0.5]]}
+    struct = PeriodicStructure.build_from(lattice, (4, 5), motif)
+    builder = PairCutoffNeighborhoodBuilder(
+        {("A", "A"): 1.01, ("B", "A"): 1.3, ("C", "C"): 2.0}
+    )
+    cutoffs = {("A", "A"): 1.01, ("A", "B"): 1.3, ("C", "C"): 2.0}
+
+    for site_class in [None, "A", "C"]:
+        nbhood = builder.get(struct, site_class=site_class)
+        for site in struct.sites():
+            expected = []
+            if site_class is None or site["_site_class"] == site_class:
+                for other in struct.sites():
+                    pair = tuple(sorted((site["_site_class"], other["_site_class"])))
+                    dist = pbc_diff_cart(
+                        other["_location"], site["_location"], struct.lattice
+                    )
+                    if other is not site and dist < cutoffs.get(pair, 0):
+                        expected.append((other["_site_id"], dist))
+                assert sorted(builder.get_neighbors(site, struct)) == sorted(expected)
+            assert sorted(nbhood.neighbors_of(site["_site_id"], True)) == sorted(
+                expected
+            )
+
+
+def test_pair_cutoff_builder_cutoffs():
+    builder = PairCutoffNeighborhoodBuilder({("A", "B"): 1.5, ("B", "B"): 1})
+    assert (
+        builder.get_neighbors(
+            {"_site_class": "C", "_location": (0, 0), "_site_id": 0}, None
+        )
+        == []
+    )
+    assert np.array_equal(
+        builder.cutoff_matrix(["A", "B", "C"]),
+        [[0, 1.5, 0], [1.5, 1, 0], [0, 0, 0]],
+    )
+    with pytest.raises(ValueError):
+        PairCutoffNeighborhoodBuilder({("A", "B"): 1.5, ("B", "A"): 1})
+
+
+def _brute_force_nearest(struct, k, include_ties):
+    from pylattica.core.lattice import pbc_diff_cart
+
+    nearest = {}
+    for site in struct.sites():
+        others = sorted(
+            (
+                pbc_diff_cart(other["_location"], site["_location"], struct.lattice),
+                other["_site_id"],
+            )
+            for other in struct.sites()
+            if other is not site
+        )
+        kth = others[min(k, len(others)) - 1][0]
+        nearest[site["_site_id"]] = [
+            (nb_id, dist)
+            for rank, (dist, nb_id) in enumerate(others)
+            if rank < k or (include_ties and dist <= kth)
+        ]
+    return nearest
+
+
+@pytest.mark.parametrize(
+    "vecs", [[[5, 0], [0, 4]], [[5, 0], [1.5, 4]], [[4, 0, 0], [0, 4, 0], [1, 0, 3]]]
+)
+@pytest.mark.parametrize("periodic", [True, False])
+@pytest.mark.parametrize("k", [1, 4, 9])
+def test_k_nearest_builder_matches_brute_force(vecs, periodic, k):
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice(vecs, periodic)
+    rng = np.random.default_rng(4)
+    struct = PeriodicStructure(lattice)
+    for frac in np.round(rng.random((40, lattice.dim)), 2):
+        if struct.site_at(lattice.get_cartesian_coords(frac)) is None:
+            struct.add_site(
+                "A" if frac[0] < 0.5 else "B", lattice.get_cartesian_coords(frac)
+            )
+
+    for include_ties in [True, False]:
+        expected = _brute_force_nearest(struct, k, include_ties)
+        nbhood = KNearestNeighborhoodBuilder(k, include_ties=include_ties).get(struct)
+        for site_id in struct.site_ids:
+            assert sorted(nbhood.neighbors_of(site_id, True)) == sorted(
+                expected[site_id]
+            )
+
+    nbhood = KNearestNeighborhoodBuilder(k, symmetric=True).get(struct, site_class="B")
+    expected = _brute_force_nearest(struct, k, True)
+    for site_id in struct.site_ids:
+        symmetric = set(expected[site_id]) | {
+            (other, dist)
+            for other, nbs in expected.items()
+            for nb_id, dist in nbs
+            if nb_id == site_id
+        }
+        if struct.site_class(site_id) != "B":
+            symmetric = set()
+        assert sorted(nbhood.neighbors_of(site_id, True)) == sorted(symmetric)
+
+
+def test_k_nearest_builder_ties():
+    struct = SimpleSquare2DStructureBuilder().build(5)
+    nbhood = KNearestNeighborhoodBuilder(2).get(struct)
+    assert all(len(nbhood.neighbors_of(site_id)) == 4 for site_id in struct.site_ids)
+
+    nbhood = KNearestNeighborhoodBuilder(2, include_ties=False).get(struct)
+    assert sorted(nbhood.neighbors_of(12)) == [7, 11]
+
+    nbhood = KNearestNeighborhoodBuilder(100).get(struct)
+    assert len(nbhood.neighbors_of(0)) == 24
+
+    with pytest.raises(ValueError):
+        KNearestNeighborhoodBuilder(0)
+
+
+def test_voronoi_builder_lattices():
+    from pylattica.core import Lattice, PeriodicStructure
+
+    # Diagonal neighbors of a square lattice share only a corner
+    struct = SimpleSquare2DStructureBuilder().build(5)
+    nbhood = VoronoiNeighborhoodBuilder(weight="area").get(struct)
+    for site_id in struct.site_ids:
+        assert [w for _, w in nbhood.neighbors_of(site_id, True)] == [1, 1, 1, 1]
+
+    lattice = Lattice([[1, 0], [0.5, math.sqrt(3) / 2]])
+    struct = PeriodicStructure.build_from(lattice, (4, 4), [[0, 0]], frac_coords=True)
+    nbhood = VoronoiNeighborhoodBuilder().get(struct)
+    for site_id in struct.site_ids:
+        assert [w for _, w in nbhood.neighbors_of(site_id, True)] == [1] * 6
+
+    # The Voronoi cells of a BCC lattice are truncated octahedra
+    lattice = Lattice([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    struct = PeriodicStructure.build_from(
+        lattice, (3, 3, 3), [[0, 0, 0], [0.5, 0.5, 0.5]]
+    )
+    areas = VoronoiNeighborhoodBuilder(weight="area").get(struct)
+    dists = VoronoiNeighborhoodBuilder().get(struct)
+    for site_id in struct.site_ids:
+        assert (
+            sorted(w for _, w in areas.neighbors_of(site_id, True))
+            == [0.125] * 6 + [0.325] * 8
+        )
+        assert (
+            sorted(w for _, w in dists.neighbors_of(site_id, True))
+            == [0.866] * 8 + [1.0] * 6
+        )
+
+
+@pytest.mark.parametrize(
+    "vecs, periodic",
+    [
+        ([[6, 0], [0, 5]], True),
+        ([[6, 0], [2, 5]], True),
+        ([[6, 0], [2, 5]], (True, False)),
+        ([[3, 0, 0], [0, 3, 0], [1, 0, 3]], True),
+    ],
+)
+def test_voronoi_builder_matches_image_diagram(vecs, periodic):
+    import itertools
+    from scipy.spatial import Voronoi
+    from pylattica.core import Lattice, PeriodicStructure
+
+    lattice = Lattice(vecs, periodic)
+    rng = np.random.default_rng(5)
+    struct = PeriodicStructure(lattice)
+    for frac in np.round(rng.random((30, lattice.dim)), 3):
+        if struct.site_at(lattice.get_cartesian_coords(frac)) is None:
+            struct.add_site(
+                "A" if frac[0] < 0.5 else "B", lattice.get_cartesian_coords(frac)
+            )
+
+    # Reference: the diagram of two layers of images in every periodic direction
+    site_ids = struct.site_ids
+    frac = lattice.get_fractional_coords(
+        np.array([struct.site_location(site_id) for site_id in site_ids])
+    )
+    layers = [range(-2, 3) if p else [0] for p in lattice.periodic]
+    offsets = sorted(itertools.product(*layers), key=any)
+    points = np.concatenate([lattice.get_cartesian_coords(frac + o) for o in offsets])
+    vor = Voronoi(points)
+    expected = {site_id: set() for site_id in site_ids}
+    for (a, b), verts in zip(vor.ridge_points, vor.ridge_vertices):
+        if -1 not in verts:
+            face = vor.vertices[verts]
+            size = np.ptp(face, axis=0).max()
+            if size < 1e-6:
+                continue
+        for own, other in ((a, b), (b, a)):
+            if own < len(site_ids) and own != other % len(site_ids):
+                expected[site_ids[own]].add(site_ids[other % len(site_ids)])
+
+    for padding in [None, 0.1]:
+        builder = VoronoiNeighborhoodBuilder(padding=padding, min_area=1e-9)
+        nbhood = builder.get(struct)
+        for site_id in site_ids:
+            assert set(nbhood.neighbors_of(site_id)) == expected[site_id]
+
+        nbhood = builder.get(struct, site_class="B")
+        for site_id in site_ids:
+            if struct.site_class(site_id) == "B":
+                assert set(nbhood.neighbors_of(site_id)) == expected[site_id]
+            else:
+                assert nbhood.neighbors_of(site_id) == []
+
+
+def test_voronoi_builder_errors():
+    with pytest.raises(ValueError):
+        VoronoiNeighborhoodBuilder(weight="volume")
+
+    from pylattica.core import Lattice, PeriodicStructure
+
+    struct = PeriodicStructure.build_from(Lattice([[1]]), (5,), [[0]])
+    with pytest.raises(ValueError):
+        VoronoiNeighborhoodBuilder().get(struct)
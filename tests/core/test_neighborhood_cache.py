@@ -0,0 +1,146 @@
+import pytest
+
+import numpy as np
+
+from pylattica.core import Lattice, PeriodicStructure
+from pylattica.core.neighborhood_builders import (
+    DistanceNeighborhoodBuilder,
+    MotifNeighborhoodBuilder,
+    ShellNeighborhoodBuilder,
+    StochasticNeighborhoodBuilder,
+)
+from pylattica.core.neighborhood_cache import NeighborhoodCache, builder_fingerprint
+from pylattica.core.neighborhoods import (
+    CSRNeighborhood,
+    ShellNeighborhood,
+    StochasticNeighborhood,
+)
+from pylattica.structures.square_grid import MooreNbHoodBuilder
+
+
+class CountingBuilder(DistanceNeighborhoodBuilder):
+    num_builds = 0
+
+    def get(self, struct, site_class=None):
+        CountingBuilder.num_builds += 1
+        return super().get(struct, site_class=site_class)
+
+
+@pytest.fixture
+def structure():
+    lattice = Lattice([[1, 0], [0, 1]])
+    return PeriodicStructure.build_from(lattice, (6, 6), [[0.5, 0.5]])
+
+
+def assert_same_neighbors(a, b, site_ids):
+    for site_id in site_ids:
+        assert sorted(a.neighbors_of(site_id, include_weights=True)) == sorted(
+            b.neighbors_of(site_id, include_weights=True)
+        )
+
+
+def test_structure_fingerprint(structure):
+    lattice = Lattice([[1, 0], [0, 1]])
+    same = PeriodicStructure.build_from(lattice, (6, 6), [[0.5, 0.5]])
+    bigger = PeriodicStructure.build_from(lattice, (6, 7), [[0.5, 0.5]])
+    classes = PeriodicStructure.build_from(lattice, (6, 6), {"B": [[0.5, 0.5]]})
+
+    assert structure.fingerprint == same.fingerprint
+    assert structure.fingerprint != bigger.fingerprint
+    assert structure.fingerprint != classes.fingerprint
+
+
+def test_structure_fingerprint_includes_site_ids():
+    lattice = Lattice([[3, 0], [0, 1]])
+    removed = PeriodicStructure(lattice)
+    for x in range(3):
+        removed.add_site("A", (x, 0))
+    removed.remove_site(1)
+    fresh = PeriodicStructure(lattice)
+    fresh.add_site("A", (0, 0))
+    fresh.add_site("A", (2, 0))
+
+    assert removed.site_ids == [0, 2]
+    assert fresh.site_ids == [0, 1]
+    assert removed.fingerprint != fresh.fingerprint
+
+    cache = NeighborhoodCache()
+    builder = DistanceNeighborhoodBuilder(1.1)
+    cache.get(builder, fresh)
+    assert_same_neighbors(
+        cache.get(builder, removed), builder.get(removed), removed.site_ids
+    )
+
+
+def test_builder_fingerprint():
+    assert builder_fingerprint(MooreNbHoodBuilder(1)) == builder_fingerprint(
+        MooreNbHoodBuilder(1)
+    )
+    assert builder_fingerprint(MooreNbHoodBuilder(1)) != builder_fingerprint(
+        MooreNbHoodBuilder(2)
+    )
+    assert builder_fingerprint(DistanceNeighborhoodBuilder(1.5)) != (
+        builder_fingerprint(DistanceNeighborhoodBuilder(1.6))
+    )
+
+
+def test_memory_cache(structure):
+    cache = NeighborhoodCache(max_entries=2)
+    CountingBuilder.num_builds = 0
+
+    first = cache.get(CountingBuilder(1.5), structure)
+    second = cache.get(CountingBuilder(1.5), structure)
+    assert CountingBuilder.num_builds == 1
+    assert first is second
+    assert isinstance(first, CSRNeighborhood)
+    assert not first.indices.flags.writeable
+    assert not first.weights.flags.writeable
+    assert_same_neighbors(
+        first, DistanceNeighborhoodBuilder(1.5).get(structure), structure.site_ids
+    )
+
+    cache.get(CountingBuilder(1.1), structure)
+    cache.get(CountingBuilder(2.1), structure)
+    assert len(cache) == 2
+    cache.get(CountingBuilder(1.5), structure)
+    assert CountingBuilder.num_builds == 4
+
+
+def test_disk_cache(structure, tmp_path):
+    CountingBuilder.num_builds = 0
+    built = NeighborhoodCache(str(tmp_path)).get(CountingBuilder(1.5), structure)
+
+    # A new cache, e.g. in another process, memory maps the saved arrays
+    loaded = NeighborhoodCache(str(tmp_path)).get(CountingBuilder(1.5), structure)
+    assert CountingBuilder.num_builds == 1
+    assert not loaded.indices.flags.writeable
+    assert_same_neighbors(built, loaded, structure.site_ids)
+    assert np.array_equal(loaded.neighbor_sum(np.ones(36)), np.full(36, 8.0))
+
+    cache = NeighborhoodCache(str(tmp_path))
+    cache.clear(disk=True)
+    cache.get(CountingBuilder(1.5), structure)
+    assert CountingBuilder.num_builds == 2
+
+
+def test_stochastic_neighborhoods_are_cached_in_memory(structure, tmp_path):
+    cache = NeighborhoodCache(str(tmp_path))
+    builder = StochasticNeighborhoodBuilder(
+        [MotifNeighborhoodBuilder([(0, 1)]), MotifNeighborhoodBuilder([(1, 0)])]
+    )
+    nbhood = cache.get(builder, structure)
+    assert isinstance(nbhood, StochasticNeighborhood)
+    assert cache.get(builder, structure) is nbhood
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+def test_shell_neighborhoods_keep_shells_on_disk(structure, tmp_path):
+    builder = ShellNeighborhoodBuilder(num_shells=2)
+    built = NeighborhoodCache(str(tmp_path)).get(builder, structure)
+    loaded = NeighborhoodCache(str(tmp_path)).get(builder, structure)
+    assert isinstance(loaded, ShellNeighborhood)
+    assert np.array_equal(loaded.shell_bounds, built.shell_bounds)
+    for shell_idx in range(2):
+        assert_same_neighbors(
+            loaded.shell(shell_idx), built.shell(shell_idx), structure.site_ids
+        )
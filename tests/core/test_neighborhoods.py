@@ -1,12 +1,27 @@
+import pytest
+
 from pylattica.core.neighborhood_builders import (
     MotifNeighborhoodBuilder,
     SiteClassNeighborhoodBuilder,
     StochasticNeighborhoodBuilder,
     DistanceNeighborhoodBuilder,
 )
-from pylattica.core import Lattice, PeriodicStructure
+from pylattica.core import (
+    CSRNeighborhood,
+    GridNeighborhood,
+    Lattice,
+    Neighborhood,
+    PeriodicStructure,
+    ShellNeighborhood,
+    StochasticNeighborhood,
+)
+from pylattica.structures.square_grid import (
+    PseudoHexagonalNeighborhoodBuilder3D,
+    SimpleSquare3DStructureBuilder,
+)
 
 import numpy as np
+import rustworkx as rx
 
 
 def test_site_class_neighborhood():
@@ -157,3 +172,236 @@ def test_non_periodic_neighborhoods():
     corner_nbs = non_periodic_nbhood.neighbors_of(corner_id)
 
     assert len(corner_nbs) == 2
+
+
+def test_csr_matches_graph_neighborhood():
+    lattice = Lattice([[1, 0], [0, 1]])
+    structure = PeriodicStructure.build_from(lattice, (6, 6), [[0.5, 0.5]])
+    nbhood = DistanceNeighborhoodBuilder(1.5).get(structure)
+    csr = nbhood.as_csr()
+
+    assert csr.num_sites == 36
+    assert csr.num_edges == 36 * 8
+    assert np.all(csr.degrees == 8)
+    for site_id in structure.site_ids:
+        assert sorted(csr.neighbors_of(site_id)) == sorted(nbhood.neighbors_of(site_id))
+        assert sorted(csr.neighbors_of(site_id, include_weights=True)) == sorted(
+            nbhood.neighbors_of(site_id, include_weights=True)
+        )
+        assert list(csr.neighbor_ids(site_id)) == csr.neighbors_of(site_id)
+    assert nbhood.as_csr() is csr
+
+
+def test_neighborhood_is_unaffected_by_graph_changes():
+    graph = rx.PyDiGraph()
+    graph.add_nodes_from([0, 1, 2])
+    graph.add_edge(0, 1, 1.0)
+    nbhood = Neighborhood(graph)
+    csr = nbhood.as_csr()
+
+    graph.add_edge(0, 2, 2.0)
+    assert nbhood.neighbors_of(0) == [1]
+    assert nbhood.as_csr().neighbors_of(0) == [1]
+    assert csr.num_edges == 1
+
+    for array in (csr.indptr, csr.indices, csr.weights):
+        with pytest.raises(ValueError):
+            array[0] = 0
+
+
+def test_csr_merges_parallel_connections_like_graph():
+    graph = rx.PyDiGraph()
+    graph.add_nodes_from([0, 1, 2])
+    graph.extend_from_weighted_edge_list([(0, 1, 1.0), (0, 2, 2.0), (0, 1, 3.0)])
+    nbhood = Neighborhood(graph)
+
+    assert nbhood.as_csr().neighbors_of(0, include_weights=True) == [(1, 3.0), (2, 2.0)]
+    assert sorted(nbhood.neighbors_of(0, include_weights=True)) == [(1, 3.0), (2, 2.0)]
+
+
+def test_csr_from_edges_and_bulk_access():
+    csr = CSRNeighborhood.from_edges(
+        [2, 0, 0, 2, 3], [1, 3, 1, 0, 0], weights=[1.0, 2.0, 3.0, 4.0, 5.0]
+    )
+    assert csr.num_sites == 4
+    assert csr.neighbors_of(0, include_weights=True) == [(3, 2.0), (1, 3.0)]
+    assert csr.neighbors_of(1) == []
+    assert list(csr.neighbor_weights(2)) == [1.0, 4.0]
+
+    offsets, nb_ids, weights = csr.neighbors_of_many([2, 1, 0], include_weights=True)
+    assert list(offsets) == [0, 2, 2, 4]
+    assert list(nb_ids) == [1, 0, 3, 1]
+    assert list(weights) == [1.0, 4.0, 2.0, 3.0]
+
+    padded, padded_weights = csr.neighbors_of_many(
+        [3, 1, 0], include_weights=True, padded=True
+    )
+    assert padded.tolist() == [[0, -1], [-1, -1], [3, 1]]
+    assert padded_weights[0, 0] == 5.0
+    assert np.isnan(padded_weights[1]).all()
+
+
+def test_neighbor_aggregations():
+    lattice = Lattice([[1, 0], [0, 1]])
+    structure = PeriodicStructure.build_from(lattice, (5, 5), [[0.5, 0.5]])
+    nbhood = DistanceNeighborhoodBuilder(1.5).get(structure)
+
+    rng = np.random.default_rng(0)
+    values = rng.random(25)
+    phases = rng.choice(["A", "B", "C"], 25)
+
+    sums = nbhood.neighbor_sum(values)
+    weighted = nbhood.neighbor_sum(values, weighted=True)
+    means = nbhood.neighbor_mean(values)
+    counts = nbhood.neighbor_counts(phases, ["A", "B", "C"])
+    majority = nbhood.neighbor_majority(phases, ["A", "B", "C"])
+
+    for site_id in structure.site_ids:
+        nbs = nbhood.neighbors_of(site_id, include_weights=True)
+        assert np.isclose(sums[site_id], sum(values[nb] for nb, _ in nbs))
+        assert np.isclose(weighted[site_id], sum(values[nb] * w for nb, w in nbs))
+        assert np.isclose(means[site_id], np.mean([values[nb] for nb, _ in nbs]))
+
+        nb_phases = [phases[nb] for nb, _ in nbs]
+        expected = [nb_phases.count(p) for p in ["A", "B", "C"]]
+        assert list(counts[site_id]) == expected
+        assert majority[site_id] == "ABC"[int(np.argmax(expected))]
+
+    assert np.array_equal(nbhood.neighbor_count(phases, "B"), counts[:, 1])
+
+
+def test_aggregation_edge_cases():
+    csr = CSRNeighborhood.from_edges([0, 0], [1, 2], num_sites=3)
+    means = csr.neighbor_mean([1.0, 2.0, 4.0])
+    assert means[0] == 3.0
+    assert np.isnan(means[1])
+    assert list(csr.neighbor_majority(["A", "B", "B"], ["A", "B"], default="-")) == [
+        "B",
+        "-",
+        "-",
+    ]
+
+
+def test_site_class_neighborhood_as_csr():
+    lattice = Lattice([[1, 0], [0, 1]])
+    motif = {"A": [[0.25, 0.25]], "B": [[0.75, 0.75]]}
+    struct = PeriodicStructure.build_from(lattice, (3, 3), motif)
+
+    nbhood = SiteClassNeighborhoodBuilder(
+        {"A": MotifNeighborhoodBuilder([(0.5, 0.5)])}
+    ).get(struct)
+    csr = nbhood.as_csr()
+    for site_id in struct.site_ids:
+        assert csr.neighbors_of(site_id) == nbhood.neighbors_of(site_id)
+
+    site_classes = np.array([struct.site_class(sid) for sid in struct.site_ids])
+    assert np.array_equal(
+        nbhood.neighbor_count(site_classes, "B"), (site_classes == "A").astype(float)
+    )
+
+
+def test_grid_neighborhood_matches_csr():
+    offsets = [(0, 1, 0), (1, 0, 0), (-1, 0, 1), (0, -2, 0), (0, 0, -1)]
+    nbhood = GridNeighborhood(
+        (4, 5, 3), (True, False, False), offsets, weights=[1, 2, 3, 4, 5]
+    )
+    csr = nbhood.as_csr()
+    assert csr.num_sites == nbhood.num_sites == 60
+    for site_id in range(60):
+        assert nbhood.neighbors_of(site_id, True) == csr.neighbors_of(site_id, True)
+
+    site_ids = [0, 17, 59, 17]
+    for padded in [False, True]:
+        for got, expected in zip(
+            nbhood.neighbors_of_many(site_ids, True, padded=padded),
+            csr.neighbors_of_many(site_ids, True, padded=padded),
+        ):
+            assert np.array_equal(got, expected, equal_nan=True)
+
+    values = np.random.default_rng(0).integers(0, 3, size=60)
+    for weighted in [False, True]:
+        assert np.allclose(
+            nbhood.neighbor_sum(values, weighted), csr.neighbor_sum(values, weighted)
+        )
+        assert np.allclose(
+            nbhood.neighbor_mean(values, weighted), csr.neighbor_mean(values, weighted)
+        )
+    assert np.array_equal(
+        nbhood.neighbor_majority(values, [0, 1, 2]),
+        csr.neighbor_majority(values, [0, 1, 2]),
+    )
+    assert nbhood.nbytes < 1000
+
+
+def test_stochastic_nbhood_shares_base_edges():
+    struct = SimpleSquare3DStructureBuilder().build(5)
+    builder = PseudoHexagonalNeighborhoodBuilder3D()
+    variants = [b.get(struct) for b in builder.builders]
+    nbhood = builder.get(struct)
+
+    assert nbhood.num_variants == 4
+    assert np.all(nbhood.base.degrees == 6)
+    assert all(np.all(extra.degrees == 2) for extra in nbhood.extras)
+    stored = nbhood.base.num_edges + sum(extra.num_edges for extra in nbhood.extras)
+    assert stored == 14 * 125
+    assert nbhood.nbytes < sum(v.nbytes for v in variants)
+
+    variant_sets = [
+        {frozenset(v.neighbors_of(site_id)) for v in variants} for site_id in range(125)
+    ]
+    for site_id in range(125):
+        assert frozenset(nbhood.neighbors_of(site_id)) in variant_sets[site_id]
+
+    for idx, variant in enumerate(variants):
+        sampled = nbhood.sample(variants=np.full(125, idx))
+        for site_id in range(125):
+            assert sorted(sampled.neighbors_of(site_id, True)) == sorted(
+                variant.neighbors_of(site_id, True)
+            )
+
+    site_ids = np.array([3, 3, 70])
+    chosen = np.array([0, 2, 1])
+    nb_ids, weights = nbhood.neighbors_of_many(
+        site_ids, include_weights=True, padded=True, variants=chosen
+    )
+    assert nb_ids.shape == weights.shape == (3, 8)
+    for row, (site_id, idx) in enumerate(zip(site_ids, chosen)):
+        assert sorted(nb_ids[row]) == sorted(variants[idx].neighbors_of(site_id))
+
+    rng = np.random.default_rng(0)
+    assert set(nbhood.choose_variants(np.arange(1000), rng=rng)) == {0, 1, 2, 3}
+
+
+def test_stochastic_nbhood_of_unsplittable_variants():
+    inner = StochasticNeighborhood(
+        [CSRNeighborhood.from_edges([0], [1]), CSRNeighborhood.from_edges([0], [2])]
+    )
+    nbhood = StochasticNeighborhood([inner, inner])
+    assert nbhood.base is None
+    assert nbhood.neighbors_of(0) in ([1], [2])
+
+
+def test_shell_views_share_storage():
+    nbhood = ShellNeighborhood.from_shell_edges(
+        sources=[0, 0, 0, 1, 2, 2],
+        targets=[3, 1, 2, 0, 1, 0],
+        weights=[2.0, 1.0, 1.0, 1.0, 2.0, 1.0],
+        shells=[1, 0, 0, 0, 1, 0],
+        shell_bounds=[1.5, 2.5],
+        num_sites=4,
+    )
+    assert nbhood.neighbors_of(0) == [1, 2, 3]
+    inner, outer = nbhood.shell(0), nbhood.shell(1)
+    assert inner.neighbors_of(0, True) == [(1, 1.0), (2, 1.0)]
+    assert outer.neighbors_of(0, True) == [(3, 2.0)]
+    assert outer.neighbors_of(3) == []
+    assert np.array_equal(outer.degrees, [1, 0, 1, 0])
+
+    offsets, nb_ids = inner.neighbors_of_many([2, 0])
+    assert offsets.tolist() == [0, 1, 3]
+    assert nb_ids.tolist() == [0, 1, 2]
+    assert np.array_equal(
+        outer.neighbor_sum(np.array([1, 10, 100, 1000])), [1000, 0, 10, 0]
+    )
+    with pytest.raises(ValueError):
+        nbhood.shell(2)
@@ -122,3 +122,71 @@ def test_partially_periodic_structure(square_2D_basis_vecs):
     assert struct.site_at((-0.5, 0.5)) is None
     assert struct.site_at((0.5, 1.5)) is not None
     assert struct.site_at((0.5, -1.5)) is not None
+
+
+def test_remove_site(square_2D_lattice):
+    struct = PeriodicStructure.build_from(square_2D_lattice, (3, 3), [[0, 0]])
+    fingerprint = struct.fingerprint
+    assert struct.tiling is not None
+
+    removed = struct.remove_site(4)
+    assert removed["_site_id"] == 4
+    assert struct.site_at((1, 1)) is None
+    assert 4 not in struct.site_ids
+    assert struct.ids_at([[1, 1], [2, 1]]).tolist() == [-1, 7]
+    assert struct.fingerprint != fingerprint
+    assert struct.tiling is None
+
+    # IDs are not reused
+    assert struct.add_site("A", (1, 1)) == 9
+    assert struct.id_limit == 10
+    with pytest.raises(ValueError):
+        struct.remove_site(4)
+
+
+def test_serialization_keeps_site_ids(square_2D_lattice):
+    struct = PeriodicStructure.build_from(square_2D_lattice, (3, 3), [[0, 0]])
+    struct.remove_site(4)
+    struct.remove_site(8)
+
+    reproduced = PeriodicStructure.from_dict(struct.as_dict())
+    assert reproduced.site_ids == struct.site_ids
+    assert reproduced.id_limit == 9
+    assert reproduced.fingerprint == struct.fingerprint
+    assert (reproduced.site_location(5) == struct.site_location(5)).all()
+    assert reproduced.site_at((1, 1)) is None
+    assert reproduced.add_site("A", (1, 1)) == 9
+
+
+def test_cell_list_kept_up_to_date():
+    struct = PeriodicStructure.build_from(Lattice([[1, 0], [0, 1]]), (5, 5), [[0, 0]])
+    cell_list = struct.cell_list(1.0)
+    assert struct.cell_list(1) is cell_list
+    assert len(cell_list) == 25
+
+    ids, dists = struct.sites_within((0, 0), 1.0)
+    assert ids.tolist() == [0, 1, 4, 5, 20]
+    assert dists.tolist() == [0, 1, 1, 1, 1]
+
+    new_id = struct.add_site("B", (0.5, 0))
+    struct.remove_site(0)
+    assert len(cell_list) == 25
+    ids, dists = struct.sites_within((0, 0), 1.0)
+    assert ids.tolist() == [1, 4, 5, 20, new_id]
+    assert dists.tolist() == [1, 1, 1, 1, 0.5]
+
+
+def test_single_cell_list_is_cached():
+    struct = PeriodicStructure.build_from(Lattice([[1, 0], [0, 1]]), (8, 8), [[0, 0]])
+    cell_list = struct.cell_list(2.0)
+    assert struct.cell_list(1.2) is cell_list
+
+    ids, dists = struct.sites_within((0, 0), 1.0)
+    assert ids.tolist() == [0, 1, 7, 8, 56]
+    assert dists.tolist() == [0, 1, 1, 1, 1]
+
+    # Much smaller or larger radii replace the cached CellList
+    assert struct.cell_list(0.5) is not cell_list
+    assert struct.cell_list(3.0).radius == 3.0
+    struct.add_site("B", (0.5, 0.5))
+    assert len(struct.cell_list(3.0)) == 65
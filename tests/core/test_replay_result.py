@@ -0,0 +1,119 @@
+import pytest
+
+import random
+
+import numpy as np
+from monty.serialization import dumpfn, loadfn
+
+from pylattica.core import (
+    AsynchronousRunner,
+    BasicController,
+    SimulationState,
+    SynchronousRunner,
+)
+from pylattica.core.replay_result import ReplayableSimulationResult, run_replayable
+
+
+class NoisyController(BasicController):
+    def get_state_update(self, site_id: int, prev_state: SimulationState):
+        prev = prev_state.get_site_state(site_id)["value"]
+        if random.random() < 0.3:
+            return {site_id: {"value": prev + int(np.random.randint(1, 4))}}
+        return {}
+
+
+@pytest.fixture
+def initial_state():
+    state = SimulationState()
+    for site_id in range(16):
+        state.set_site_state(site_id, {"value": 0})
+    return state
+
+
+def reference_run(runner, initial_state, num_steps, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    controller = NoisyController()
+    controller.pre_run(initial_state)
+    return runner.run(initial_state, controller, num_steps)
+
+
+@pytest.mark.parametrize("runner_cls", [SynchronousRunner, AsynchronousRunner])
+def test_replay_matches_recorded_run(initial_state, runner_cls):
+    reference = reference_run(runner_cls(), initial_state, 120, seed=7)
+    replayable = run_replayable(
+        runner_cls(),
+        initial_state,
+        NoisyController(),
+        120,
+        keyframe_interval=25,
+        seed=7,
+    )
+
+    assert len(replayable) == len(reference)
+    assert replayable.get_diffs() == reference.get_diffs()
+    assert sorted(replayable._keyframes) == [0, 25, 50, 75, 100]
+    for step_no in [0, 1, 24, 25, 26, 99, 119, 120]:
+        assert replayable.get_step(step_no) == reference.get_step(step_no)
+    for a, b in zip(replayable.steps(), reference.steps()):
+        assert a == b
+    assert replayable.verify()
+
+
+def test_replay_does_not_disturb_callers_rng(initial_state):
+    result = run_replayable(
+        SynchronousRunner(), initial_state, NoisyController(), 50, keyframe_interval=20
+    )
+    random.seed(3)
+    expected = random.random()
+    random.seed(3)
+    result.get_step(33)
+    assert random.random() == expected
+
+
+def test_load_steps(initial_state):
+    result = run_replayable(
+        SynchronousRunner(), initial_state, NoisyController(), 90, keyframe_interval=30
+    )
+    result.load_steps(interval=10)
+    assert sorted(result._stored_states) == list(range(0, 91, 10))
+
+
+def test_serialization_requires_attach(initial_state, tmp_path):
+    result = run_replayable(
+        SynchronousRunner(),
+        initial_state,
+        NoisyController(),
+        100,
+        keyframe_interval=40,
+        seed=1,
+    )
+    fpath = str(tmp_path / "replay.json")
+    dumpfn(result, fpath)
+    loaded = loadfn(fpath)
+
+    assert isinstance(loaded, ReplayableSimulationResult)
+    assert loaded.last_step == result.last_step
+    assert loaded.get_step(40) == result.get_step(40)
+    with pytest.raises(ValueError, match="attach"):
+        loaded.get_step(41)
+
+    loaded.attach(SynchronousRunner(), NoisyController())
+    assert loaded.get_step(63) == result.get_step(63)
+    assert loaded.verify()
+
+
+def test_detects_divergence(initial_state):
+    result = run_replayable(
+        SynchronousRunner(), initial_state, NoisyController(), 60, keyframe_interval=20
+    )
+    result._rng_states[20] = result._rng_states[0]
+    with pytest.raises(RuntimeError, match="did not reproduce"):
+        result.verify()
+
+
+def test_rejects_parallel_runner(initial_state):
+    with pytest.raises(ValueError, match="Parallel"):
+        run_replayable(
+            SynchronousRunner(parallel=True), initial_state, NoisyController(), 5
+        )
@@ -0,0 +1,93 @@
+import pytest
+
+import json
+import random
+
+from pylattica.core import SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.result_codecs import (
+    ColumnarBlockCodec,
+    JsonBlockCodec,
+    get_codec,
+)
+
+
+@pytest.fixture
+def mixed_diffs():
+    return [
+        {1: {"a": 1, "phase": "X"}, 2: {"b": 0.25}},
+        {SITES: {3: {"a": -7}}, GENERAL: {"t": 1, "label": "hot"}},
+        {SITES: {}, GENERAL: {}},
+        {GENERAL: {"t": 2}},
+        {},
+        {4: {}},
+        {5: {"flag": True, "none": None, "vec": [1, 2, 3], "nested": {"x": 1}}},
+        {6: {"a": 2**40, "b": 1.5e300, "phase": "Y"}},
+    ]
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+@pytest.mark.parametrize("codec_name", ["json", "columnar"])
+def test_diffs_round_trip(mixed_diffs, codec_name, compression):
+    codec = get_codec(codec_name, compression=compression)
+    assert codec.decode_diffs(codec.encode_diffs(mixed_diffs)) == mixed_diffs
+
+
+@pytest.mark.parametrize("codec_name", ["json", "columnar"])
+def test_state_round_trip(codec_name):
+    state = SimulationState()
+    for site_id in range(10):
+        state.set_site_state(site_id, {"phase": random.choice("ABC"), "v": site_id})
+    state.set_general_state({"temperature": 300.0})
+
+    codec = get_codec(codec_name)
+    decoded = codec.decode_state(codec.encode_state(state.get_state()))
+    assert SimulationState(decoded) == state
+
+
+@pytest.mark.parametrize("diffs", [[], [{}], [{GENERAL: {"t": 1}}]])
+def test_columnar_round_trip_without_site_values(diffs):
+    codec = ColumnarBlockCodec()
+    assert codec.decode_diffs(codec.encode_diffs(diffs)) == diffs
+
+
+def test_columnar_values_keep_types():
+    codec = ColumnarBlockCodec()
+    diffs = [{0: {"v": 1}}, {0: {"v": 1.0}}, {0: {"v": True}}]
+    decoded = codec.decode_diffs(codec.encode_diffs(diffs))
+
+    assert [type(d[0]["v"]) for d in decoded] == [int, float, bool]
+
+
+def test_columnar_decoded_containers_are_independent():
+    codec = ColumnarBlockCodec()
+    diffs = [{0: {"v": [1]}}, {1: {"v": [1]}}]
+    decoded = codec.decode_diffs(codec.encode_diffs(diffs))
+    decoded[0][0]["v"].append(2)
+
+    assert decoded[1][1]["v"] == [1]
+
+
+def test_columnar_is_compact():
+    diffs = [
+        {random.randint(0, 10000): {"phase": random.choice(["alpha", "beta"])}}
+        for _ in range(2000)
+    ]
+    columnar = ColumnarBlockCodec().encode_diffs(diffs)
+    as_json = JsonBlockCodec().encode_diffs(diffs)
+
+    assert len(columnar) * 2 < len(as_json)
+    assert len(ColumnarBlockCodec("zlib").encode_diffs(diffs)) < len(columnar)
+
+
+def test_unknown_codec_or_compression():
+    with pytest.raises(ValueError, match="Unknown result codec"):
+        get_codec("msgpack")
+
+    with pytest.raises(ValueError, match="Unknown compression"):
+        get_codec("json", compression="bz2")
+
+
+def test_json_codec_matches_json():
+    diffs = [{1: {"a": 1}}]
+    assert json.loads(JsonBlockCodec().encode_diffs(diffs)) == [{"1": {"a": 1}}]
@@ -0,0 +1,205 @@
+import pytest
+
+import os
+import random
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.simulation_result import LazySimulationResult
+from pylattica.core.result_file import (
+    ResultFileReader,
+    is_result_file,
+    write_result_file,
+)
+
+from helpers.helpers import skip_windows_due_to_parallel
+
+
+@pytest.fixture
+def long_result():
+    state = SimulationState()
+    for site_id in range(20):
+        state.set_site_state(site_id, {"a": 0, "phase": "X"})
+
+    result = SimulationResult(state)
+    for step in range(250):
+        site_id = random.randint(0, 19)
+        if step % 3 == 0:
+            result.add_step({site_id: {"a": step, "phase": random.choice("XYZ")}})
+        else:
+            result.add_step(
+                {SITES: {site_id: {"a": random.random()}}, GENERAL: {"t": step}}
+            )
+    return result
+
+
+def test_round_trip_indexed_file(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    long_result.to_file(fpath)
+
+    assert is_result_file(fpath)
+    loaded = SimulationResult.from_file(fpath)
+    assert isinstance(loaded, LazySimulationResult)
+    assert loaded.as_dict() == long_result.as_dict()
+
+
+def test_open_reads_only_header(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=50)
+
+    loaded = LazySimulationResult.open(fpath)
+    assert len(loaded) == len(long_result)
+    assert loaded.live_state == long_result.live_state
+    assert loaded.last_step == long_result.last_step
+    assert len(loaded._diffs._cache) == 0
+
+
+def test_random_access_decodes_one_segment(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=50)
+    loaded = LazySimulationResult.open(fpath)
+
+    for step_no in [0, 1, 49, 50, 51, 173, 249, 250]:
+        assert loaded.get_step(step_no) == long_result.get_step(step_no)
+
+    loaded._diffs._cache.clear()
+    loaded.get_step(173)
+    assert list(loaded._diffs._cache.keys()) == [3]
+
+
+def test_diff_range(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=30)
+    loaded = LazySimulationResult.open(fpath)
+
+    assert loaded.get_diff_range(25, 95) == long_result.get_diff_range(25, 95)
+    assert loaded.get_diff_range(0, 250) == long_result.get_diffs()
+
+    with pytest.raises(ValueError, match="Cannot retrieve diffs"):
+        loaded.get_diff_range(0, 251)
+
+
+def test_steps_and_load_steps(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=40)
+    loaded = LazySimulationResult.open(fpath)
+
+    for orig, lazy in zip(long_result.steps(), loaded.steps()):
+        assert orig == lazy
+
+    loaded.load_steps(interval=10)
+    assert len(loaded._stored_states) == 26
+
+
+@skip_windows_due_to_parallel
+def test_load_steps_parallel(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=40)
+    loaded = LazySimulationResult.open(fpath)
+    loaded.add_step({3: {"a": -1}})
+    long_result.add_step({3: {"a": -1}})
+
+    loaded.load_steps(interval=3, parallel=True, workers=2)
+    long_result.load_steps(interval=3)
+    assert loaded._stored_states == long_result._stored_states
+
+
+def test_keyframe_interval_from_result(long_result, tmp_path):
+    long_result.keyframe_interval = 25
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath)
+
+    loaded = LazySimulationResult.open(fpath)
+    assert loaded.keyframe_interval == 25
+    assert loaded._segment_starts() == list(range(0, 250, 25))
+
+
+def test_checkpointed_result(tmp_path):
+    result = SimulationResult(SimulationState(), max_history=20)
+    for step in range(100):
+        result.add_step({0: {"value": step}})
+
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(result, fpath, keyframe_interval=7)
+    loaded = SimulationResult.from_file(fpath)
+
+    assert loaded.earliest_available_step == result.earliest_available_step
+    for step_no in range(result.earliest_available_step, len(result)):
+        assert loaded.get_step(step_no) == result.get_step(step_no)
+
+    with pytest.raises(ValueError, match="Cannot retrieve step"):
+        loaded.get_step(0)
+
+
+def test_live_compress_result(tmp_path):
+    result = SimulationResult(SimulationState(), compress_freq=5, live_compress=True)
+    for step in range(23):
+        result.add_step({0: {"value": step}})
+
+    fpath = str(tmp_path / "result.plr")
+    result.to_file(fpath)
+    loaded = SimulationResult.from_file(fpath)
+
+    assert sorted(loaded._frames.keys()) == [0, 5, 10, 15, 20]
+    assert loaded.get_step(15) == result.get_step(15)
+    assert loaded.live_state.get_site_state(0)["value"] == 22
+    assert loaded.as_dict() == result.as_dict()
+
+
+@pytest.mark.parametrize(
+    "codec,compression", [("json", None), ("columnar", "zlib"), ("columnar", "lzma")]
+)
+def test_codecs_and_compression(long_result, tmp_path, codec, compression):
+    fpath = str(tmp_path / "result.plr")
+    long_result.to_file(
+        fpath, codec=codec, compression=compression, keyframe_interval=64
+    )
+    loaded = SimulationResult.from_file(fpath)
+
+    assert loaded.as_dict() == long_result.as_dict()
+    assert loaded.get_step(100) == long_result.get_step(100)
+
+
+def test_binary_file_is_smaller_than_json(long_result, tmp_path):
+    json_path = str(tmp_path / "result.json")
+    binary_path = str(tmp_path / "result.plr")
+    long_result.to_file(json_path)
+    long_result.to_file(binary_path, compression="zlib")
+
+    assert os.path.getsize(binary_path) < os.path.getsize(json_path)
+
+
+def test_extend_loaded_result(long_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=50)
+    loaded = LazySimulationResult.open(fpath)
+
+    loaded.add_step({3: {"a": -1}})
+    long_result.add_step({3: {"a": -1}})
+
+    assert len(loaded) == len(long_result)
+    assert loaded.get_step(251) == long_result.get_step(251)
+    assert loaded.get_step(250) == long_result.get_step(250)
+
+
+def test_rejects_other_files(tmp_path, long_result):
+    fpath = str(tmp_path / "result.json")
+    long_result.to_file(fpath)
+
+    assert not is_result_file(fpath)
+    with pytest.raises(ValueError, match="not a pylattica result file"):
+        ResultFileReader(fpath)
+
+
+def test_site_history_rebuilt_from_file(long_result, tmp_path):
+    long_result.track_site_history = True
+    long_result._site_history = None
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(long_result, fpath, keyframe_interval=40)
+
+    loaded = LazySimulationResult.open(fpath)
+    assert loaded.site_history(3) == long_result.site_history(3)
+    steps, values = loaded.site_trajectory([3, 4], "phase")
+    expected_steps, expected_values = long_result.site_trajectory([3, 4], "phase")
+    assert list(steps) == list(expected_steps)
+    assert values.tolist() == expected_values.tolist()
@@ -0,0 +1,128 @@
+import pytest
+
+import random
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.result_file import write_result_file
+from pylattica.core.simulation_result import LazySimulationResult
+from pylattica.core.result_sampling import (
+    ChangeThresholdSampling,
+    LogarithmicSampling,
+    UniformSampling,
+    downsample_result,
+)
+
+
+@pytest.fixture
+def phase_result():
+    state = SimulationState()
+    for site_id in range(50):
+        state.set_site_state(site_id, {"phase": "A", "a": 0})
+
+    result = SimulationResult(state)
+    for step in range(400):
+        site_id = random.randint(0, 49)
+        if step % 5 == 0:
+            result.add_step({SITES: {site_id: {"a": step}}, GENERAL: {"t": step}})
+        else:
+            result.add_step({site_id: {"phase": random.choice("AB")}})
+    return result
+
+
+def assert_matches(downsampled, kept_steps, result):
+    assert len(downsampled) == len(kept_steps)
+    for idx, step_no in enumerate(kept_steps):
+        assert downsampled.get_step(idx) == result.get_step(step_no)
+
+
+def test_uniform_sampling(phase_result):
+    downsampled, kept = downsample_result(
+        phase_result, UniformSampling(interval=40), return_steps=True
+    )
+
+    assert kept == list(range(0, 401, 40))
+    assert downsampled.compress_freq == 40
+    assert_matches(downsampled, kept, phase_result)
+
+
+def test_logarithmic_sampling(phase_result):
+    downsampled, kept = downsample_result(
+        phase_result, LogarithmicSampling(num_steps=12), return_steps=True
+    )
+
+    assert kept[:3] == [0, 1, 2]
+    assert kept[-1] == 400
+    assert len(kept) <= 13
+    spacings = [b - a for a, b in zip(kept, kept[1:])]
+    assert spacings[-1] > spacings[0]
+    assert_matches(downsampled, kept, phase_result)
+
+
+def test_change_threshold_sampling(phase_result):
+    downsampled, kept = downsample_result(
+        phase_result,
+        ChangeThresholdSampling(0.1, key="phase"),
+        return_steps=True,
+    )
+    assert_matches(downsampled, kept, phase_result)
+
+    for prev, curr in zip(kept, kept[1:-1]):
+        before = phase_result.get_step(prev)
+        after = phase_result.get_step(curr)
+        changed = [
+            s
+            for s in range(50)
+            if before.get_site_state(s)["phase"] != after.get_site_state(s)["phase"]
+        ]
+        assert len(changed) >= 5
+
+
+def test_change_threshold_max_interval():
+    result = SimulationResult(SimulationState({SITES: {0: {"value": 0}}, GENERAL: {}}))
+    for step in range(100):
+        result.add_step({0: {"value": 0}})
+
+    _, kept = downsample_result(
+        result, ChangeThresholdSampling(0.5, max_interval=30), return_steps=True
+    )
+    assert kept == [0, 30, 60, 90, 100]
+
+
+def test_emits_minimal_diffs():
+    result = SimulationResult(SimulationState({SITES: {0: {"v": 0}}, GENERAL: {}}))
+    result.add_step({0: {"v": 1}})
+    result.add_step({0: {"v": 0}, 1: {"v": 5}})
+    result.add_step({1: {"v": 6}})
+
+    downsampled = downsample_result(result, UniformSampling(interval=2))
+    assert downsampled.get_diffs() == [{1: {"v": 5}}, {1: {"v": 6}}]
+
+
+def test_lazy_result(phase_result, tmp_path):
+    fpath = str(tmp_path / "result.plr")
+    write_result_file(phase_result, fpath, keyframe_interval=64)
+    loaded = LazySimulationResult.open(fpath)
+
+    from_disk = downsample_result(loaded, UniformSampling(num_steps=10))
+    in_memory = downsample_result(phase_result, UniformSampling(num_steps=10))
+    assert from_disk.as_dict() == in_memory.as_dict()
+
+
+def test_live_compress_result():
+    result = SimulationResult(SimulationState(), compress_freq=5, live_compress=True)
+    for step in range(100):
+        result.add_step({step % 3: {"value": step}})
+
+    downsampled, kept = downsample_result(
+        result, UniformSampling(interval=12), return_steps=True
+    )
+    assert kept == [0, 15, 25, 40, 50, 60, 75, 85, 100]
+    assert_matches(downsampled, kept, result)
+
+
+def test_uniform_requires_one_argument():
+    with pytest.raises(ValueError, match="Exactly one"):
+        UniformSampling()
+    with pytest.raises(ValueError, match="Exactly one"):
+        UniformSampling(interval=2, num_steps=3)
@@ -0,0 +1,156 @@
+import pytest
+
+import random
+
+from maggma.stores import JSONStore, MemoryStore
+
+from pylattica.core import (
+    BasicController,
+    SimulationResult,
+    SimulationState,
+    SynchronousRunner,
+)
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.result_store import (
+    StoreSimulationResult,
+    find_runs,
+    write_result_to_store,
+)
+
+
+class IncrementController(BasicController):
+    def __init__(self, amount=1):
+        self.amount = amount
+
+    def get_state_update(self, site_id: int, prev_state: SimulationState):
+        prev = prev_state.get_site_state(site_id)["value"]
+        return {site_id: {"value": prev + self.amount}}
+
+
+@pytest.fixture
+def store():
+    store = MemoryStore()
+    store.connect()
+    return store
+
+
+@pytest.fixture
+def result():
+    state = SimulationState()
+    for site_id in range(10):
+        state.set_site_state(site_id, {"value": 0})
+
+    result = SimulationResult(state)
+    for step in range(250):
+        if step % 7 == 0:
+            result.add_step({SITES: {step % 10: {"value": step}}, GENERAL: {"t": step}})
+        else:
+            result.add_step({random.randint(0, 9): {"value": step}})
+    return result
+
+
+def test_round_trip(store, result):
+    write_result_to_store(result, store, "run-1", chunk_size=40)
+    loaded = StoreSimulationResult.open(store, "run-1")
+
+    assert len(loaded) == len(result)
+    assert loaded.last_step == result.last_step
+    assert loaded.get_diffs() == result.get_diffs()
+    for step_no in [0, 1, 39, 40, 41, 133, 249, 250]:
+        assert loaded.get_step(step_no) == result.get_step(step_no)
+    assert loaded.load_steps(interval=25) == result.load_steps(interval=25)
+    assert SimulationResult.from_dict(loaded.as_dict()).get_diffs() == (
+        result.get_diffs()
+    )
+
+
+def test_chunks_are_written_during_run(store):
+    state = SimulationState()
+    for site_id in range(5):
+        state.set_site_state(site_id, {"value": 0})
+    controller = IncrementController()
+
+    stored = StoreSimulationResult.create(
+        store, "live", state, controller=controller, chunk_size=3
+    )
+    SynchronousRunner().run(None, controller, 10, result=stored)
+    assert store.count({"run_id": "live", "doc_type": "chunk"}) == 3
+    assert find_runs(store)[0]["status"] == "running"
+
+    stored.finalize(summary={"mean_value": 10.0})
+    assert store.count({"run_id": "live", "doc_type": "chunk"}) == 4
+
+    loaded = StoreSimulationResult.open(store, "live")
+    assert loaded.last_step.get_site_state(0)["value"] == 10
+    assert loaded.get_step(4).get_site_state(3)["value"] == 4
+
+    (run_doc,) = find_runs(store)
+    assert run_doc["status"] == "completed"
+    assert run_doc["total_steps"] == 10
+    assert run_doc["controller"].endswith("IncrementController")
+    assert run_doc["summary"] == {"mean_value": 10.0}
+
+
+def test_partial_load_reads_one_chunk(store, result, monkeypatch):
+    write_result_to_store(result, store, "run-1", chunk_size=20)
+    loaded = StoreSimulationResult.open(store, "run-1")
+
+    loaded_chunks = []
+    load_chunk = loaded._load_chunk
+
+    def counting_load(chunk_idx):
+        loaded_chunks.append(chunk_idx)
+        return load_chunk(chunk_idx)
+
+    monkeypatch.setattr(loaded, "_load_chunk", counting_load)
+    assert loaded.get_step(135) == result.get_step(135)
+    assert set(loaded_chunks) == {6}
+
+
+def test_find_runs_by_metadata(store, result):
+    for temp in [300, 600, 900]:
+        write_result_to_store(
+            result,
+            store,
+            f"run-{temp}",
+            parameters={"temperature": temp},
+            summary={"final_t": temp // 100},
+        )
+
+    hot = find_runs(store, {"parameters.temperature": {"$gt": 500}})
+    assert sorted(doc["run_id"] for doc in hot) == ["run-600", "run-900"]
+    assert "final_state" not in hot[0]
+
+    ids = find_runs(store, {"summary.final_t": 3}, properties=["run_id"])
+    assert [doc["run_id"] for doc in ids] == ["run-300"]
+
+
+def test_json_store(tmp_path, result):
+    fpath = str(tmp_path / "runs.json")
+    store = JSONStore(fpath, read_only=False)
+    store.connect()
+    write_result_to_store(result, store, "run-1", chunk_size=100)
+
+    reopened = JSONStore(fpath)
+    reopened.connect()
+    loaded = StoreSimulationResult.open(reopened, "run-1")
+    assert loaded.get_step(180) == result.get_step(180)
+
+
+def test_live_compress_result(store):
+    result = SimulationResult(SimulationState(), compress_freq=5, live_compress=True)
+    for step in range(30):
+        result.add_step({step % 3: {"value": step}})
+
+    loaded = write_result_to_store(result, store, "frames", chunk_size=2)
+    assert len(loaded) == 7
+    for idx, step_no in enumerate(range(0, 31, 5)):
+        assert loaded.get_step(idx) == result.get_step(step_no)
+
+
+def test_duplicate_and_missing_runs(store, result):
+    write_result_to_store(result, store, "run-1")
+    with pytest.raises(ValueError, match="already contains"):
+        StoreSimulationResult.create(store, "run-1", result.first_step)
+    with pytest.raises(ValueError, match="no run"):
+        StoreSimulationResult.open(store, "run-2")
@@ -0,0 +1,156 @@
+import pytest
+
+import random
+
+from pylattica.core import (
+    AsynchronousRunner,
+    BasicController,
+    SimulationResult,
+    SimulationState,
+    SynchronousRunner,
+)
+from pylattica.core.simulation_result import SimulationResultView
+
+from helpers.helpers import skip_windows_due_to_parallel
+
+
+class IncrementController(BasicController):
+    def __init__(self, amount=1):
+        self.amount = amount
+
+    def get_state_update(self, site_id: int, prev_state: SimulationState):
+        prev = prev_state.get_site_state(site_id)["value"]
+        return {site_id: {"value": prev + self.amount}}
+
+
+@pytest.fixture
+def result():
+    state = SimulationState()
+    for site_id in range(10):
+        state.set_site_state(site_id, {"value": 0})
+
+    result = SimulationResult(state)
+    for step in range(200):
+        result.add_step({random.randint(0, 9): {"value": step}})
+    return result
+
+
+def test_index_returns_steps(result):
+    assert result[0] == result.first_step
+    assert result[57] == result.get_step(57)
+    assert result[-1] == result.last_step
+    with pytest.raises(IndexError):
+        result[201]
+
+
+@pytest.mark.parametrize(
+    "key", [slice(10, 50), slice(10, 150, 7), slice(None, None, 20), slice(-30, None)]
+)
+def test_slice_view(result, key):
+    view = result[key]
+    step_numbers = list(range(len(result)))[key]
+
+    assert isinstance(view, SimulationResultView)
+    assert view.step_numbers == step_numbers
+    assert len(view) == len(step_numbers)
+    assert view.first_step == result.get_step(step_numbers[0])
+    assert view.last_step == result.get_step(step_numbers[-1])
+    for state, step_no in zip(view.steps(), step_numbers):
+        assert state == result.get_step(step_no)
+
+
+def test_view_shares_diffs(result):
+    view = result[20:60]
+    diffs = view.get_diffs()
+
+    assert len(diffs) == 39
+    for diff, original in zip(diffs, result.get_diffs()[20:59]):
+        assert diff is original
+
+
+def test_nested_and_reversed_views(result):
+    nested = result[10:190:3][5:20:2]
+    assert nested.step_numbers == list(range(10, 190, 3))[5:20:2]
+    assert nested[1] == result.get_step(nested.step_numbers[1])
+
+    reverse = result[100:40:-10]
+    assert [s for s in reverse] == [result.get_step(i) for i in range(100, 40, -10)]
+
+
+@pytest.mark.parametrize("key", [slice(30, 181, 10), slice(90, 10, -8)])
+def test_view_to_result(result, key):
+    view = result[key]
+    materialized = view.to_result()
+
+    assert len(materialized) == len(view)
+    for idx, step_no in enumerate(view.step_numbers):
+        assert materialized.get_step(idx) == result.get_step(step_no)
+
+
+def test_extend_continues_in_place():
+    state = SimulationState()
+    for site_id in range(4):
+        state.set_site_state(site_id, {"value": 0})
+
+    runner = SynchronousRunner()
+    result = runner.run(state, IncrementController(), 5)
+    same = result.extend(runner, IncrementController(amount=10), 3)
+
+    assert same is result
+    assert len(result) == 9
+    assert result.get_step(5).get_site_state(0)["value"] == 5
+    assert result.last_step.get_site_state(2)["value"] == 35
+    assert result[5:].get_diffs() == result.get_diffs()[5:]
+
+
+def test_extend_live_compress_result_from_file(tmp_path):
+    state = SimulationState()
+    for site_id in range(4):
+        state.set_site_state(site_id, {"value": 0})
+
+    runner = SynchronousRunner()
+    result = SimulationResult(state, compress_freq=5, live_compress=True)
+    result.extend(runner, IncrementController(), 12)
+    fpath = str(tmp_path / "result.plr")
+    result.to_file(fpath)
+
+    loaded = SimulationResult.from_file(fpath)
+    loaded.extend(runner, IncrementController(), 8)
+    result.extend(runner, IncrementController(), 8)
+
+    assert sorted(loaded.frames) == [0, 5, 10, 15, 20]
+    for step_no in loaded.frames:
+        assert loaded.get_step(step_no) == result.get_step(step_no)
+    assert loaded.last_step.get_site_state(0)["value"] == 20
+
+    extended_fpath = str(tmp_path / "extended.plr")
+    loaded.to_file(extended_fpath)
+    assert SimulationResult.from_file(extended_fpath).as_dict() == result.as_dict()
+
+
+def test_extend_async():
+    state = SimulationState()
+    for site_id in range(4):
+        state.set_site_state(site_id, {"value": 0})
+
+    runner = AsynchronousRunner()
+    result = runner.run(state, IncrementController(), 10)
+    result.extend(runner, IncrementController(), 10)
+
+    assert len(result) == 21
+    total = sum(s["value"] for s in result.last_step.all_site_states())
+    assert total == 20
+
+
+@skip_windows_due_to_parallel
+def test_extend_parallel():
+    state = SimulationState()
+    for site_id in range(8):
+        state.set_site_state(site_id, {"value": 0})
+
+    result = SynchronousRunner().run(state, IncrementController(), 4)
+    result.extend(SynchronousRunner(parallel=True, workers=2), IncrementController(), 4)
+
+    assert len(result) == 9
+    for site_state in result.last_step.all_site_states():
+        assert site_state["value"] == 8
@@ -41,3 +41,18 @@ def test_serialization(square_2x2_2D_grid_in_test: PeriodicStructure):
     os.remove(fname)
     assert sim2.state._state == state._state
     assert sim2.structure._sites == sim2.structure._sites
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_binary_serialization(square_2x2_2D_grid_in_test, tmp_path, compression):
+    state = SimulationState()
+    for site_id in square_2x2_2D_grid_in_test.site_ids:
+        state.set_site_state(site_id, {"phase": "A", "energy": site_id * 0.5})
+    sim = Simulation(state, square_2x2_2D_grid_in_test)
+
+    fname = str(tmp_path / "simulation.pls")
+    sim.to_file(fname, compression=compression)
+    sim2 = Simulation.from_file(fname)
+
+    assert sim2.state == state
+    assert sim2.as_dict() == sim.as_dict()
@@ -2,9 +2,15 @@ import pytest
 
 import random
 import os
+
+import numpy as np
+
 from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
 from pylattica.core.simulation_result import compress_result
 
+from helpers.helpers import skip_windows_due_to_parallel
+
 
 @pytest.fixture
 def initial_state():
@@ -135,6 +141,9 @@ def test_max_history_creates_checkpoint(initial_state):
     assert result._checkpoint_state is not None
     assert result._checkpoint_step > 0
     assert result.earliest_available_step == result._checkpoint_step
+    assert result.checkpoint_step == result._checkpoint_step
+    assert result.checkpoint_state is result._checkpoint_state
+    assert result.total_steps == 100
 
 
 def test_max_history_get_step_recent(initial_state):
@@ -313,6 +322,9 @@ def test_live_compress_stores_frames(initial_state):
     assert 10 in result._frames
     assert 20 in result._frames
     assert 25 not in result._frames  # Not a multiple of 10
+    assert sorted(result.frames) == [0, 10, 20]
+    with pytest.raises(TypeError):
+        result.frames[30] = result.live_state
 
     # Diffs should be empty in live_compress mode
     assert len(result._diffs) == 0
@@ -455,3 +467,147 @@ def test_output_property(initial_state):
 
     # output should be same as live_state
     assert result.output is result.live_state
+
+
+def test_keyframes_stored_at_interval(initial_state):
+    result = SimulationResult(initial_state, keyframe_interval=10)
+    for step in range(35):
+        result.add_step({0: {"value": step}})
+
+    assert list(result._keyframes.keys()) == [10, 20, 30]
+    assert result._replay_start(27)[0] == 20
+    assert result.get_step(27).get_site_state(0)["value"] == 26
+
+    restored = SimulationResult.from_dict(result.as_dict())
+    assert restored.keyframe_interval == 10
+    assert list(restored._keyframes.keys()) == [10, 20, 30]
+
+
+def test_storage_options_are_keyword_only(initial_state):
+    with pytest.raises(TypeError):
+        SimulationResult(initial_state, 1, None, False, 10)
+
+
+def test_keyframes_dropped_with_checkpoint(initial_state):
+    result = SimulationResult(initial_state, max_history=20, keyframe_interval=5)
+    for step in range(100):
+        result.add_step({0: {"value": step}})
+
+    assert min(result._keyframes) > result.earliest_available_step
+    for step_no in range(result.earliest_available_step, len(result)):
+        assert result.get_step(step_no).get_site_state(0)["value"] == step_no - 1
+
+
+def test_map_steps(random_result_big):
+    values = random_result_big.map_steps(lambda s: s.get_site_state(3), interval=7)
+
+    assert list(values.keys()) == list(range(0, 1000, 7))
+    for step_no in [0, 7, 497, 994]:
+        assert values[step_no] == random_result_big.get_step(step_no).get_site_state(3)
+
+
+@skip_windows_due_to_parallel
+@pytest.mark.parametrize("keyframe_interval", [None, 100])
+def test_load_steps_parallel(initial_state, keyframe_interval):
+    result = SimulationResult(initial_state, keyframe_interval=keyframe_interval)
+    for _ in range(999):
+        result.add_step({random.randint(0, 10): {"a": random.random()}})
+
+    result.load_steps(interval=1)
+    serial = dict(result._stored_states)
+
+    result.load_steps(interval=1, parallel=True, workers=3)
+    assert result._stored_states == serial
+    assert list(result._stored_states.keys()) == list(range(1000))
+
+
+@skip_windows_due_to_parallel
+def test_map_steps_parallel_with_checkpoint(initial_state):
+    result = SimulationResult(initial_state, max_history=200, keyframe_interval=30)
+    for step in range(500):
+        result.add_step({step % 7: {"value": step}})
+
+    def values(state):
+        return [state.get_site_state(site)["value"] for site in range(7)]
+
+    serial = result.map_steps(values, interval=4)
+    parallel = result.map_steps(values, interval=4, parallel=True)
+    assert parallel == serial
+    assert min(parallel) == result.earliest_available_step
+
+
+@pytest.fixture
+def tracked_result(initial_state):
+    for site_id in range(10):
+        initial_state.set_site_state(site_id, {"phase": "A", "a": 0})
+    result = SimulationResult(initial_state.copy(), track_site_history=True)
+    for step in range(300):
+        site_id = random.randint(0, 9)
+        if step % 2 == 0:
+            result.add_step({site_id: {"phase": random.choice("ABC")}})
+        else:
+            result.add_step({SITES: {site_id: {"a": step}}, GENERAL: {"t": step}})
+    return result
+
+
+def test_site_history_index(tracked_result):
+    diffs = tracked_result.get_diffs()
+    for site_id in range(10):
+        expected = [
+            step_no
+            for step_no, diff in enumerate(diffs, start=1)
+            if site_id in diff.get(SITES, diff)
+        ]
+        assert tracked_result.site_history(site_id) == expected
+
+    restored = SimulationResult.from_dict(tracked_result.as_dict())
+    assert restored.site_history(4) == tracked_result.site_history(4)
+
+
+def test_site_history_requires_tracking(random_result_small):
+    with pytest.raises(ValueError, match="does not track site history"):
+        random_result_small.site_history(0)
+
+
+@pytest.mark.parametrize("tracked", [True, False])
+def test_site_trajectory(tracked_result, tracked):
+    tracked_result.track_site_history = tracked
+    if not tracked:
+        tracked_result._site_history = None
+
+    site_ids = [2, 5, 7]
+    steps, values = tracked_result.site_trajectory(site_ids, "phase")
+    assert steps[0] == 0
+    assert values.shape == (len(steps), 3)
+
+    for step_no in range(len(tracked_result)):
+        row = values[np.searchsorted(steps, step_no, side="right") - 1]
+        state = tracked_result.get_step(step_no)
+        assert list(row) == [state.get_site_state(s)["phase"] for s in site_ids]
+
+    single_steps, single_values = tracked_result.site_trajectory(5, "a")
+    assert single_values.ndim == 1
+    assert single_values[-1] == tracked_result.live_state.get_site_state(5)["a"]
+    assert len(single_steps) == len(set(single_steps))
+
+
+def test_site_trajectory_with_checkpoint(initial_state):
+    result = SimulationResult(initial_state, max_history=40, track_site_history=True)
+    for step in range(200):
+        result.add_step({step % 4: {"value": step}})
+
+    assert min(result.site_history(0)) > result.earliest_available_step
+    steps, values = result.site_trajectory(1, "value")
+    assert steps[0] == result.earliest_available_step
+    assert list(steps[1:]) == result.site_history(1)
+    assert values[-1] == 197
+
+
+def test_site_trajectory_live_compress(initial_state):
+    result = SimulationResult(initial_state, compress_freq=10, live_compress=True)
+    for step in range(50):
+        result.add_step({0: {"value": step}})
+
+    steps, values = result.site_trajectory(0, "value")
+    assert list(steps) == [0, 10, 20, 30, 40, 50]
+    assert list(values) == [None, 9, 19, 29, 39, 49]
@@ -52,3 +52,12 @@ def test_states_equal():
     state2.batch_update(updates)
 
     assert state1 == state2
+
+
+def test_site_values():
+    state = SimulationState()
+    state.set_site_state(0, {"a": 1})
+    state.set_site_state(2, {"a": 3, "b": 4})
+
+    assert state.site_values("a").tolist() == [1, None, 3]
+    assert state.site_values("b", num_sites=4, default=0).tolist() == [0, 0, 4, 0]
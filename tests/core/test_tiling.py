@@ -0,0 +1,106 @@
+import pytest
+
+import math
+
+import numpy as np
+
+from pylattica.core import Lattice, PeriodicStructure
+from pylattica.core.neighborhood_builders import (
+    AnnularNeighborhoodBuilder,
+    DistanceNeighborhoodBuilder,
+    MotifNeighborhoodBuilder,
+)
+
+SKEW_VECS = [[1, 0], [0.5, 0.75]]
+HEX_VECS = [[1, 0], [0.5, math.sqrt(3) / 2]]
+
+
+def _untiled(struct):
+    untiled = PeriodicStructure.from_dict(struct.as_dict())
+    assert untiled.tiling is None
+    return untiled
+
+
+def _assert_same(tiled, untiled, num_sites):
+    for site_id in range(num_sites):
+        assert sorted(tiled.neighbors_of(site_id, True)) == sorted(
+            untiled.neighbors_of(site_id, True)
+        )
+
+
+def test_build_from_records_tiling():
+    lattice = Lattice(SKEW_VECS)
+    motif = {"A": [[0, 0]], "B": [[0.5, 0.5]]}
+    struct = PeriodicStructure.build_from(lattice, (3, 4), motif, frac_coords=True)
+
+    tiling = struct.tiling
+    assert tiling.num_basis == 2
+    assert tiling.num_tiles == 12
+    assert tiling.basis_classes == ["A", "B"]
+
+    # Site IDs follow ravel_multi_index(cell) * num_basis + basis index
+    for cell_idx, cell in enumerate(tiling.cell_coords()):
+        for b in range(tiling.num_basis):
+            expected = lattice.get_cartesian_coords(cell + tiling.basis_frac_coords[b])
+            site_id = struct.id_at(expected)
+            assert site_id == cell_idx * tiling.num_basis + b
+
+    struct.add_site("A", [10, 10])
+    assert struct.tiling is None
+
+
+def test_untileable_structures():
+    # Cells of a skewed lattice are not translated by its rows
+    struct = PeriodicStructure.build_from(Lattice(SKEW_VECS), (3, 3), [[0, 0]])
+    assert struct.tiling is None
+
+    # Site locations are rounded
+    struct = PeriodicStructure.build_from(
+        Lattice(HEX_VECS), (3, 3), [[0, 0]], frac_coords=True
+    )
+    assert struct.tiling is None
+
+
+@pytest.mark.parametrize(
+    "vecs, frac_coords",
+    [([[1, 0], [0, 1]], False), (SKEW_VECS, True), ([[2, 0], [0, 1]], False)],
+)
+@pytest.mark.parametrize("periodic", [True, (True, False), False])
+@pytest.mark.parametrize("size", [(5, 4), (2, 2), (1, 3)])
+def test_tiled_builders_match_untiled(vecs, frac_coords, periodic, size):
+    lattice = Lattice(vecs, periodic)
+    motif = {"A": [[0, 0]], "B": [[0.5, 0.5]]}
+    struct = PeriodicStructure.build_from(lattice, size, motif, frac_coords=frac_coords)
+    assert struct.tiling is not None
+    untiled = _untiled(struct)
+
+    offsets = [(1, 0), (0, 1), (-1, 0), (0.5, 0.5), (-0.5, -0.5), (0, 0)]
+    builders = [
+        DistanceNeighborhoodBuilder(1.01),
+        DistanceNeighborhoodBuilder(2.3),
+        AnnularNeighborhoodBuilder(0.9, 1.8),
+        MotifNeighborhoodBuilder(
+            [tuple(vec) for vec in lattice.get_cartesian_coords(offsets)]
+        ),
+    ]
+    num_sites = len(struct.site_ids)
+    for builder in builders:
+        for site_class in [None, "B"]:
+            _assert_same(
+                builder.get(struct, site_class=site_class),
+                builder.get(untiled, site_class=site_class),
+                num_sites,
+            )
+
+
+def test_tiled_motif_builder_keeps_neighbor_order():
+    lattice = Lattice([[1, 0, 0], [0, 1, 0], [0, 0, 1]], (True, True, False))
+    struct = PeriodicStructure.build_from(lattice, (3, 4, 2), [[0, 0, 0]])
+    offsets = [(0, 0, 1), (1, 0, 0), (0, -1, 0), (0, 0, -1), (3, 0, 0)]
+
+    builder = MotifNeighborhoodBuilder(offsets)
+    tiled = builder.get(struct)
+    untiled = builder.get(_untiled(struct))
+    assert np.array_equal(tiled.indptr, untiled.indptr)
+    assert np.array_equal(tiled.indices, untiled.indices)
+    assert np.array_equal(tiled.weights, untiled.weights)
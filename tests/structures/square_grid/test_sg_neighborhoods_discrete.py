@@ -1,5 +1,7 @@
 import pytest
 
+import numpy as np
+
 from pylattica.structures.square_grid.neighborhoods import (
     CircularNeighborhoodBuilder,
     MooreNbHoodBuilder,
@@ -9,7 +11,9 @@ from pylattica.structures.square_grid.neighborhoods import (
     PseudoHexagonalNeighborhoodBuilder3D,
     VonNeumannNbHood3DBuilder,
 )
+from pylattica.core import CSRNeighborhood, GridNeighborhood, PeriodicStructure
 from pylattica.core.constants import SITE_ID
+from pylattica.core.neighborhood_builders import MotifNeighborhoodBuilder
 from pylattica.structures.square_grid.structure_builders import (
     SimpleSquare2DStructureBuilder,
     SimpleSquare3DStructureBuilder,
@@ -86,3 +90,69 @@ def test_von_neumann_nb_3d_hood():
     nbh = nb_builder.get(struct)
     nbs = nbh.neighbors_of(0)
     assert len(nbs) == 6
+
+
+def test_von_neumann_nb_3d_hood_weights():
+    struct = SimpleSquare3DStructureBuilder().build(6)
+    nbhood = VonNeumannNbHood3DBuilder(2).get(struct)
+    weights = {weight for _, weight in nbhood.neighbors_of(0, include_weights=True)}
+    assert weights == {1.0, np.sqrt(2), 2.0}
+
+    # On tiny grids offsets wrap onto the site itself and onto each other, and
+    # each neighbor has the weight of the last offset that reaches it
+    tiny = VonNeumannNbHood3DBuilder(1).get(SimpleSquare3DStructureBuilder().build(1))
+    assert tiny.neighbors_of(0, include_weights=True) == [(0, 1.0)]
+
+    small = VonNeumannNbHood3DBuilder(3).get(SimpleSquare3DStructureBuilder().build(2))
+    assert sorted(small.neighbors_of(0, include_weights=True)) == [
+        (0, 2.0),
+        (1, 3.0),
+        (2, np.sqrt(5)),
+        (3, np.sqrt(2)),
+        (4, np.sqrt(5)),
+        (5, np.sqrt(2)),
+        (6, np.sqrt(2)),
+        (7, np.sqrt(3)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "builder, struct_builder",
+    [
+        (VonNeumannNbHood2DBuilder(2), SimpleSquare2DStructureBuilder()),
+        (MooreNbHoodBuilder(1), SimpleSquare2DStructureBuilder()),
+        (MooreNbHoodBuilder(1, dim=3), SimpleSquare3DStructureBuilder()),
+        (VonNeumannNbHood3DBuilder(1), SimpleSquare3DStructureBuilder()),
+    ],
+)
+@pytest.mark.parametrize("periodic", [True, False])
+def test_grid_builders_are_implicit(builder, struct_builder, periodic):
+    struct_builder.lattice.periodic = tuple(
+        periodic for _ in struct_builder.lattice.periodic
+    )
+    struct = struct_builder.build(6)
+    nbhood = builder.get(struct)
+    assert isinstance(nbhood, GridNeighborhood)
+
+    explicit = MotifNeighborhoodBuilder.get(builder, struct)
+    assert isinstance(explicit, CSRNeighborhood)
+    for site_id in struct.site_ids:
+        assert nbhood.neighbors_of(site_id, True) == explicit.neighbors_of(
+            site_id, True
+        )
+
+
+def test_grid_builders_fall_back_to_explicit():
+    # Offsets of size 2 wrap onto each other in a 3 site periodic grid
+    small = SimpleSquare2DStructureBuilder().build(3)
+    nbhood = MooreNbHoodBuilder(2).get(small)
+    assert isinstance(nbhood, CSRNeighborhood)
+    assert len(nbhood.neighbors_of(0)) == 8
+
+    # Structures with more than one site per cell
+    struct = PeriodicStructure.build_from(
+        SimpleSquare2DStructureBuilder().lattice,
+        (4, 4),
+        {"A": [[0, 0]], "B": [[0.5, 0.5]]},
+    )
+    assert isinstance(VonNeumannNbHood2DBuilder().get(struct), CSRNeighborhood)